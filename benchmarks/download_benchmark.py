@@ -0,0 +1,105 @@
+from utils.imports import *
+from utils.variables import *
+import data_request.request as request
+from data_request.mock_server import start_mock_server
+
+
+# --- Benchmark of the downloader against the local mock server ---
+# Runs request_all_data_gambia on synthetic points for each combination of concurrency and batch size, and measures
+# the points saved per second. The response cache is disabled during the runs so that every point is really requested.
+
+def make_coordinates_file(path, n_points):
+    """
+    Writes a coordinates file with points spread over Gambia.
+
+    Args:
+        path (str): Path of the CSV file.
+        n_points (int): Number of points.
+    """
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "lat": rng.uniform(13.1, 13.8, n_points),
+        "lon": rng.uniform(-16.8, -13.8, n_points),
+    }).to_csv(path, index=False)
+
+
+def run_download(url, coordinates_csv, concurrency, batch_size, requests_per_minute, dataset_format):
+    """
+    Downloads all the points into a temporary folder and measures the run.
+
+    Args:
+        url (str): URL of the mock climate endpoint.
+        coordinates_csv (str): Path to the coordinates file.
+        concurrency (int): Number of requests running at the same time.
+        batch_size (int): Number of points requested in one call.
+        requests_per_minute (float): Request budget of the downloader, 0 for no limit.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+
+    Returns:
+        dict: Wall time, points saved and points per second.
+    """
+    with tempfile.TemporaryDirectory() as dataset_folder, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        results = request.request_all_data_gambia(coordinates_csv, dataset_folder, concurrency=concurrency,
+                                                  requests_per_minute=requests_per_minute, batch_size=batch_size,
+                                                  dataset_format=dataset_format, url=url)
+        wall_time = time.perf_counter() - start
+
+    saved = int((results["status"] == "done").sum())
+    return {"concurrency": concurrency, "batch_size": batch_size, "wall_time_s": wall_time,
+            "points_saved": saved, "points_failed": len(results) - saved, "points_per_s": saved / wall_time}
+
+
+def run_download_benchmark(n_points, concurrencies, batch_sizes, requests_per_minute, dataset_format, server_settings):
+    """
+    Starts the mock server and measures the downloader for each combination of concurrency and batch size.
+
+    Args:
+        n_points (int): Number of points to download in each run.
+        concurrencies (list): Concurrency levels to measure.
+        batch_sizes (list): Batch sizes to measure.
+        requests_per_minute (float): Request budget of the downloader, 0 for no limit.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+        server_settings (dict): Latency, error rate, request limit and seed of the mock server.
+
+    Returns:
+        pd.DataFrame: One row per run.
+    """
+    server = start_mock_server(**server_settings)
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as folder, request.get_response_cache().disabled():
+            coordinates_csv = os.path.join(folder, "coordinates.csv")
+            make_coordinates_file(coordinates_csv, n_points)
+            # Warm up the server, so that building the synthetic data is not measured
+            run_download(server.url, coordinates_csv, max(concurrencies), max(batch_sizes), 0, dataset_format)
+
+            for concurrency, batch_size in itertools.product(concurrencies, batch_sizes):
+                runs.append(run_download(server.url, coordinates_csv, concurrency, batch_size, requests_per_minute, dataset_format))
+                print(runs[-1])
+    finally:
+        server.shutdown()
+
+    return pd.DataFrame(runs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the points per second of the downloader against the local mock server.")
+    parser.add_argument("--points", type=int, default=40, help="Number of points downloaded in each run.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Concurrency levels to measure.")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 10], help="Batch sizes to measure.")
+    parser.add_argument("--requests-per-minute", type=float, default=0, help="Request budget of the downloader, 0 for no limit.")
+    parser.add_argument("--format", choices=list(DATASET_EXTENSIONS), default=DATASET_FORMAT, help="Format of the per point files.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fixed delay of each answer of the server, in seconds.")
+    parser.add_argument("--latency-per-location", type=float, default=0.02, help="Additional delay of the server for each location, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of a server error.")
+    parser.add_argument("--server-requests-per-minute", type=int, default=0, help="Requests accepted per minute by the server before answering 429, 0 for no limit.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are written.")
+    args = parser.parse_args()
+
+    server_settings = {"latency": args.latency, "latency_per_location": args.latency_per_location, "error_rate": args.error_rate,
+                       "requests_per_minute": args.server_requests_per_minute}
+    results = run_download_benchmark(args.points, args.concurrency, args.batch_size, args.requests_per_minute, args.format, server_settings)
+    print(results.to_string(index=False, float_format=lambda value: f"{value:,.2f}"))
+    if args.output:
+        results.to_json(args.output, orient="records", indent=2)
@@ -0,0 +1,101 @@
+from utils.imports import *
+from utils.variables import *
+from data_request.request import build_api_params, fill_daily_dict, fill_daily_block
+from data_request.synthetic import build_daily_response, parse_responses
+
+
+# --- Micro benchmark of the ingestion of the API responses ---
+# Compares the historical path (dictionary of arrays with repeated lat/lon columns, then a DataFrame) with the
+# preallocated float32 block filled by fill_daily_block. The responses are synthetic FlatBuffers messages with
+# the same layout as the real ones, so that nothing is requested.
+
+def ingest_with_dict(responses, lats, lons):
+    """
+    Historical ingestion: fill_daily_dict then a DataFrame, as it was done before writing the CSV file.
+
+    Args:
+        responses (list): API responses.
+        lats (list): Latitude of each response.
+        lons (list): Longitude of each response.
+    """
+    for response, lat, lon in zip(responses, lats, lons):
+        daily_data = fill_daily_dict(response.Daily(), lat, lon)
+        pd.DataFrame(data = daily_data)
+
+
+def ingest_with_block(responses, lats, lons):
+    """
+    New ingestion: the values of each response are copied into the same preallocated block.
+
+    Args:
+        responses (list): API responses.
+        lats (list): Latitude of each response.
+        lons (list): Longitude of each response.
+    """
+    block = None
+    for response in responses:
+        _, block = fill_daily_block(response.Daily(), block)
+
+
+def measure(function, responses, lats, lons, repeats):
+    """
+    Measures the time per response and the memory allocated by an ingestion function.
+
+    Args:
+        function (callable): Ingestion function to measure.
+        responses (list): API responses.
+        lats (list): Latitude of each response.
+        lons (list): Longitude of each response.
+        repeats (int): Number of timed runs, the best one is kept.
+
+    Returns:
+        dict: Time per response in milliseconds and peak of the memory allocated during the run.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(responses, lats, lons)
+        timings.append(time.perf_counter() - start)
+
+    # Allocations are traced in a separate run, tracing slows the code down
+    tracemalloc.start()
+    allocated_before = tracemalloc.get_traced_memory()[0]
+    function(responses, lats, lons)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms_per_response": min(timings) / len(responses) * 1000, "peak_bytes": peak - allocated_before}
+
+
+def run_ingestion_benchmark(n_responses, repeats):
+    """
+    Builds synthetic responses for the whole date range of the downloader and compares both ingestion paths.
+
+    Args:
+        n_responses (int): Number of responses, as in a batch of points.
+        repeats (int): Number of timed runs of each path.
+
+    Returns:
+        pd.DataFrame: Measures of each path.
+    """
+    params = build_api_params(None, None)
+    lats = [13.0 + 0.05 * i for i in range(n_responses)]
+    lons = [-16.0 + 0.05 * i for i in range(n_responses)]
+    payload = b"".join(build_daily_response(lat, lon, params["start_date"], params["end_date"], VARIABLES_LIST)
+                       for lat, lon in zip(lats, lons))
+    responses = parse_responses(payload)
+
+    results = pd.DataFrame({
+        "dict + DataFrame": measure(ingest_with_dict, responses, lats, lons, repeats),
+        "preallocated block": measure(ingest_with_block, responses, lats, lons, repeats),
+    }).T
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the ingestion of the API responses before and after the preallocated block.")
+    parser.add_argument("--responses", type=int, default=10, help="Number of responses ingested in a row.")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of timed runs, the best one is kept.")
+    args = parser.parse_args()
+
+    print(run_ingestion_benchmark(args.responses, args.repeats).to_string(float_format=lambda value: f"{value:,.3f}"))
@@ -0,0 +1,243 @@
+from utils.imports import *
+from utils.variables import *
+from data_request.request import get_point_path, write_daily_csv, write_daily_parquet
+from data_request.synthetic import generate_synthetic_values
+from data_processing.main_functions import (loads_data, loads_projected_data, daily_work, monthly_work, yearly_work,
+                                            loop_to_process_data_on_periods, convert_into_dataframe, create_final_score_dataframe)
+from rasterization.raster_from_point import create_raster_from_df, write_multiband_tif
+
+
+# --- Benchmark of each stage of the scoring pipeline ---
+# Writes a deterministic synthetic dataset with the layout of the downloaded files, then times each stage of
+# process_data on every point and the rasterization of the final scores, with the peak of the memory allocated
+# by each stage. The results are written as JSON, to be compared with the results of another commit.
+
+# Number of points, number of years and raster resolution of each preset
+BENCHMARK_PRESETS = {
+    "small": {"points": 4, "years": 10, "resolution": 0.01},
+    "medium": {"points": 50, "years": 40, "resolution": 0.005},
+    "national": {"points": 400, "years": 101, "resolution": 0.001},
+}
+# Score type whose periods are rasterized, as main_epoch_loop
+BENCHMARK_SCORE_TYPE = "drought"
+
+
+def make_synthetic_dataset(dataset_folder, n_points, n_years, dataset_format=DATASET_FORMAT, start_date=DATA_START_DATE):
+    """
+    Writes the daily files of points spread over Gambia, with the synthetic values of the mock server. The same
+    arguments always give the same files.
+
+    Args:
+        dataset_folder (str): Folder of the files.
+        n_points (int): Number of points.
+        n_years (int): Number of years of each file.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+        start_date (str): First day of the files.
+
+    Returns:
+        list: Paths of the files, in the order of the points.
+    """
+    rng = np.random.default_rng(0)
+    lats = np.round(rng.uniform(13.1, 13.8, n_points), 4)
+    lons = np.round(rng.uniform(-16.8, -13.8, n_points), 4)
+    start = pd.Timestamp(start_date)
+    dates = pd.date_range(start, start + pd.DateOffset(years=n_years) - pd.Timedelta(days=1), freq="D")
+    seconds = (dates - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)
+
+    paths = []
+    for index, (lat, lon) in enumerate(zip(lats, lons)):
+        block = np.column_stack([generate_synthetic_values(lat, lon, variable, dates) for variable in VARIABLES_LIST])
+        path = get_point_path(dataset_folder, DATASET_FILENAME_BASE, index, dataset_format)
+        if dataset_format == "parquet":
+            write_daily_parquet(seconds.values, block, path, lat, lon)
+        else:
+            write_daily_csv(seconds.values, block, path, lat, lon)
+        paths.append(path)
+    return paths
+
+
+def measure(function, *args, repeats=1):
+    """
+    Measures the wall time and the memory allocated by one call of a function. The memory is traced in a
+    separate call, tracing slows the code down. The buffers allocated by Arrow are not traced.
+
+    Args:
+        function (callable): Function to measure.
+        *args: Arguments of the function. They must not be modified by it.
+        repeats (int): Number of timed calls, the best one is kept.
+
+    Returns:
+        tuple: Result of the function and dictionary of the wall time in seconds and of the peak of the
+        allocated memory in bytes.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    allocated_before = tracemalloc.get_traced_memory()[0]
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"wall_s": min(timings), "peak_bytes": peak - allocated_before}
+
+
+def add_measure(results, stage, measures):
+    """
+    Adds the measures of one call of a stage to the totals of the stage.
+
+    Args:
+        results (dict): Totals of each stage.
+        stage (str): Name of the stage.
+        measures (dict): Measures of the call, as given by measure.
+    """
+    totals = results.setdefault(stage, {"calls": 0, "wall_s": 0.0, "peak_bytes": 0})
+    totals["calls"] += 1
+    totals["wall_s"] += measures["wall_s"]
+    totals["peak_bytes"] = max(totals["peak_bytes"], measures["peak_bytes"])
+
+
+def time_point_stages(filename, results, repeats):
+    """
+    Runs the stages of process_data on one point, measuring each of them.
+
+    Args:
+        filename (str): Path to the data file of the point.
+        results (dict): Totals of each stage, updated.
+        repeats (int): Number of timed calls of each stage.
+
+    Returns:
+        pd.DataFrame: Final score row of the point.
+    """
+    _, measures = measure(loads_data, filename, repeats=repeats)
+    add_measure(results, "loads_data", measures)
+    (data, lat, lon), measures = measure(loads_projected_data, filename, repeats=repeats)
+    add_measure(results, "loads_projected_data", measures)
+
+    # daily_work and yearly_work modify the frames they are given, each call gets its own copy
+    (data_daily_growing_season, data_yearly_mean_temp), measures = measure(lambda: daily_work(data.copy()), repeats=repeats)
+    add_measure(results, "daily_work", measures)
+    (_, data_yearly_aggregates), measures = measure(monthly_work, data_daily_growing_season, repeats=repeats)
+    add_measure(results, "monthly_work", measures)
+    (data_yearly_growing_season, _), measures = measure(
+        lambda: yearly_work(data_daily_growing_season, data_yearly_aggregates.copy(), data_yearly_mean_temp), repeats=repeats)
+    add_measure(results, "yearly_work", measures)
+    risk_df_data, measures = measure(loop_to_process_data_on_periods, data_yearly_growing_season, SCORE_COLUMNS, repeats=repeats)
+    add_measure(results, "loop_to_process_data_on_periods", measures)
+
+    risk_df, final_score_columns = convert_into_dataframe(risk_df_data)
+    return create_final_score_dataframe(lat, lon, PERIODS, final_score_columns, risk_df)
+
+
+def run_raster_stages(final_score_df, results, resolution, shapefile_path, output_folder, repeats):
+    """
+    Rasterizes the periods of one score type of the final scores and writes them as a multiband GeoTIFF,
+    as main_epoch_loop, measuring both stages.
+
+    Args:
+        final_score_df (pd.DataFrame): Final scores of all the points.
+        results (dict): Totals of each stage, updated.
+        resolution (float): Raster cell size in degrees.
+        shapefile_path (str): Shapefile of the country, used as the mask.
+        output_folder (str): Folder of the GeoTIFF.
+        repeats (int): Number of timed calls of each stage.
+    """
+    gdf = gpd.GeoDataFrame(final_score_df, geometry=gpd.points_from_xy(final_score_df["LON"], final_score_df["LAT"]), crs="EPSG:4326")
+    grid_score_list, transform_list = [], []
+    for column in [column for column in gdf.columns if BENCHMARK_SCORE_TYPE in column]:
+        (grid_score, transform), measures = measure(create_raster_from_df, gdf, column, shapefile_path, True, resolution, repeats=repeats)
+        add_measure(results, "create_raster_from_df", measures)
+        grid_score_list.append(grid_score)
+        transform_list.append(transform)
+
+    output_path = os.path.join(output_folder, f"{BENCHMARK_SCORE_TYPE}_all_periods.tif")
+    _, measures = measure(write_multiband_tif, output_path, grid_score_list, transform_list, repeats=repeats)
+    add_measure(results, "write_multiband_tif", measures)
+
+
+def run_pipeline_benchmark(n_points, n_years, resolution, dataset_format=DATASET_FORMAT, repeats=1, shapefile_path=SHAPE_FILE_PATH):
+    """
+    Writes a synthetic dataset in a temporary folder and measures each stage on it.
+
+    Args:
+        n_points (int): Number of points.
+        n_years (int): Number of years of each point.
+        resolution (float): Raster cell size in degrees.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+        repeats (int): Number of timed calls of each stage, the best one is kept.
+        shapefile_path (str): Shapefile of the country, used as the mask of the rasters.
+
+    Returns:
+        dict: Settings of the run and totals of each stage: calls, wall time, wall time per call and peak of the
+        allocated memory of one call.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        filenames = make_synthetic_dataset(folder, n_points, n_years, dataset_format)
+        generation_s = time.perf_counter() - start
+
+        final_score_rows = [time_point_stages(filename, results, repeats) for filename in tqdm(filenames, desc="Measuring the stages of each point")]
+        run_raster_stages(pd.concat(final_score_rows, ignore_index=True), results, resolution, shapefile_path, folder, repeats)
+
+    for totals in results.values():
+        totals["wall_s_per_call"] = totals["wall_s"] / totals["calls"]
+    return {
+        "settings": {"points": n_points, "years": n_years, "resolution": resolution, "format": dataset_format, "repeats": repeats,
+                     "time": datetime.now().isoformat(timespec="seconds"), "numpy": np.__version__, "pandas": pd.__version__},
+        "generation_s": generation_s,
+        "stages": results,
+    }
+
+
+def compare_results(baseline, results):
+    """
+    Compares the wall time and the memory of each stage with the ones of a previous run.
+
+    Args:
+        baseline (dict): Results of the previous run, as written by this benchmark.
+        results (dict): Results of the current run.
+
+    Returns:
+        pd.DataFrame: Wall time per call and peak memory of both runs and their ratios, one row per stage.
+    """
+    before = pd.DataFrame.from_dict(baseline["stages"], orient="index")
+    after = pd.DataFrame.from_dict(results["stages"], orient="index")
+    comparison = pd.DataFrame({
+        "before_s_per_call": before["wall_s_per_call"],
+        "after_s_per_call": after["wall_s_per_call"],
+        "before_peak_bytes": before["peak_bytes"],
+        "after_peak_bytes": after["peak_bytes"],
+    })
+    comparison["time_ratio"] = comparison["after_s_per_call"] / comparison["before_s_per_call"]
+    comparison["memory_ratio"] = comparison["after_peak_bytes"] / comparison["before_peak_bytes"]
+    return comparison
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures each stage of the scoring pipeline on a synthetic dataset.")
+    parser.add_argument("--preset", choices=list(BENCHMARK_PRESETS), default="small", help="Number of points, years and raster resolution.")
+    parser.add_argument("--points", type=int, default=None, help="Number of points, instead of the one of the preset.")
+    parser.add_argument("--years", type=int, default=None, help="Number of years of each point, instead of the one of the preset.")
+    parser.add_argument("--resolution", type=float, default=None, help="Raster cell size in degrees, instead of the one of the preset.")
+    parser.add_argument("--format", choices=list(DATASET_EXTENSIONS), default=DATASET_FORMAT, help="Format of the per point files.")
+    parser.add_argument("--repeats", type=int, default=1, help="Number of timed calls of each stage, the best one is kept.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are written.")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous run to compare the results with.")
+    args = parser.parse_args()
+
+    preset = BENCHMARK_PRESETS[args.preset]
+    results = run_pipeline_benchmark(args.points or preset["points"], args.years or preset["years"], args.resolution or preset["resolution"],
+                                     args.format, args.repeats)
+    results["settings"]["preset"] = args.preset
+    print(pd.DataFrame.from_dict(results["stages"], orient="index").to_string(float_format=lambda value: f"{value:,.4f}"))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        print(compare_results(baseline, results).to_string(float_format=lambda value: f"{value:,.4f}"))
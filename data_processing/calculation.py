@@ -1,8 +1,13 @@
 from utils.imports import *
 from utils.variables import *
-from data_processing.classify import classify_risk_frequency, classify_risk_score
+from data_processing.classify import classify_risk_frequency, classify_risk_score, classify_risk_score_array
+from data_processing.profiling import profiled
  
 
+# Comparisons of the rule tables
+COMPARISONS = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}
+
+
 # --- Daily calculation ---
 
 def filter_growing_season(data):
@@ -31,8 +36,7 @@ def add_indicators(data):
         (data['temperature_2m_max'] + data['temperature_2m_min']) / 2 - DAILY_THRESHOLDS['gdd_base_temp'], 0)
     data = data.assign(
         is_extreme_precipitation=data['precipitation_sum'] > DAILY_THRESHOLDS['daily_ext_prec_threshold'],
-        consecutive_dry_days=(data['precipitation_sum'] < DAILY_THRESHOLDS['daily_dry_day_threshold']).astype(int)
-                            .groupby((data['precipitation_sum'] >= DAILY_THRESHOLDS['daily_dry_day_threshold']).cumsum()).cumsum(),
+        **spell_indicators(data, data.index),
         is_heat_stress=np.where(
                 data.index.month > 6,
                 data['temperature_2m_max'] > DAILY_THRESHOLDS['daily_heat_stress_threshold'],
@@ -46,53 +50,208 @@ def add_indicators(data):
     datajuloct = data[data.index.month > 6].groupby(data[data.index.month > 6].index.year)['temperature_2m_mean'].mean()
     return data, datajuloct
 
-    
-# --- Monthly calculation ---
 
-def aggregate_monthly(data_daily : pd.DataFrame):
+# --- Spell calculation ---
+def calculate_spells(in_spell, breaks_spell=None, segment_starts=None, reset=False):
     """
-    Aggregates daily data into monthly data for the growing season.
-    
+    Calculates spells of days in one pass: the length of the current spell on each day, and the longest spell
+    and the number of spells of each segment of days (for example each year or each season). A day that neither
+    is in a spell nor breaks it, because its data is missing, keeps the current length.
+
     Args:
-        data (DataFrame): Data for the growing season.
+        in_spell (np.ndarray): (..., days) True for the days extending a spell.
+        breaks_spell (np.ndarray): (..., days) True for the days ending a spell, the other days by default.
+        segment_starts (np.ndarray): Position of the first day of each segment, the whole array is one segment if None.
+        reset (bool): Start the spells again at the beginning of each segment.
 
     Returns:
-        DataFrame: Monthly aggregated data.
+        tuple:
+            - (np.ndarray): (..., days) length of the current spell.
+            - (np.ndarray): (..., segments) length of the longest spell.
+            - (np.ndarray): (..., segments) number of spells started in each segment.
+    """
+    in_spell = np.asarray(in_spell, dtype=bool)
+    breaks_spell = ~in_spell if breaks_spell is None else np.asarray(breaks_spell, dtype=bool)
+    segment_starts = np.array([0]) if segment_starts is None else np.asarray(segment_starts)
+
+    spell_days = np.cumsum(in_spell, axis=-1)
+    # The spell days only grow, so the count at the last break is the running maximum of the counts at the breaks
+    counts_at_break = np.where(breaks_spell, spell_days, 0)
+    if reset:
+        is_segment_start = np.zeros(in_spell.shape[-1], dtype=bool)
+        is_segment_start[segment_starts] = True
+        # A new segment starts as if the day before it broke the spell
+        counts_at_break = np.maximum(counts_at_break, np.where(is_segment_start, spell_days - in_spell, 0))
+    run = spell_days - np.maximum.accumulate(counts_at_break, axis=-1)
+
+    longest = np.maximum.reduceat(run, segment_starts, axis=-1)
+    spell_count = np.add.reduceat(in_spell & (run == 1), segment_starts, axis=-1)
+    return run, longest, spell_count
+
+
+def spell_indicators(values, dates, spells=SPELL_INDICATORS, reset=SPELL_RESET_AT_SEASON_START):
     """
-    return data_daily.resample('ME').agg(MONTHLY_AGG_FUNCTIONS)
+    Calculates the length of the current spell of each day for each spell indicator.
 
+    Args:
+        values (DataFrame | dict): Daily data of one point, or (points, days) array of each variable.
+        dates (pd.DatetimeIndex): Growing season dates.
+        spells (dict): (variable, comparison, threshold name) of each spell indicator, see SPELL_INDICATORS.
+        reset (bool): Start the spells again at the beginning of each growing season.
 
-def calculate_coefficient_of_variation(data_monthly):
+    Returns:
+        dict: Length of the current spell of each indicator, with the shape of the variables.
     """
-    Calculate the coefficient of variation (CV) for a given series.
-    
-    Arg:
-        series (Series): A pandas Series to calculate CV for.
+    season_starts = get_segment_starts(dates.year.values) if reset else None
+    indicators = {}
+    with np.errstate(invalid="ignore"):
+        for column, (variable, comparison, threshold) in spells.items():
+            variable_values = np.asarray(values[variable])
+            in_spell = COMPARISONS[comparison](variable_values, DAILY_THRESHOLDS[threshold])
+            indicators[column] = calculate_spells(in_spell, ~in_spell & ~np.isnan(variable_values), season_starts, reset)[0]
+
+    return indicators
+
     
+# --- Monthly and yearly calculation ---
+# The days are grouped by (year, month) over the growing season months only. The monthly resampling of the daily
+# data used to create a row for every calendar month, the months out of the season having null sums and no mean
+# temperature, and the coefficient of variation of the precipitation counts these null months: they are added
+# back in the calculation instead of being stored.
+
+def nan_mean_segments(values, starts):
+    """
+    Mean of each segment of days, ignoring the NaN, NaN for a segment without data.
+
+    Args:
+        values (np.ndarray): (points, days) values.
+        starts (np.ndarray): Start position of each segment.
+
     Returns:
-        float: Coefficient of variation (in %). Returns NaN if the count of non-NaN values is less than or equal to 1.
+        np.ndarray: (points, segments) means.
     """
-    return data_monthly.std() / data_monthly.mean() * 100 if data_monthly.count() > 1 else np.nan
+    is_valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(is_valid, values, 0), starts, axis=1, dtype=np.float64)
+    counts = np.add.reduceat(is_valid, starts, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
 
 
-def calculate_monthly_aggregations(data_monthly):
+def coefficient_of_variation_segments(values, starts, n_values=None):
     """
-    Aggregates daily data into monthly data and calculates coefficient of variation for temperature and precipitation.
-    
-    Arg:
-        data_monthly (DataFrame): Monthly weather data.
+    Coefficient of variation of each segment of months, in %, with the sample standard deviation. The NaN are
+    ignored and the result is NaN when a segment has one value or less.
+
+    Args:
+        values (np.ndarray): (points, months) monthly values.
+        starts (np.ndarray): Start position of each segment.
+        n_values (np.ndarray): Number of months of each segment, the missing ones being null values. None if the
+            missing months have no value.
 
     Returns:
-        DataFrame: Monthly data with CV columns added.
+        np.ndarray: (points, segments) coefficients of variation.
     """
-    # Coefficient of variation for temperature and precipitation
-    data_monthly['cv_temperature'] = data_monthly['temperature_2m_mean'].groupby(
-        data_monthly.index.year).transform(calculate_coefficient_of_variation)
-    
-    data_monthly['cv_precipitation'] = data_monthly['precipitation_sum'].groupby(
-        data_monthly.index.year).transform(calculate_coefficient_of_variation)
+    is_valid = ~np.isnan(values)
+    lengths = np.diff(np.append(starts, values.shape[1]))
+    counts = np.add.reduceat(is_valid, starts, axis=1)
+    n_null = 0 if n_values is None else n_values - lengths
+    counts = counts + n_null
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.add.reduceat(np.where(is_valid, values, 0), starts, axis=1, dtype=np.float64) / counts
+        deviations = np.where(is_valid, values - np.repeat(means, lengths, axis=1), 0)
+        variances = (np.add.reduceat(deviations ** 2, starts, axis=1) + n_null * means ** 2) / (counts - 1)
+        return np.where(counts > 1, np.sqrt(variances) / means * 100, np.nan)
+
+
+def aggregate_season_arrays(daily, dates):
+    """
+    Aggregates the daily indicators into months and years of the growing season in one pass: MONTHLY_AGG_FUNCTIONS,
+    the coefficients of variation of each year and YEARLY_AGG_FUNCTIONS. The coefficient of variation of the
+    precipitation counts the calendar months out of the season as null months, as the monthly resampling did.
+
+    Args:
+        daily (dict): (points, days) array of each column of MONTHLY_AGG_FUNCTIONS.
+        dates (pd.DatetimeIndex): Sorted growing season dates.
+
+    Returns:
+        tuple:
+            - (np.ndarray): Key of each month, year * 12 + month - 1.
+            - (dict): (points, months) array of each monthly column.
+            - (np.ndarray): The years.
+            - (dict): (points, years) array of each yearly column.
+    """
+    day_months = dates.year.values * 12 + dates.month.values - 1
+    month_starts = get_segment_starts(day_months)
+    months = day_months[month_starts]
+    year_starts = get_segment_starts(months // 12)
+    years = months[year_starts] // 12
+
+    monthly, monthly_float = {}, {}
+    for column, function in MONTHLY_AGG_FUNCTIONS.items():
+        values = np.asarray(daily[column])
+        if function == "sum":
+            # The days without data count as 0, as in the resampling
+            monthly_float[column] = np.add.reduceat(np.nan_to_num(values.astype(np.float64)), month_starts, axis=1)
+            monthly[column] = monthly_float[column] if values.dtype.kind == "f" else monthly_float[column].astype(np.int64)
+        elif function == "max":
+            monthly[column] = monthly_float[column] = np.fmax.reduceat(values.astype(np.float64), month_starts, axis=1)
+        else:
+            monthly[column] = monthly_float[column] = nan_mean_segments(values, month_starts)
+
+    # Calendar months of each year between the first and the last month of data, as built by the resampling
+    n_calendar_months = np.minimum(months[-1], years * 12 + 11) - np.maximum(months[0], years * 12) + 1
+    coefficients = {
+        'cv_temperature': coefficient_of_variation_segments(monthly_float['temperature_2m_mean'], year_starts),
+        'cv_precipitation': coefficient_of_variation_segments(monthly_float['precipitation_sum'], year_starts, n_calendar_months),
+    }
+    months_per_year = np.diff(np.append(year_starts, len(months)))
+    for column, values in coefficients.items():
+        monthly[column] = np.repeat(values, months_per_year, axis=1)
+
+    yearly = {}
+    for column, function in YEARLY_AGG_FUNCTIONS.items():
+        if column in coefficients:
+            yearly[column] = coefficients[column]
+        elif function == "sum":
+            yearly[column] = np.add.reduceat(monthly_float[column], year_starts, axis=1)
+            if monthly[column].dtype.kind != "f":
+                yearly[column] = yearly[column].astype(np.int64)
+        elif function == "max":
+            yearly[column] = np.fmax.reduceat(monthly_float[column], year_starts, axis=1)
+        else:
+            yearly[column] = nan_mean_segments(monthly_float[column], year_starts)
+
+    return months, monthly, years, yearly
+
+
+def aggregate_growing_season(data_daily):
+    """
+    Aggregates the daily data of one point into monthly and yearly data of the growing season, without the
+    empty months out of the season.
     
-    return data_monthly
+    Args:
+        data_daily (DataFrame): Data for the growing season.
+
+    Returns:
+        tuple:
+            - (DataFrame): Monthly aggregated data with the coefficients of variation of their year.
+            - (DataFrame): Yearly aggregated data.
+    """
+    daily = {column: data_daily[column].to_numpy()[np.newaxis, :] for column in MONTHLY_AGG_FUNCTIONS}
+    months, monthly, years, yearly = aggregate_season_arrays(daily, data_daily.index)
+
+    # Same labels as the resampling: the last day of each month and of each year
+    month_index = pd.DatetimeIndex(pd.to_datetime({"year": months // 12, "month": months % 12 + 1, "day": 1})
+                                   + pd.offsets.MonthEnd(0), name=data_daily.index.name).tz_localize(data_daily.index.tz)
+    year_index = pd.DatetimeIndex(pd.to_datetime({"year": years, "month": 12, "day": 31}),
+                                  name=data_daily.index.name).tz_localize(data_daily.index.tz)
+    if len(year_index) > 2:
+        year_index.freq = year_index.inferred_freq
+
+    data_monthly = pd.DataFrame({column: values[0] for column, values in monthly.items()}, index=month_index)
+    data_yearly = pd.DataFrame({column: values[0] for column, values in yearly.items()}, index=year_index)
+    return data_monthly, data_yearly
+
 
 def add_threshold_flags(data_monthly):
     """
@@ -108,18 +267,6 @@ def add_threshold_flags(data_monthly):
 
 
 # --- Yearly calculation ---
-def aggregate_yearly(data_monthly: pd.DataFrame):
-    """
-    Aggregates monthly data into yearly data for the growing season.
-    
-    Args:
-        data (DataFrame): Data for the growing season.
-
-    Returns:
-        DataFrame: Monthly aggregated data.
-    """
-    return data_monthly.resample('YE').agg(YEARLY_AGG_FUNCTIONS)
-
 def season_indicator(data_daily, data_yearly, data_yearly_mean_temp):
     """
     Adds season start shift, and length to yearly data.
@@ -131,20 +278,116 @@ def season_indicator(data_daily, data_yearly, data_yearly_mean_temp):
     Returns:
         DataFrame: Updated yearly data with season indicators.
     """
-    # Apply the calculate_season_start and calculate_season_end functions to each year's data
-    season_start_shift = data_daily.groupby(data_daily.index.year).apply(lambda df: calculate_season_start(df)).values
-    season_length = data_daily.groupby(data_daily.index.year).apply(lambda df: calculate_season_length(df)).values
+    # Season start shift and length of all the years in one pass over the daily precipitation
+    season_start_shift, season_length = profiled("calculate_season_indicators", calculate_season_indicators,
+        data_daily['precipitation_sum'].to_numpy(dtype=np.float64)[np.newaxis, :], data_daily.index)
 
     # Now, assign these shifts to the corresponding year in `data_yearly_growing_season`
-    data_yearly['season_start_shift'] = season_start_shift
-    data_yearly['season_length'] = season_length
+    # The shifts stay whole days, they are only NaN if a year has no season start
+    data_yearly['season_start_shift'] = season_start_shift[0] if np.isnan(season_start_shift).any() else season_start_shift[0].astype(int)
+    data_yearly['season_length'] = season_length[0]
     data_yearly['temperature_2m_mean'] = data_yearly_mean_temp.values
-    data_yearly = data_yearly.join(data_yearly.apply(indicator_scores, axis=1, result_type='expand'))
+    data_yearly = data_yearly.join(pd.DataFrame(profiled("indicator_scores", indicator_scores, data_yearly), index=data_yearly.index))
 
     return data_yearly
 
 
 # --- Season calculation ---
+def get_segment_starts(keys):
+    """
+    Gives the position of the first element of each run of equal keys.
+
+    Args:
+        keys (np.ndarray): Sorted keys, for example the year of each day.
+
+    Returns:
+        np.ndarray: Start position of each segment.
+    """
+    return np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+
+
+def rolling_sums_in_years(values, day_years, window):
+    """
+    Sums of the last days of each day, the window never going over the previous year, as a rolling sum done year by year.
+
+    Args:
+        values (np.ndarray): (points, days) values.
+        day_years (np.ndarray): Year of each day.
+        window (int): Number of days of the window.
+
+    Returns:
+        np.ndarray: (points, days) sums, NaN when the window is not full or holds a NaN.
+    """
+    sums = np.full(values.shape, np.nan)
+    sums[:, window - 1:] = sum(values[:, offset:values.shape[1] - window + 1 + offset] for offset in range(window))
+    # The windows starting in the previous year are not full for a rolling sum done by year
+    full_window = np.zeros(len(day_years), dtype=bool)
+    full_window[window - 1:] = day_years[window - 1:] == day_years[:len(day_years) - window + 1]
+    sums[:, ~full_window] = np.nan
+    return sums
+
+
+def first_and_last_in_years(condition, year_starts):
+    """
+    Finds the first and the last day of each year where a condition is true.
+
+    Args:
+        condition (np.ndarray): (points, days) booleans.
+        year_starts (np.ndarray): Start position of each year.
+
+    Returns:
+        tuple: (points, years) positions of the first and of the last true day, -1 when there is none.
+    """
+    positions = np.arange(condition.shape[1])
+    first = np.minimum.reduceat(np.where(condition, positions, condition.shape[1]), year_starts, axis=1)
+    last = np.maximum.reduceat(np.where(condition, positions, -1), year_starts, axis=1)
+    return np.where(first == condition.shape[1], -1, first), last
+
+
+def calculate_season_indicators(precipitation, dates, threshold=5, consecutive_days=7, threshold_start=2, consecutive_days_start=7,
+                                threshold_end=2, consecutive_days_end=7):
+    """
+    Calculates the season start shift and the season length of every year at once, with the same rules as
+    calculate_season_start and calculate_season_length. The rolling sums are computed once over the whole series,
+    without windows going over two years, and the first and last threshold crossings of each year are found
+    with segment reductions. Works for one point or for several points stacked on the first axis.
+
+    Args:
+        precipitation (np.ndarray): (points, days) daily precipitation, the days being sorted.
+        dates (pd.DatetimeIndex): Dates of the days.
+        threshold (int): Cumulative precipitation threshold of the season start shift.
+        consecutive_days (int): Number of consecutive days of the season start shift.
+        threshold_start (int): Cumulative precipitation threshold for season start.
+        consecutive_days_start (int): Number of consecutive days for season start.
+        threshold_end (int): Cumulative precipitation threshold for season end.
+        consecutive_days_end (int): Number of consecutive days for season end.
+
+    Returns:
+        tuple:
+            - (np.ndarray): (points, years) season start shifts, NaN for a year without season start.
+            - (np.ndarray): (points, years) season lengths, 0 if no season is found.
+    """
+    day_years = dates.year.values
+    year_starts = get_segment_starts(day_years)
+    day_numbers = (dates - dates[0]).days.values
+    july_first = pd.to_datetime(pd.Series(day_years).astype(str) + "-07-01").dt.tz_localize(dates.tz)
+    days_from_july = (dates - pd.DatetimeIndex(july_first)).days.values
+
+    # The windows are the same by default, each window size is only summed once
+    rolling_sums = {window: rolling_sums_in_years(precipitation, day_years, window)
+                    for window in {consecutive_days, consecutive_days_start, consecutive_days_end}}
+    with np.errstate(invalid="ignore"):
+        shift_start, _ = first_and_last_in_years(rolling_sums[consecutive_days] >= threshold, year_starts)
+        length_start, _ = first_and_last_in_years(rolling_sums[consecutive_days_start] >= threshold_start, year_starts)
+        _, length_end = first_and_last_in_years(rolling_sums[consecutive_days_end] > threshold_end, year_starts)
+
+    season_start_shift = np.where(shift_start >= 0, np.maximum(0, days_from_july[shift_start]) - 6, np.nan)
+    has_season = (length_start >= 0) & (length_end > length_start)
+    season_length = np.where(has_season, day_numbers[length_end] - day_numbers[length_start] + 1, 0)
+
+    return season_start_shift, season_length
+
+
 # Define rainy season starting from May (for season start shift)
 def calculate_season_start(df, threshold=5, consecutive_days=7):
     """
@@ -196,74 +439,50 @@ def calculate_season_length(df, threshold_start=2, consecutive_days_start=7, thr
 
 
 # --- Indicator score calculation ---
-def indicator_scores(row):
+
+def indicator_scores(data_yearly, thresholds=YEARLY_THRESHOLDS, rules=INDICATOR_SCORE_RULES):
     """
-    Calculates various indicator scores for a given row of data based on yearly thresholds.
+    Calculates the indicator scores of all the years at once from the rule table, each condition being
+    a comparison of a whole column with its threshold.
     
-    Arg:
-        row (Series): A row of data from the yearly DataFrame.
+    Args:
+        data_yearly (DataFrame | dict): Yearly data of one point, or dictionary of (points, years) arrays.
+        thresholds (dict): Threshold values, YEARLY_THRESHOLDS by default. A threshold can also be an array
+            broadcast against the columns, to score several threshold configurations at once.
+        rules (dict): Conditions of each score, see INDICATOR_SCORE_RULES.
 
     Returns:
-        dict: Dictionary of calculated indicator scores.
+        dict: Array of 0 and 1 of each score, with the shape of the columns.
     """
-    # Initialize the indicator dictionary
     indicator_scores = {}
+    with np.errstate(invalid="ignore"):
+        for score_column, conditions in rules.items():
+            is_met = np.logical_and.reduce([COMPARISONS[comparison](np.asarray(data_yearly[column]), thresholds[threshold])
+                                            for column, comparison, threshold in conditions])
+            indicator_scores[score_column] = is_met.astype(int)
 
-    # Create indicators using the YEARLY_THRESHOLDS dictionary
-    indicator_scores['temperature_score'] = 1 if YEARLY_THRESHOLDS['yearly_min_temp_suitability_threshold'] <= row['temperature_2m_mean'] <= YEARLY_THRESHOLDS['yearly_max_temp_suitability_threshold'] and row['cv_temperature'] < YEARLY_THRESHOLDS['yearly_max_cv_temp_suitability'] else 0
-    indicator_scores['gdd_score'] = 1 if YEARLY_THRESHOLDS['yearly_min_gdd_suitability_threshold'] <= row['gdd'] else 0
-    indicator_scores['precipitations_score'] = 1 if YEARLY_THRESHOLDS['yearly_min_prec_suitability_threshold'] <= row['precipitation_sum'] <= YEARLY_THRESHOLDS['yearly_max_prec_suitability_threshold'] else 0
-    indicator_scores['ext_precipitation_score'] = 1 if row['is_extreme_precipitation'] <= YEARLY_THRESHOLDS['yearly_max_ext_prec_days_threshold'] else 0
-    indicator_scores['soil_moisture_score'] = 1 if row['soil_moisture_deficit'] <= YEARLY_THRESHOLDS['yearly_max_soil_moisture_deficit_threshold'] else 0
-    indicator_scores['wind_score'] = 1 if row['is_wind_above_threshold'] <= YEARLY_THRESHOLDS['yearly_wind_stress_threshold'] else 0
-    indicator_scores['heat_stress_score'] = 1 if row['is_heat_stress'] <= YEARLY_THRESHOLDS['yearly_heat_days_stress_threshold'] else 0
-    indicator_scores['humidity_score'] = 1 if row['is_humidity_above_threshold'] <= YEARLY_THRESHOLDS['yearly_humidity_stress_threshold'] else 0
-    indicator_scores['solar_radiation_score'] = 1 if row['solar_radiation_mj'] >= YEARLY_THRESHOLDS['yearly_min_solar_radiation_suitability_threshold'] else 0
-    indicator_scores['drought_score'] = 1 if row['consecutive_dry_days'] <= YEARLY_THRESHOLDS['yearly_dry_days_stress_threshold'] else 0
-
-    # Calculate season score
-    indicator_scores['season_start_shift_score'] = 1 if row['season_start_shift'] <= YEARLY_THRESHOLDS['yearly_max_season_start_shift'] else 0
-    indicator_scores['season_length_score'] = 1 if row['season_length'] >= YEARLY_THRESHOLDS['yearly_min_season_length'] else 0
-    
     return indicator_scores
 
 
 # --- Final part included in the periods loop ---
 
-def final_score_averaging(period_zero_freq,period_risk_classification, period_label):
-    """
-    Calculates the final score for both zero frequencies and risk classifications, which corresponds
-    respectively to the mean of zero percentage and the mean of risk classification on all the score for each period 
-    
-    Args:
-        period_zero_freq (dict): Dictionary of zero frequency percentages.
-        period_risk_classification (dict): Dictionary of classified risk.
-        period_label (str): The label for the current period.
-
-    Returns:
-        tuple: Updated dictionaries with final scores added.
-    """
-    period_zero_freq[period_label]["Final_Score"] = np.mean(period_zero_freq[period_label])
-    period_risk_classification[period_label]["Final_Score"] = np.mean(period_risk_classification[period_label])
-
-    return period_zero_freq, period_risk_classification
-
-def filling_risk_dictionary(risk_df_data, period_label, period_zero_freq, period_risk_classification):
+def filling_risk_dictionary(risk_df_data, period_label, zero_frequency, classification, score_columns):
     """
     Fills the risk dictionary with frequency, risk, and score for the current period.
     
     Args:
         risk_df_data (DataFrame): Risk data for all periods.
         period_label (str): Label for the current period.
-        period_zero_freq (dict): Zero frequency values.
-        period_risk_classification (dict): Risk classification values.
+        zero_frequency (np.ndarray): Zero frequency of each score of the period.
+        classification (np.ndarray): Classified risk of each score of the period.
+        score_columns (list): Names of the scores, Final_Score included.
 
     Returns:
         DataFrame: Updated risk data.
     """
-    risk_df_data[f'Frequency {period_label} (%)'] = period_zero_freq[period_label]
-    risk_df_data[f'Risk {period_label}'] = period_risk_classification[period_label].apply(lambda x: x[0])
-    risk_df_data[f'Score {period_label}'] = period_risk_classification[period_label].apply(lambda x: x[1])
+    risk_df_data[f'Frequency {period_label} (%)'] = pd.Series(zero_frequency, index=score_columns)
+    risk_df_data[f'Risk {period_label}'] = pd.Series(classify_risk_score_array(classification), index=score_columns)
+    risk_df_data[f'Score {period_label}'] = pd.Series(classification, index=score_columns)
     return risk_df_data
 
 
@@ -1,6 +1,51 @@
+from utils.imports import *
+
+
 
 
 # --- Define risk levels based on frequency ranges from the table ---
+# The bins are given by sorted edges, each edge belonging either to the bin above it ("[") or to the bin below it ("]"),
+# and by the value of each bin, from below the first edge to above the last one. A NaN falls in the last bin.
+RISK_FREQUENCY_EDGES = [(1, "["), (10, "["), (33, "]"), (66, "]"), (90, "]"), (99, "]"), (100, "]")]
+RISK_FREQUENCY_VALUES = np.array([0, 0.17, 0.34, 0.5, 0.67, 0.84, 1, 0])
+
+RISK_LABELS = ["Exceptionally improbable", "Very unlikely", "Unlikely", "As likely as not", "Probable", "Very probable", "Virtually certain"]
+RISK_SCORE_EDGES = [(0, "]"), (0.17, "]"), (0.34, "]"), (0.5, "]"), (0.67, "]"), (0.84, "]"), (1, "]")]
+# Position in RISK_LABELS of the label of each bin
+RISK_SCORE_CODES = np.array([0, 1, 2, 3, 4, 5, 6, 0], dtype=np.int8)
+
+
+def build_bin_edges(edges):
+    """
+    Converts edges with their closed side into the left closed edges of np.digitize: an edge belonging to the
+    bin below it is moved to the next float, so that the edge value itself stays below it.
+    
+    Arg:
+    edges (list): Sorted (value, "[" or "]") edges.
+    
+    Returns:
+    np.ndarray: Edges to give to np.digitize.
+    """
+    return np.array([value if side == "[" else np.nextafter(value, np.inf) for value, side in edges], dtype=np.float64)
+
+
+RISK_FREQUENCY_BINS = build_bin_edges(RISK_FREQUENCY_EDGES)
+RISK_SCORE_BINS = build_bin_edges(RISK_SCORE_EDGES)
+
+
+def classify_risk_frequency_array(frequency):
+    """
+    Classifies the risk based on the frequency of occurrence, for whole arrays.
+    
+    Arg:
+    frequency (np.ndarray): Frequency values, typically between 0 and 100, of any shape.
+    
+    Returns:
+    np.ndarray: Normalized scores between 0 and 1, 0 for NaN frequencies.
+    """
+    return RISK_FREQUENCY_VALUES[np.digitize(frequency, RISK_FREQUENCY_BINS)]
+
+
 def classify_risk_frequency(frequency):
     """
     Classifies the risk based on the frequency of occurrence.
@@ -11,21 +56,34 @@ def classify_risk_frequency(frequency):
     Returns:
     float: A normalized score between 0 and 1 based on the risk classification.
     """
-    if 99 < frequency <= 100:
-        return  1
-    elif 90 < frequency <= 99:
-        return  0.84
-    elif 66 < frequency <= 90:
-        return  0.67
-    elif 33 < frequency <= 66:
-        return  0.5
-    elif 10 <= frequency <= 33:
-        return  0.34
-    elif 1 <= frequency <= 10:
-        return  0.17
-    else:
-        return  0
+    return float(classify_risk_frequency_array(frequency))
+
+
+def classify_risk_score_codes(score):
+    """
+    Gives the position in RISK_LABELS of the risk category of each score.
+    
+    Arg:
+    score (np.ndarray): Risk scores between 0 and 1, of any shape.
+    
+    Returns:
+    np.ndarray: Codes of the categories, with the shape of the scores.
+    """
+    return RISK_SCORE_CODES[np.digitize(score, RISK_SCORE_BINS)]
+
+
+def classify_risk_score_array(score):
+    """
+    Gives the risk category of the scores as a categorical.
+    
+    Arg:
+    score (np.ndarray): Risk scores between 0 and 1.
     
+    Returns:
+    pd.Categorical: The risk category of each score, flattened.
+    """
+    return pd.Categorical.from_codes(np.ravel(classify_risk_score_codes(score)), categories=RISK_LABELS)
+
 
 def classify_risk_score(score):
     """
@@ -37,20 +95,7 @@ def classify_risk_score(score):
     Returns:
     tuple: A tuple containing the risk category (str) and the score (float).
     """
-    if 0.84 < score <= 1:
-        return "Virtually certain", score
-    elif 0.67 < score <= 0.84:
-        return "Very probable", score
-    elif 0.5 < score <= 0.67:
-        return "Probable", score
-    elif 0.34 < score <= 0.5:
-        return "As likely as not", score
-    elif 0.17 < score <= 0.34:
-        return "Unlikely", score
-    elif 0 < score <= 0.17:
-        return "Very unlikely", score
-    else:
-        return "Exceptionally improbable", score
+    return RISK_LABELS[classify_risk_score_codes(score)], score
     
     
 def classify_score(score):
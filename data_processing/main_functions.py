@@ -2,15 +2,17 @@ from utils.imports import *
 from utils.variables import *
 from data_processing.classify import classify_risk_frequency, classify_risk_score
 from data_processing.calculation import *
+from data_processing.periods import classify_periods
+from data_request.cube import ClimateCube
 
 
 # --- Main functions ---
 def loads_data(filename):
     """
-    Loads the CSV data with daily timestamps.
+    Loads the CSV or Parquet data with daily timestamps.
     
     Arg:
-    filename (str): The path to the CSV file.
+    filename (str): The path to the CSV or Parquet file.
     
     Returns:
     tuple:
@@ -18,6 +20,9 @@ def loads_data(filename):
         - (float): Latitude of the data point.
         - (float): Longitude of the data point.
     """
+    if filename.endswith(DATASET_EXTENSIONS["parquet"]):
+        return loads_parquet_data(filename)
+
     # Load the CSV data with daily timestamps
     data = pd.read_csv(filename, parse_dates=['date'])
     
@@ -30,6 +35,165 @@ def loads_data(filename):
     return data, lat, lon
 
 
+def get_needed_variables(score_columns=SCORE_COLUMNS):
+    """
+    Gives the daily variables of the dataset needed to calculate some scores.
+    
+    Arg:
+    score_columns (list): Names of the enabled scores.
+    
+    Returns:
+    list: The needed variables, in the order of VARIABLES_LIST.
+    """
+    needed = {variable for score_column in score_columns for variable in SCORE_VARIABLES[score_column]}
+    return [variable for variable in VARIABLES_LIST if variable in needed]
+
+
+def filter_growing_season_table(table):
+    """
+    Keeps the rows of the growing season of an Arrow table or record batch, before any conversion to pandas.
+    
+    Arg:
+    table (pa.Table | pa.RecordBatch): Daily data with a 'date' column.
+    
+    Returns:
+    pa.Table | pa.RecordBatch: Rows of the growing season months.
+    """
+    months = pc.month(table["date"])
+    return table.filter(pc.and_(pc.greater_equal(months, SEASON_THRESHOLDS['start']), pc.less_equal(months, SEASON_THRESHOLDS['end'])))
+
+
+def loads_projected_data(filename, variables=None):
+    """
+    Loads only the growing season days and the needed variables of a CSV or Parquet file, as float32. The CSV
+    file is parsed by blocks with the multithreaded Arrow reader and the days out of the growing season are dropped
+    from each block as soon as it is parsed, so the whole file is never held in memory.
+    
+    Args:
+    filename (str): The path to the CSV or Parquet file.
+    variables (list): Variables to load, the ones needed by SCORE_COLUMNS if None.
+    
+    Returns:
+    tuple:
+        - (pd.DataFrame): Growing season data with 'date' as the index and float32 variables.
+        - (float): Latitude of the data point.
+        - (float): Longitude of the data point.
+    """
+    variables = get_needed_variables() if variables is None else list(variables)
+
+    if filename.endswith(DATASET_EXTENSIONS["parquet"]):
+        table = pq.read_table(filename, columns=["date"] + variables)
+        metadata = table.schema.metadata
+        lat = float(metadata[PARQUET_LAT_KEY.encode()])
+        lon = float(metadata[PARQUET_LON_KEY.encode()])
+        table = filter_growing_season_table(table)
+    else:
+        convert_options = pv.ConvertOptions(include_columns=["date", "lat", "lon"] + variables,
+                                            column_types={variable: pa.float32() for variable in variables})
+        reader = pv.open_csv(filename, read_options=pv.ReadOptions(use_threads=True, block_size=LOADER_BLOCK_SIZE),
+                             convert_options=convert_options)
+        batches, lat, lon = [], None, None
+        for batch in reader:
+            if lat is None and batch.num_rows:
+                lat, lon = batch["lat"][0].as_py(), batch["lon"][0].as_py()
+            batches.append(filter_growing_season_table(batch))
+        table = pa.Table.from_batches(batches, reader.schema).drop_columns(["lat", "lon"])
+
+    data = table.to_pandas().set_index("date")
+    # Same index resolution as the one parsed by pandas
+    data.index = data.index.as_unit("ns")
+    return data, lat, lon
+
+
+def loads_parquet_data(filename):
+    """
+    Loads the Parquet data written by the downloader, the latitude and longitude being stored in the file metadata.
+    
+    Arg:
+    filename (str): The path to the Parquet file.
+    
+    Returns:
+    tuple:
+        - (pd.DataFrame): Loaded data with 'date' as the index and float32 variables.
+        - (float): Latitude of the data point.
+        - (float): Longitude of the data point.
+    """
+    table = pq.read_table(filename)
+    metadata = table.schema.metadata
+    lat = float(metadata[PARQUET_LAT_KEY.encode()])
+    lon = float(metadata[PARQUET_LON_KEY.encode()])
+
+    data = table.to_pandas().set_index("date")
+    # Same index resolution as the one parsed from the CSV files
+    data.index = data.index.as_unit("ns")
+    return data, lat, lon
+
+
+def get_model_path(path, model=DATA_MODEL):
+    """
+    Gives the path of the dataset folder or of the cube of a climate model. The default model keeps the path
+    as it is, so that the datasets downloaded before the ensembles stay valid, the other models get the
+    model name appended.
+    
+    Args:
+    path (str): Path to the dataset folder or to the cube of the default model.
+    model (str): Name of the climate model.
+    
+    Returns:
+    str: Path of the folder or cube of the model.
+    """
+    if model == DATA_MODEL:
+        return path
+    root, extension = os.path.splitext(path.rstrip("/\\"))
+    return f"{root}_{model}{extension}"
+
+
+def loads_ensemble_data(filename, models, dataset_folder=DATASET_FOLDER):
+    """
+    Loads the daily data of one point for several climate models, the file of the point having the same name
+    in the folder of each model.
+    
+    Args:
+    filename (str): Name of the file of the point, for example 'cmip6_era5_data_daily_0.parquet'.
+    models (list): Names of the climate models.
+    dataset_folder (str): Dataset folder of the default model.
+    
+    Returns:
+    tuple:
+        - (pd.DataFrame): Loaded data with 'date' as the index and the (model, variable) columns.
+        - (float): Latitude of the data point.
+        - (float): Longitude of the data point.
+    """
+    models_data = {}
+    for model in models:
+        data, lat, lon = loads_data(os.path.join(get_model_path(dataset_folder, model), filename))
+        models_data[model] = data[VARIABLES_LIST]
+    data = pd.concat(models_data, axis=1, names=["model", "variable"])
+    return data, lat, lon
+
+
+def loads_cube_data(cube_path, point, start_date=None, end_date=None, model=DATA_MODEL):
+    """
+    Loads the daily data of one point from the climate cube, reading only the chunks of the requested dates.
+    
+    Args:
+    cube_path (str): The path to the Zarr cube of the default model.
+    point (int): Position of the point in the cube.
+    start_date (str): First day to read, None to start at the beginning.
+    end_date (str): Last day to read, None to go until the end.
+    model (str): Name of the climate model.
+    
+    Returns:
+    tuple:
+        - (pd.DataFrame): Loaded data with 'date' as the index.
+        - (float): Latitude of the data point.
+        - (float): Longitude of the data point.
+    """
+    cube = ClimateCube(get_model_path(cube_path, model))
+    data = cube.read_point(point, start_date, end_date)
+    return data, float(cube.lats[point]), float(cube.lons[point])
+
+
 def daily_work(data):
     """
     Processes daily data to filter growing season and add indicators.
@@ -48,69 +212,60 @@ def daily_work(data):
 
 def monthly_work(data_daily_growing_season):
     """
-    Processes daily growing season data into monthly aggregations.
+    Processes daily growing season data into monthly aggregations, and into the yearly aggregations
+    calculated in the same pass.
     
     Arg:
         data_daily_growing_season (DataFrame): Daily growing season data.
 
     Returns:
-        DataFrame: Monthly aggregated data.
+        tuple:
+            - (DataFrame): Monthly aggregated data of the growing season months.
+            - (DataFrame): Yearly aggregated data.
     """
-    data_monthly_growing_season = aggregate_monthly(data_daily_growing_season)
-    data_monthly_growing_season = calculate_monthly_aggregations(data_monthly_growing_season)
+    data_monthly_growing_season, data_yearly_aggregates = aggregate_growing_season(data_daily_growing_season)
     data_monthly_growing_season = add_threshold_flags(data_monthly_growing_season)
 
-    return data_monthly_growing_season
+    return data_monthly_growing_season, data_yearly_aggregates
 
-def yearly_work(data_daily_growing_season, data_monthly_growing_season, data_yearly_mean_temp):
+def yearly_work(data_daily_growing_season, data_yearly_aggregates, data_yearly_mean_temp):
     """
-    Processes daily and monthly data into yearly aggregations and adds season indicators.
+    Adds season indicators to the yearly aggregations.
     
     Args:
         data_daily_growing_season (DataFrame): Daily growing season data.
-        data_monthly_growing_season (DataFrame): Monthly aggregated data.
+        data_yearly_aggregates (DataFrame): Yearly aggregated data, as given by monthly_work.
 
     Returns:
         DataFrame: Yearly aggregated data with season indicators.
     """
-    data_yearly_growing_season = df_aggregate_yearly = aggregate_yearly(data_monthly_growing_season)
+    data_yearly_growing_season = df_aggregate_yearly = data_yearly_aggregates
     data_yearly_growing_season = season_indicator(data_daily=data_daily_growing_season, data_yearly=data_yearly_growing_season, data_yearly_mean_temp=data_yearly_mean_temp)
 
     return data_yearly_growing_season, df_aggregate_yearly
 
 
-def loop_to_process_data_on_periods(data_yearly_growing_season, score_columns):
+def loop_to_process_data_on_periods(data_yearly_growing_season, score_columns, periods=PERIODS):
     """
-    Loops through defined periods and processes risk data for each period.
+    Loops through defined periods and processes risk data for each period. The null scores of all the
+    periods are counted at once by the period engine.
     
     Args:
         data_yearly_growing_season (DataFrame): Yearly aggregated data.
         score_columns (list): List of score columns.
+        periods (list): (start, end) years of each period.
 
     Returns:
         DataFrame: Risk data with frequencies, risks, and scores for each period.
     """
-    period_zero_freq,period_risk_classification, risk_df_data, period_data = {}, {}, {}, {}
-
-    # Main loop that iterates over periods and process each one
-    for start, end in PERIODS:  
-        # Filter the data for the current period
-        period_label = f"{start}-{end}"
-        period_data[period_label] = data_yearly_growing_season[
-            (data_yearly_growing_season.index.year >= start) & 
-            (data_yearly_growing_season.index.year <= end)
-        ]
-        
-        # Calculate the frequency of 0 scores for this period
-        period_zero_freq[period_label] = (period_data[period_label][score_columns] == 0).sum() / len(period_data[period_label]) * 100
-        
-        # Transform frequency into scores
-        period_risk_classification[period_label] = period_zero_freq[period_label].apply(classify_risk_frequency)
-        period_zero_freq, period_risk_classification = final_score_averaging(period_zero_freq,period_risk_classification, period_label )
-
-        # Classify and give labels
-        period_risk_classification[period_label] = period_risk_classification[period_label].apply(classify_risk_score)
-        risk_df_data = filling_risk_dictionary(risk_df_data, period_label, period_zero_freq, period_risk_classification)
+    scores = {column: data_yearly_growing_season[column].to_numpy() for column in score_columns}
+    zero_frequency, classification = classify_periods(scores, data_yearly_growing_season.index.year.values, periods, score_columns)
+    risk_df_data = {}
+
+    # Main loop that iterates over periods and only gives labels to their results
+    for position, (start, end) in enumerate(periods):
+        risk_df_data = filling_risk_dictionary(risk_df_data, f"{start}-{end}", zero_frequency[position], classification[position],
+                                               score_columns + ["Final_Score"])
 
     return risk_df_data
 
@@ -147,21 +302,10 @@ def create_final_score_dataframe(lat, lon, periods, score_columns, risk_df):
     Returns:
         DataFrame: Final DataFrame containing scores for each period.
     """
-    final_score_df = pd.DataFrame(columns=['LAT', 'LON'])
-    final_score_df["LAT"] = [lat]
-    final_score_df["LON"] = [lon]
-
+    # All the columns at once, a frame grown column by column gets fragmented with many periods
+    final_score_columns = {"LAT": [lat], "LON": [lon]}
     for start, end in periods:
         for score_column in score_columns:
-            final_score_df[f"{score_column}_{start}_{end}"] = risk_df.loc[score_column, f'Score {start}-{end}']
-
-    return final_score_df
-
-    
-
-
-    
-    
-
-
+            final_score_columns[f"{score_column}_{start}_{end}"] = [risk_df.loc[score_column, f'Score {start}-{end}']]
 
+    return pd.DataFrame(final_score_columns)
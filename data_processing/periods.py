@@ -0,0 +1,150 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.classify import classify_risk_frequency_array, classify_risk_score_array
+
+
+# --- Period engine ---
+# The number of null scores of any window of years is the difference of two prefix sums of the null scores, so the
+# frequencies, the risk classes and the final scores of any set of periods (the fixed PERIODS, rolling windows of
+# every start year or user defined windows) are derived from one cumulative sum over the years.
+
+def get_rolling_periods(years, length=ROLLING_PERIOD_LENGTH):
+    """
+    Builds the windows of consecutive years starting at every year, as long as they fit in the data.
+
+    Args:
+        years (np.ndarray): The years of the data.
+        length (int): Number of years of each window.
+
+    Returns:
+        list: (start, end) years of each window.
+    """
+    return [(start, start + length - 1) for start in range(int(np.min(years)), int(np.max(years)) - length + 2)]
+
+
+def parse_periods(text):
+    """
+    Parses windows given as start-end separated by commas, for example 1950-1979,1980-2009.
+
+    Args:
+        text (str): The windows.
+
+    Returns:
+        list: (start, end) years of each window.
+    """
+    periods = []
+    for period in text.split(","):
+        start, _, end = period.partition("-")
+        if not end or int(start) > int(end):
+            raise ValueError(f"Expected periods as start-end and got {period}")
+        periods.append((int(start), int(end)))
+    return periods
+
+
+def count_null_scores_in_periods(stacked_scores, years, periods):
+    """
+    Counts the null scores and the years of each period from the prefix sums of the null scores.
+
+    Args:
+        stacked_scores (np.ndarray): (..., years) scores, the years being sorted.
+        years (np.ndarray): The years.
+        periods (list): (start, end) years of each period.
+
+    Returns:
+        tuple:
+            - (np.ndarray): (..., periods) number of null scores.
+            - (np.ndarray): (periods,) number of years.
+    """
+    null_prefix = np.cumsum(stacked_scores == 0, axis=-1)
+    null_prefix = np.concatenate([np.zeros(null_prefix.shape[:-1] + (1,), dtype=null_prefix.dtype), null_prefix], axis=-1)
+    starts = np.searchsorted(years, [start for start, _ in periods], side="left")
+    ends = np.searchsorted(years, [end for _, end in periods], side="right")
+    return null_prefix[..., ends] - null_prefix[..., starts], ends - starts
+
+
+def classify_periods(scores, years, periods=PERIODS, score_columns=SCORE_COLUMNS):
+    """
+    Calculates the frequency of null scores and its risk class for each period, as loop_to_process_data_on_periods,
+    with the Final_Score, mean of the frequencies and of the classes of a period, added after the score columns.
+
+    Args:
+        scores (dict): (..., years) array of each score.
+        years (np.ndarray): The years.
+        periods (list): (start, end) years of each period.
+        score_columns (list): Names of the scores.
+
+    Returns:
+        tuple:
+            - (np.ndarray): (..., periods, scores + 1) frequencies in %.
+            - (np.ndarray): (..., periods, scores + 1) classes between 0 and 1.
+    """
+    stacked_scores = np.stack([scores[column] for column in score_columns], axis=-2)
+    null_counts, lengths = count_null_scores_in_periods(stacked_scores, np.asarray(years), periods)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Scores on the last axis, so that the means add the values in the same order as the pandas loop
+        zero_frequency = np.ascontiguousarray(np.swapaxes(null_counts / lengths * 100, -1, -2))
+    classification = classify_risk_frequency_array(zero_frequency)
+
+    zero_frequency = np.concatenate([zero_frequency, np.mean(zero_frequency, axis=-1, keepdims=True)], axis=-1)
+    classification = np.concatenate([classification, np.mean(classification, axis=-1, keepdims=True)], axis=-1)
+    return zero_frequency, classification
+
+
+def periods_to_wide(classification, periods=PERIODS, score_columns=SCORE_COLUMNS):
+    """
+    Names the classes of each score and period as the columns of create_final_score_dataframe.
+
+    Args:
+        classification (np.ndarray): (..., periods, scores + 1) classes, as given by classify_periods.
+        periods (list): (start, end) years of each period.
+        score_columns (list): Names of the scores.
+
+    Returns:
+        dict: (...) array of each column, period after period.
+    """
+    return {f"{column}_{start}_{end}": classification[..., period, position]
+            for period, (start, end) in enumerate(periods)
+            for position, column in enumerate(score_columns + ["Final_Score"])}
+
+
+def periods_to_long(zero_frequency, classification, index, periods=PERIODS, score_columns=SCORE_COLUMNS):
+    """
+    Builds a table with one row per point, period and score.
+
+    Args:
+        zero_frequency (np.ndarray): (points, periods, scores + 1) frequencies, as given by classify_periods.
+        classification (np.ndarray): (points, periods, scores + 1) classes, as given by classify_periods.
+        index (pd.Index): Index of the points.
+        periods (list): (start, end) years of each period.
+        score_columns (list): Names of the scores.
+
+    Returns:
+        pd.DataFrame: Columns start, end, score, frequency, risk and value, indexed by the points.
+    """
+    n_points, n_periods, n_scores = classification.shape
+    period_bounds = np.array(periods, dtype=int).reshape(-1, 2)
+    value = classification.ravel()
+    return pd.DataFrame({
+        "start": np.tile(np.repeat(period_bounds[:, 0], n_scores), n_points),
+        "end": np.tile(np.repeat(period_bounds[:, 1], n_scores), n_points),
+        "score": pd.Categorical.from_codes(np.tile(np.arange(n_scores), n_points * n_periods), score_columns + ["Final_Score"]),
+        "frequency": zero_frequency.ravel(),
+        "risk": classify_risk_score_array(value),
+        "value": value,
+    }, index=index.repeat(n_periods * n_scores))
+
+
+def long_to_wide(long_df):
+    """
+    Builds back one row per point from the table given by periods_to_long, with the columns of periods_to_wide.
+
+    Args:
+        long_df (pd.DataFrame): Columns LAT, LON, start, end, score and value, indexed by the points.
+
+    Returns:
+        pd.DataFrame: LAT, LON and the value of each score of each period, one row per point in the order of the table.
+    """
+    columns = long_df["score"].astype(str) + "_" + long_df["start"].astype(str) + "_" + long_df["end"].astype(str)
+    values = pd.Series(long_df["value"].to_numpy(), index=pd.MultiIndex.from_arrays([long_df.index, columns.to_numpy()])).unstack()
+    points = long_df.groupby(level=0, sort=False)[["LAT", "LON"]].first()
+    return pd.concat([points, values.loc[points.index, pd.unique(columns.to_numpy())]], axis=1)
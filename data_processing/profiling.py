@@ -0,0 +1,251 @@
+from utils.imports import *
+from utils.variables import *
+
+
+# --- Profiling of the stages ---
+# Opt-in instrumentation of the stages of process_data: each call made through profiled records its wall time,
+# CPU time, number of rows and, if asked, change of the traced memory, with the point being processed. Tracing the
+# memory makes the run about three times slower, so the times of such a run are not representative. The records of each
+# process are appended to a JSON lines file after each point, the worker processes included, and can be converted
+# to a Chrome trace and summarized at the end of the run. When profiling is disabled, profiled only calls the function.
+
+# Profiler of the current process, None when profiling is disabled
+PROFILER = None
+
+
+def count_rows(values):
+    """
+    Gives the number of rows of the first table or array found in some values.
+
+    Args:
+        values (tuple): Arguments or result of a stage.
+
+    Returns:
+        int: Number of rows, None if there is no table nor array.
+    """
+    for value in values:
+        if isinstance(value, tuple):
+            rows = count_rows(value)
+            if rows is not None:
+                return rows
+        elif isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+        elif isinstance(value, np.ndarray) and value.ndim:
+            # Days or years are on the last axis of the arrays of the pipeline
+            return value.shape[-1]
+        elif isinstance(value, dict) and value:
+            return count_rows(tuple(value.values())[:1])
+    return None
+
+
+class StageProfiler:
+    """
+    Records the stages run in the current process.
+
+    Args:
+        records_path (str): JSON lines file the records are appended to.
+        trace_memory (bool): Record the change of the memory traced by tracemalloc.
+    """
+    def __init__(self, records_path, trace_memory=False):
+        self.records_path = records_path
+        self.trace_memory = trace_memory
+        self.records = []
+        self.point = None
+
+    def call(self, stage, function, args, kwargs):
+        """
+        Calls the function of a stage and records it.
+
+        Args:
+            stage (str): Name of the stage.
+            function (callable): Function of the stage.
+            args (tuple): Positional arguments of the function.
+            kwargs (dict): Keyword arguments of the function.
+
+        Returns:
+            The result of the function.
+        """
+        rows = count_rows(args)
+        memory_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else None
+        timestamp_us = time.time_ns() // 1000
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+
+        result = function(*args, **kwargs)
+
+        wall_s = time.perf_counter() - start
+        cpu_s = time.process_time() - cpu_start
+        self.records.append({"stage": stage, "point": self.point, "pid": os.getpid(), "tid": threading.get_ident(),
+                             "ts_us": timestamp_us, "wall_s": wall_s, "cpu_s": cpu_s,
+                             "rows": rows if rows is not None else count_rows((result,)),
+                             "memory_delta_bytes": tracemalloc.get_traced_memory()[0] - memory_before if self.trace_memory else None})
+        return result
+
+    def flush(self):
+        """
+        Appends the records kept in memory to the records file.
+        """
+        if not self.records:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self.records)
+        self.records = []
+        # One write on a file opened in append mode, so the lines of the worker processes do not get mixed
+        descriptor = os.open(self.records_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, lines.encode())
+        finally:
+            os.close(descriptor)
+
+
+def profiled(stage, function, *args, **kwargs):
+    """
+    Calls the function of a stage, and records it if profiling is enabled.
+
+    Args:
+        stage (str): Name of the stage.
+        function (callable): Function of the stage.
+        *args: Positional arguments of the function.
+        **kwargs: Keyword arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    if PROFILER is None:
+        return function(*args, **kwargs)
+    return PROFILER.call(stage, function, args, kwargs)
+
+
+def set_profiled_point(filename):
+    """
+    Sets the point the next records belong to.
+
+    Args:
+        filename (str): Path to the data file of the point.
+    """
+    if PROFILER is not None:
+        PROFILER.point = os.path.splitext(os.path.basename(filename))[0]
+
+
+def flush_profile():
+    """
+    Appends the records of the current process to the records file, if profiling is enabled.
+    """
+    if PROFILER is not None:
+        PROFILER.flush()
+
+
+def enable_profiling(records_path, trace_memory=False):
+    """
+    Enables profiling in the current process.
+
+    Args:
+        records_path (str): JSON lines file the records are appended to.
+        trace_memory (bool): Trace the memory with tracemalloc, which slows the stages down and does not see the
+            buffers allocated by Arrow.
+    """
+    global PROFILER
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    # A forked worker inherits the records of the parent, they are dropped
+    PROFILER = StageProfiler(records_path, trace_memory)
+
+
+def get_records_path(output_path, profile_format):
+    """
+    Gives the JSON lines file the records are appended to during the run.
+
+    Args:
+        output_path (str): Output of the profiling.
+        profile_format (str): "jsonl" or "chrome".
+
+    Returns:
+        str: The output itself for JSON lines, a file next to it for a Chrome trace.
+    """
+    return output_path if profile_format == "jsonl" else f"{output_path}.records.jsonl"
+
+
+def read_profile_records(records_path):
+    """
+    Reads the records of all the processes.
+
+    Args:
+        records_path (str): JSON lines file of the records.
+
+    Returns:
+        pd.DataFrame: One row per recorded call.
+    """
+    if not os.path.exists(records_path):
+        return pd.DataFrame(columns=["stage", "point", "pid", "tid", "ts_us", "wall_s", "cpu_s", "rows", "memory_delta_bytes"])
+    return pd.read_json(records_path, lines=True, dtype={"point": str})
+
+
+def write_chrome_trace(records, output_path):
+    """
+    Writes the records as complete events of the Chrome trace format, to open in chrome://tracing or Perfetto.
+
+    Args:
+        records (pd.DataFrame): Records of the stages.
+        output_path (str): Path of the JSON trace.
+    """
+    events = [{"name": record.stage, "cat": "stage", "ph": "X", "ts": int(record.ts_us), "dur": record.wall_s * 1e6,
+               "pid": int(record.pid), "tid": int(record.tid),
+               "args": {"point": record.point, "cpu_ms": record.cpu_s * 1000,
+                        "rows": None if pd.isna(record.rows) else int(record.rows),
+                        "memory_delta_bytes": None if pd.isna(record.memory_delta_bytes) else int(record.memory_delta_bytes)}}
+              for record in records.itertuples(index=False)]
+    with open(output_path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+def summarize_profile(records):
+    """
+    Aggregates the records of each stage across the points. The stages called inside another one are counted in
+    both of them.
+
+    Args:
+        records (pd.DataFrame): Records of the stages.
+
+    Returns:
+        pd.DataFrame: Calls, total and mean wall time, total CPU time, rows, rows per second and memory change of
+        each stage, the slowest first.
+    """
+    summary = records.groupby("stage").agg(calls=("wall_s", "size"), wall_s=("wall_s", "sum"), mean_wall_ms=("wall_s", "mean"),
+                                           cpu_s=("cpu_s", "sum"), rows=("rows", "sum"),
+                                           mean_memory_delta_mb=("memory_delta_bytes", "mean"),
+                                           max_memory_delta_mb=("memory_delta_bytes", "max"))
+    summary["mean_wall_ms"] *= 1000
+    summary["rows_per_s"] = summary["rows"] / summary["wall_s"]
+    summary[["mean_memory_delta_mb", "max_memory_delta_mb"]] /= 1024**2
+    if records["memory_delta_bytes"].isna().all():
+        # The memory has not been traced
+        summary = summary.drop(columns=["mean_memory_delta_mb", "max_memory_delta_mb"])
+    return summary.sort_values("wall_s", ascending=False)
+
+
+def finish_profiling(output_path, profile_format):
+    """
+    Disables profiling, writes the Chrome trace if asked and prints the summary of the stages.
+
+    Args:
+        output_path (str): Output of the profiling.
+        profile_format (str): "jsonl" or "chrome".
+
+    Returns:
+        pd.DataFrame: Summary of the stages, as given by summarize_profile.
+    """
+    global PROFILER
+    flush_profile()
+    PROFILER = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    records_path = get_records_path(output_path, profile_format)
+    records = read_profile_records(records_path)
+    if profile_format == "chrome":
+        write_chrome_trace(records, output_path)
+        if os.path.exists(records_path):
+            os.remove(records_path)
+
+    summary = summarize_profile(records)
+    print(summary.to_string(float_format=lambda value: f"{value:,.3f}"))
+    return summary
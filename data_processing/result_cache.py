@@ -0,0 +1,123 @@
+from utils.imports import *
+from utils.variables import *
+from utils.sqlite_cache import SQLiteCache
+from data_processing.classify import RISK_FREQUENCY_EDGES, RISK_FREQUENCY_VALUES
+
+
+# --- Cache of the results of each point ---
+# The yearly aggregates and the final score row of a point are stored under a key made of the hash of the content
+# of its file and of the hash of the settings they depend on. The yearly aggregates do not depend on the yearly
+# thresholds, the periods nor the risk classes, so changing them only scores the cached aggregates again, while a new or modified
+# file is the only one calculated from its daily data.
+
+# Settings used until the yearly aggregates, and the ones used after them to score the years
+YEARLY_STAGE_SETTINGS = [DAILY_THRESHOLDS, SEASON_THRESHOLDS, SCORE_VARIABLES, SPELL_INDICATORS, SPELL_RESET_AT_SEASON_START,
+                         MONTHLY_AGG_FUNCTIONS, YEARLY_AGG_FUNCTIONS]
+SCORE_STAGE_SETTINGS = [YEARLY_THRESHOLDS, INDICATOR_SCORE_RULES, SCORE_COLUMNS, PERIODS, RISK_FREQUENCY_EDGES, RISK_FREQUENCY_VALUES.tolist()]
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    Hashes the content of a file, read by chunks.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int): Number of bytes read at once.
+
+    Returns:
+        str: SHA-256 of the content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_settings(settings):
+    """
+    Hashes settings made of dictionaries, lists and numbers.
+
+    Args:
+        settings (list): The settings.
+
+    Returns:
+        str: SHA-256 of the settings and of RESULT_CACHE_VERSION.
+    """
+    return hashlib.sha256(json.dumps([RESULT_CACHE_VERSION, settings], sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache(SQLiteCache):
+    """
+    Bounded cache of the DataFrames calculated for each point, stored as Parquet with the latitude and the
+    longitude of the point in the metadata. The least recently used entries are evicted first.
+
+    Args:
+        path (str): Path to the SQLite file.
+        max_bytes (int): Maximum size of the stored entries.
+    """
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_BYTES):
+        # Parquet is already compressed
+        super().__init__(path, max_bytes, max_age_days=None, compression_level=1, table="results")
+        self.yearly_settings_hash = hash_settings(YEARLY_STAGE_SETTINGS)
+        self.score_settings_hash = hash_settings(YEARLY_STAGE_SETTINGS + SCORE_STAGE_SETTINGS)
+
+    def get_point_keys(self, filename):
+        """
+        Gives the keys of the yearly aggregates and of the final scores of a point.
+
+        Args:
+            filename (str): Path to the data file of the point.
+
+        Returns:
+            tuple: Key of the yearly aggregates and key of the final score row.
+        """
+        file_hash = hash_file(filename)
+        return f"yearly:{file_hash}:{self.yearly_settings_hash}", f"final:{file_hash}:{self.score_settings_hash}"
+
+    def get_frame(self, key):
+        """
+        Reads a DataFrame from the cache.
+
+        Args:
+            key (str): Key of the entry.
+
+        Returns:
+            tuple: The DataFrame, the latitude and the longitude, None if the entry is not in the cache.
+        """
+        payload = self.get(key)
+        if payload is None:
+            return None
+        table = pq.read_table(io.BytesIO(payload))
+        metadata = table.schema.metadata
+        return table.to_pandas(), float(metadata[PARQUET_LAT_KEY.encode()]), float(metadata[PARQUET_LON_KEY.encode()])
+
+    def put_frame(self, key, df, lat, lon):
+        """
+        Stores a DataFrame in the cache.
+
+        Args:
+            key (str): Key of the entry.
+            df (pd.DataFrame): The DataFrame.
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+        """
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**table.schema.metadata, PARQUET_LAT_KEY: str(lat), PARQUET_LON_KEY: str(lon)})
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        self.put(key, buffer.getvalue())
+
+
+@functools.lru_cache(maxsize=None)
+def get_result_cache(path=RESULT_CACHE_PATH):
+    """
+    Opens the result cache once per process, the SQLite connection cannot be shared with the worker processes.
+
+    Args:
+        path (str): Path to the SQLite file.
+
+    Returns:
+        ResultCache: The cache.
+    """
+    return ResultCache(path)
@@ -0,0 +1,135 @@
+from utils.imports import *
+from utils.variables import *
+
+
+# --- Streaming sink of the final scores ---
+# The final score row of each point is appended to the output as soon as it is produced, instead of concatenating
+# all the rows in memory and writing them at the end. The rows are flushed every few points, so that a run that
+# stops loses at most the unflushed rows, and a new run can resume after the points already written.
+
+class FinalScoreSink:
+    """
+    Appends final score rows, indexed by the file name of the point, to a CSV file or to a folder of Parquet parts.
+
+    Args:
+        path (str): Path to the CSV file, or to the folder of the Parquet parts.
+        output_format (str): "csv" or "parquet".
+        flush_every (int): Number of rows kept in memory before being written.
+        resume (bool): Keep the rows already written and skip their points, otherwise the output is started again.
+    """
+    def __init__(self, path, output_format="csv", flush_every=FINAL_SINK_FLUSH_EVERY, resume=False):
+        self.path = path
+        self.output_format = output_format
+        self.flush_every = flush_every
+        self.pending = []
+        self.done = set()
+        self.parts = 0
+
+        if not resume:
+            self.clear()
+        elif output_format == "csv" and os.path.exists(path) and os.path.getsize(path) > 0:
+            self.repair_csv()
+            self.done = set(pd.read_csv(path, usecols=[0], dtype=str).iloc[:, 0])
+        elif output_format == "parquet" and os.path.isdir(path):
+            parts = sorted(name for name in os.listdir(path) if name.endswith(DATASET_EXTENSIONS["parquet"]))
+            self.parts = len(parts)
+            for name in parts:
+                self.done.update(pq.read_table(os.path.join(path, name), columns=["filename"])["filename"].to_pylist())
+
+    def clear(self):
+        """
+        Removes the output of a previous run.
+        """
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def repair_csv(self):
+        """
+        Cuts the last line of the CSV file if it has been written only partly, when a run has been killed during a flush.
+        """
+        with open(self.path, "rb+") as file:
+            content = file.read()
+            if content and not content.endswith(b"\n"):
+                file.truncate(content.rfind(b"\n") + 1)
+
+    def write(self, filename, final_score_df):
+        """
+        Adds the final score row of a point, and flushes the rows if there are enough of them.
+
+        Args:
+            filename (str): Name of the point, used as the index of the row.
+            final_score_df (pd.DataFrame): Final score row of the point, as given by process_data.
+        """
+        row = final_score_df.copy()
+        row.index = pd.Index([filename] * len(row), name="filename")
+        self.pending.append(row)
+        self.done.add(filename)
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def write_frame(self, df):
+        """
+        Adds final score rows already indexed by the file names of the points, then flushes them.
+
+        Args:
+            df (pd.DataFrame): Final score rows with 'filename' as the index.
+        """
+        self.pending.append(df)
+        self.done.update(df.index.astype(str))
+        self.flush()
+
+    def flush(self):
+        """
+        Writes the rows kept in memory.
+        """
+        if not self.pending:
+            return
+        rows = pd.concat(self.pending)
+        self.pending = []
+
+        if self.output_format == "parquet":
+            os.makedirs(self.path, exist_ok=True)
+            part_path = os.path.join(self.path, f"part_{self.parts:06d}{DATASET_EXTENSIONS['parquet']}")
+            rows.to_parquet(f"{part_path}.tmp")
+            # The part only appears once it is complete
+            os.replace(f"{part_path}.tmp", part_path)
+            self.parts += 1
+        else:
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="") as file:
+                rows.to_csv(file, header=write_header)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def close(self):
+        """
+        Writes the last rows.
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # The rows already produced are kept even if the run fails
+        self.close()
+
+    def read(self):
+        """
+        Reads all the rows written so far.
+
+        Returns:
+            pd.DataFrame: Final scores with 'filename' as the index, in the order they have been written.
+        """
+        self.flush()
+        if self.output_format == "parquet":
+            if not os.path.isdir(self.path):
+                return pd.DataFrame()
+            parts = sorted(name for name in os.listdir(self.path) if name.endswith(DATASET_EXTENSIONS["parquet"]))
+            return pd.concat([pd.read_parquet(os.path.join(self.path, name)) for name in parts]) if parts else pd.DataFrame()
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        # The round trip parser gives back exactly the floats that have been written
+        return pd.read_csv(self.path, index_col="filename", dtype={"filename": str}, float_precision="round_trip")
@@ -0,0 +1,211 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.result_cache import hash_file, hash_settings
+from data_processing.main_functions import loads_data, loads_projected_data, daily_work, monthly_work, yearly_work
+from data_processing.profiling import profiled
+
+
+# --- Persisted stages of each point ---
+# The tables produced by the daily, monthly and yearly stages of process_data are written per point as Parquet,
+# in a folder per table, and a JSON lines manifest records the hash of the point file and of the settings each
+# stage has been calculated from. A stage whose record still matches is read back instead of calculated, so the
+# next stages start from it: changing PERIODS or the risk classes only runs the period stage on the yearly tables.
+
+# Tables written by each stage, in the order of the stages
+STAGE_TABLES = {
+    "daily": ["daily", "mean_temperature"],
+    "monthly": ["monthly", "yearly_aggregates"],
+    "yearly": ["yearly"],
+}
+# Settings added by each stage, a stage depending on the settings of the stages before it too
+STAGE_SETTINGS = {
+    "daily": [SEASON_THRESHOLDS, DAILY_THRESHOLDS, SCORE_VARIABLES, SPELL_INDICATORS, SPELL_RESET_AT_SEASON_START],
+    "monthly": [MONTHLY_AGG_FUNCTIONS, YEARLY_AGG_FUNCTIONS],
+    "yearly": [YEARLY_THRESHOLDS, INDICATOR_SCORE_RULES],
+}
+
+
+def get_point_name(filename):
+    """
+    Gives the name under which the stages of a point are stored.
+
+    Args:
+        filename (str): Path to the data file of the point.
+
+    Returns:
+        str: Name of the file without its folder and extension.
+    """
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+class StageStore:
+    """
+    Folder of the persisted stages of the points, with their manifest.
+
+    Args:
+        folder (str): Folder of the stages.
+    """
+    def __init__(self, folder=STAGES_FOLDER):
+        self.folder = folder
+        self.manifest_path = os.path.join(folder, STAGES_MANIFEST_FILENAME)
+        self.entries = {}
+
+        settings = []
+        self.settings_hashes = {}
+        for stage, stage_settings in STAGE_SETTINGS.items():
+            settings = settings + stage_settings
+            self.settings_hashes[stage] = hash_settings(settings)
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut by a crash
+                        continue
+                    self.entries[(entry["point"], entry["stage"])] = entry
+
+    def get_table_path(self, table, point):
+        """
+        Gives the path of a table of a point, relative to the folder of the stages.
+
+        Args:
+            table (str): Name of the table.
+            point (str): Name of the point.
+
+        Returns:
+            str: Relative path of the Parquet file.
+        """
+        return os.path.join(table, point + DATASET_EXTENSIONS["parquet"])
+
+    def load(self, point, stage, source_hash):
+        """
+        Reads the tables of a stage of a point, if they have been calculated from the same file and settings.
+
+        Args:
+            point (str): Name of the point.
+            stage (str): Name of the stage, a key of STAGE_TABLES.
+            source_hash (str): SHA-256 of the data file of the point.
+
+        Returns:
+            tuple: Dictionary of the tables, latitude and longitude, None if the stage has to be calculated.
+        """
+        entry = self.entries.get((point, stage))
+        if entry is None or entry["source_sha256"] != source_hash or entry["settings_sha256"] != self.settings_hashes[stage]:
+            return None
+        try:
+            tables = {table: pd.read_parquet(os.path.join(self.folder, path)) for table, path in entry["tables"].items()}
+        except (OSError, pa.ArrowException):
+            # File removed or truncated since it has been recorded
+            return None
+        return tables, entry["lat"], entry["lon"]
+
+    def save(self, point, stage, source_hash, tables, lat, lon):
+        """
+        Writes the tables of a stage of a point, then records them in the manifest.
+
+        Args:
+            point (str): Name of the point.
+            stage (str): Name of the stage, a key of STAGE_TABLES.
+            source_hash (str): SHA-256 of the data file of the point.
+            tables (dict): DataFrame of each table of the stage.
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+        """
+        paths = {}
+        for table, df in tables.items():
+            paths[table] = self.get_table_path(table, point)
+            path = os.path.join(self.folder, paths[table])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_parquet(f"{path}.tmp")
+            # A table only appears once it is complete
+            os.replace(f"{path}.tmp", path)
+
+        entry = {"point": point, "stage": stage, "source_sha256": source_hash, "settings_sha256": self.settings_hashes[stage],
+                 "tables": paths, "rows": {table: len(df) for table, df in tables.items()}, "lat": float(lat), "lon": float(lon),
+                 "time": datetime.now().isoformat(timespec="seconds")}
+        self.entries[(point, stage)] = entry
+        # One write on a file opened in append mode, so the lines of the worker processes do not get mixed
+        descriptor = os.open(self.manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(descriptor, (json.dumps(entry) + "\n").encode())
+        finally:
+            os.close(descriptor)
+
+
+@functools.lru_cache(maxsize=None)
+def get_stage_store(folder=STAGES_FOLDER):
+    """
+    Opens the stage store once per process, the manifest being read only once.
+
+    Args:
+        folder (str): Folder of the stages.
+
+    Returns:
+        StageStore: The store.
+    """
+    os.makedirs(folder, exist_ok=True)
+    return StageStore(folder)
+
+
+def run_point_stages(filename, save_csv=False, folder=None):
+    """
+    Runs the daily, monthly and yearly stages of a point. With a folder, each stage starts from the persisted
+    output of the stage before it when the file of the point and the settings did not change, and the stages
+    that had to be calculated are persisted. The points whose aggregations are saved are read in full, with all
+    their columns in float64, and are neither read from nor written to the folder, as the persisted stages only
+    hold the columns of the scores.
+
+    Args:
+        filename (str): Path to the data file of the point.
+        save_csv (bool): The daily table is needed to save the daily aggregations.
+        folder (str): Folder of the stages, None to calculate every stage without persisting them.
+
+    Returns:
+        tuple:
+            - (pd.DataFrame): Yearly aggregates with the season indicators and the indicator scores.
+            - (pd.DataFrame): Daily growing season data with the indicators, None if not needed.
+            - (float): Latitude of the point.
+            - (float): Longitude of the point.
+    """
+    store = get_stage_store(folder) if folder and not save_csv else None
+    point = get_point_name(filename)
+    source_hash = profiled("hash_file", hash_file, filename) if store is not None else None
+
+    # The daily table is needed by the yearly stage and by the daily CSV
+    yearly = profiled("load_stage", store.load, point, "yearly", source_hash) if store is not None else None
+    monthly = profiled("load_stage", store.load, point, "monthly", source_hash) if store is not None and yearly is None else None
+    daily = profiled("load_stage", store.load, point, "daily", source_hash) if store is not None and yearly is None else None
+
+    if daily is None and (yearly is None or save_csv):
+        if save_csv:
+            # The saved aggregations keep all the columns of the file
+            data, lat, lon = profiled("loads_data", loads_data, filename)
+        else:
+            data, lat, lon = profiled("loads_projected_data", loads_projected_data, filename)
+        data_daily_growing_season, data_yearly_mean_temp = profiled("daily_work", daily_work, data)
+        daily = {"daily": data_daily_growing_season, "mean_temperature": data_yearly_mean_temp.to_frame()}, lat, lon
+        if store is not None:
+            profiled("save_stage", store.save, point, "daily", source_hash, *daily)
+
+    if yearly is None:
+        daily_tables, lat, lon = daily
+        if monthly is None:
+            data_monthly_growing_season, data_yearly_aggregates = profiled("monthly_work", monthly_work, daily_tables["daily"])
+            monthly = {"monthly": data_monthly_growing_season, "yearly_aggregates": data_yearly_aggregates}, lat, lon
+            if store is not None:
+                profiled("save_stage", store.save, point, "monthly", source_hash, *monthly)
+
+        # yearly_work adds the season indicators to the yearly aggregates it is given
+        data_yearly_growing_season, _ = profiled("yearly_work", yearly_work, daily_tables["daily"], monthly[0]["yearly_aggregates"].copy(),
+                                                 daily_tables["mean_temperature"]["temperature_2m_mean"])
+        yearly = {"yearly": data_yearly_growing_season}, lat, lon
+        if store is not None:
+            profiled("save_stage", store.save, point, "yearly", source_hash, *yearly)
+
+    yearly_tables, lat, lon = yearly
+    return yearly_tables["yearly"], daily[0]["daily"] if daily is not None else None, lat, lon
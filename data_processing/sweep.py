@@ -0,0 +1,141 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.calculation import indicator_scores
+from data_processing.vectorized import compute_points_yearly, classify_points_periods, get_points_index
+from data_request.manifest import DownloadManifest
+
+
+# --- Sensitivity of the final scores to the yearly thresholds ---
+# The yearly aggregates and the season indicators of a chunk of points are computed once, then all the variants of
+# YEARLY_THRESHOLDS are scored at once: each threshold becomes a (configurations, 1, 1) array broadcast against the
+# (points, years) aggregates, so the scores and the final scores get a leading configuration axis.
+
+def build_threshold_grid(variations, base=YEARLY_THRESHOLDS):
+    """
+    Builds every combination of the given threshold values, the other thresholds keeping their base value.
+
+    Args:
+        variations (dict): Values to try for each varied threshold of YEARLY_THRESHOLDS.
+        base (dict): Values of the thresholds that are not varied.
+
+    Returns:
+        list: One complete threshold dictionary per configuration.
+    """
+    unknown = set(variations) - set(base)
+    if unknown:
+        raise ValueError(f"Unknown yearly thresholds: {', '.join(sorted(unknown))}")
+
+    names = list(variations)
+    return [{**base, **dict(zip(names, values))} for values in itertools.product(*(variations[name] for name in names))]
+
+
+def stack_thresholds(configurations):
+    """
+    Stacks the threshold configurations into one array per threshold, shaped to be broadcast against
+    (points, years) arrays.
+
+    Args:
+        configurations (list): Threshold dictionaries.
+
+    Returns:
+        dict: (configurations, 1, 1) array of each threshold.
+    """
+    return {name: np.array([configuration[name] for configuration in configurations], dtype=np.float64)[:, np.newaxis, np.newaxis]
+            for name in configurations[0]}
+
+
+def sweep_points(filenames, configurations, config_chunk_size=SWEEP_CONFIG_CHUNK_SIZE):
+    """
+    Computes the final scores of points whose data files have the same dates, for every threshold configuration.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+        configurations (list): Threshold dictionaries.
+        config_chunk_size (int): Number of configurations scored at once, to bound the memory.
+
+    Returns:
+        tuple:
+            - (pd.DataFrame): Final scores with 'configuration' and 'filename' as the index.
+            - (list): Paths of the points whose dates differ from the first one, not scored.
+    """
+    stacked, lats, lons, years, yearly, others = compute_points_yearly(filenames)
+    points_index = get_points_index(stacked)
+    results = []
+    for start in range(0, len(configurations), config_chunk_size):
+        chunk = configurations[start:start + config_chunk_size]
+        n_configurations = len(chunk)
+        columns = classify_points_periods(indicator_scores(yearly, stack_thresholds(chunk)), years)
+        index = pd.MultiIndex.from_arrays([np.repeat(np.arange(start, start + n_configurations), len(stacked)),
+                                           np.tile(points_index, n_configurations)], names=["configuration", "filename"])
+        results.append(pd.DataFrame({"LAT": np.tile(lats, n_configurations), "LON": np.tile(lons, n_configurations),
+                                     **{column: values.ravel() for column, values in columns.items()}}, index=index))
+
+    return pd.concat(results), others
+
+
+def sweep_all_points(filenames, configurations, chunk_size=VECTORIZED_CHUNK_SIZE):
+    """
+    Computes the final scores of all the points for every threshold configuration, by chunks of points.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+        configurations (list): Threshold dictionaries.
+        chunk_size (int): Number of points stacked together.
+
+    Returns:
+        pd.DataFrame: Final scores with 'configuration' and 'filename' as the index, sorted by configuration
+        then in the order of the files.
+    """
+    results = []
+    pending = list(filenames)
+    with tqdm(total=len(pending), desc="Sweeping the thresholds by chunks of points") as progress:
+        while pending:
+            chunk, pending = pending[:chunk_size], pending[chunk_size:]
+            sweep_df, others = sweep_points(chunk, configurations)
+            results.append(sweep_df)
+            pending = others + pending
+            progress.update(len(chunk) - len(others))
+
+    order = pd.MultiIndex.from_product([range(len(configurations)), get_points_index(filenames)], names=["configuration", "filename"])
+    return pd.concat(results).loc[order]
+
+
+def parse_variation(text):
+    """
+    Parses a threshold variation given on the command line, as name=value,value,...
+
+    Args:
+        text (str): The variation.
+
+    Returns:
+        tuple: Name of the threshold and list of its values.
+    """
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"Expected name=value,value,... and got {text}")
+    return name.strip(), [float(value) for value in values.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Computes the final scores of all the points for a grid of yearly thresholds.")
+    parser.add_argument("--set", dest="variations", type=parse_variation, action="append", required=True,
+                        help="Values of a threshold of YEARLY_THRESHOLDS, for example yearly_min_prec_suitability_threshold=500,550,600. "
+                             "Every combination of the given values is scored.")
+    parser.add_argument("--dataset-folder", default=DATASET_FOLDER, help="Folder of the per point files.")
+    parser.add_argument("--output", default=SWEEP_CSV_PATH, help="CSV file of the final scores of each configuration.")
+    args = parser.parse_args()
+
+    variations = dict(args.variations)
+    configurations = build_threshold_grid(variations)
+    # One file per point, as in main.py, a point left with a file in each format by a format switch is swept once
+    manifest = DownloadManifest(os.path.join(args.dataset_folder, MANIFEST_FILENAME))
+    files_list = [os.path.join(args.dataset_folder, filename) for filename in manifest.list_point_files(args.dataset_folder)]
+
+    start = time.perf_counter()
+    sweep_df = sweep_all_points(files_list, configurations)
+    print(f"{len(configurations)} configurations of {len(files_list)} points scored in {time.perf_counter() - start:.1f} s")
+
+    # The values of the varied thresholds are written next to the scores of each configuration
+    configurations_df = pd.DataFrame([{name: configuration[name] for name in variations} for configuration in configurations])
+    configurations_df.index.name = "configuration"
+    sweep_df.join(configurations_df, on="configuration").to_csv(args.output)
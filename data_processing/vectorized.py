@@ -0,0 +1,252 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.periods import classify_periods, periods_to_wide, periods_to_long, get_rolling_periods
+from data_processing.calculation import get_segment_starts, calculate_season_indicators, indicator_scores, aggregate_season_arrays, nan_mean_segments, spell_indicators
+from data_processing.main_functions import loads_projected_data
+
+
+# --- Vectorized scoring engine ---
+# Computes the same final scores as process_data, but for many points at once: the growing season days of all
+# the points are stacked into (points, days) arrays, one per variable, and every step of the pipeline (daily
+# indicators, monthly and yearly aggregations, season indicators, indicator scores and period classification)
+# is done with array operations over the point axis. The days are sorted, so the days of a month or of a year
+# are contiguous and their aggregations are segment reductions.
+
+def load_points_arrays(filenames):
+    """
+    Loads the growing season days of several points into one array per variable. Only the points having
+    the same growing season dates as the first one are stacked, the other ones are given back.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+
+    Returns:
+        tuple:
+            - (list): Paths of the stacked points.
+            - (np.ndarray): Latitude of each stacked point.
+            - (np.ndarray): Longitude of each stacked point.
+            - (pd.DatetimeIndex): Growing season dates shared by the stacked points.
+            - (dict): (points, days) float64 array of each variable needed by the indicators.
+            - (list): Paths of the points whose dates differ from the stacked ones.
+    """
+    stacked, lats, lons, values, others = [], [], [], [], []
+    dates = None
+    for filename in filenames:
+        data, lat, lon = loads_projected_data(filename, VECTORIZED_VARIABLES)
+        if dates is None:
+            dates = data.index
+        elif not data.index.equals(dates):
+            others.append(filename)
+            continue
+        stacked.append(filename)
+        lats.append(lat)
+        lons.append(lon)
+        values.append(data[VECTORIZED_VARIABLES].to_numpy(dtype=np.float64).T)
+
+    values = np.stack(values, axis=1) if values else np.empty((len(VECTORIZED_VARIABLES), 0, 0))
+    arrays = {variable: values[position] for position, variable in enumerate(VECTORIZED_VARIABLES)}
+    return stacked, np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64), dates, arrays, others
+
+
+def compute_daily_indicators(arrays, dates):
+    """
+    Computes the daily indicators of add_indicators for all the points.
+
+    Args:
+        arrays (dict): (points, days) array of each variable.
+        dates (pd.DatetimeIndex): Growing season dates.
+
+    Returns:
+        dict: (points, days) array of each daily indicator, with the NaN kept where the data is missing.
+    """
+    after_june = (dates.month > 6)[np.newaxis, :]
+    return {
+        'precipitation_sum': arrays['precipitation_sum'],
+        'temperature_2m_mean': arrays['temperature_2m_mean'],
+        'gdd': np.maximum((arrays['temperature_2m_max'] + arrays['temperature_2m_min']) / 2 - DAILY_THRESHOLDS['gdd_base_temp'], 0),
+        'is_extreme_precipitation': arrays['precipitation_sum'] > DAILY_THRESHOLDS['daily_ext_prec_threshold'],
+        **spell_indicators(arrays, dates),
+        'is_heat_stress': after_june & (arrays['temperature_2m_max'] > DAILY_THRESHOLDS['daily_heat_stress_threshold']),
+        'is_wind_above_threshold': arrays['wind_speed_10m_max'] > DAILY_THRESHOLDS['daily_wind_stress_threshold'],
+        'is_humidity_above_threshold': arrays['relative_humidity_2m_mean'] > DAILY_THRESHOLDS['daily_humidity_risk'],
+        'soil_moisture_deficit': np.maximum(0, DAILY_THRESHOLDS['daily_soil_moisture_threshold'] - arrays['soil_moisture_0_to_10cm_mean']),
+        'solar_radiation_mj': arrays['shortwave_radiation_sum'],
+    }
+
+
+def aggregate_points_yearly(daily, dates):
+    """
+    Aggregates the daily indicators by year with aggregate_season_arrays, as the per point pipeline.
+
+    Args:
+        daily (dict): (points, days) array of each daily indicator.
+        dates (pd.DatetimeIndex): Growing season dates.
+
+    Returns:
+        tuple:
+            - (np.ndarray): The years.
+            - (dict): (points, years) array of each yearly aggregation, and of the July to October mean temperature.
+    """
+    _, _, years, yearly = aggregate_season_arrays(daily, dates)
+    year_starts = get_segment_starts(dates.year.values)
+    yearly['temperature_2m_mean'] = nan_mean_segments(np.where(dates.month.values > 6, daily['temperature_2m_mean'], np.nan), year_starts)
+
+    return years, yearly
+
+
+def classify_points_periods(scores, years, periods=PERIODS):
+    """
+    Classifies the frequency of null scores of each period, as loop_to_process_data_on_periods, and averages
+    the classifications of a period into its final score. The scores can have leading axes before the point
+    axis, for example one per threshold configuration.
+
+    Args:
+        scores (dict): (..., points, years) array of each score.
+        years (np.ndarray): The years.
+        periods (list): (start, end) years of each period.
+
+    Returns:
+        dict: (..., points) array of each final column, named as in create_final_score_dataframe.
+    """
+    _, classification = classify_periods(scores, years, periods)
+    return periods_to_wide(classification, periods)
+
+
+def compute_points_yearly(filenames):
+    """
+    Computes the yearly aggregates and the season indicators of points whose data files have the same dates.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+
+    Returns:
+        tuple:
+            - (list): Paths of the stacked points.
+            - (np.ndarray): Latitude of each stacked point.
+            - (np.ndarray): Longitude of each stacked point.
+            - (np.ndarray): The years.
+            - (dict): (points, years) array of each yearly aggregate and season indicator.
+            - (list): Paths of the points whose dates differ from the first one, not computed.
+    """
+    stacked, lats, lons, dates, arrays, others = load_points_arrays(filenames)
+    daily = compute_daily_indicators(arrays, dates)
+    years, yearly = aggregate_points_yearly(daily, dates)
+    yearly['season_start_shift'], yearly['season_length'] = calculate_season_indicators(daily['precipitation_sum'], dates)
+    return stacked, lats, lons, years, yearly, others
+
+
+def get_points_index(filenames):
+    """
+    Builds the 'filename' index of the final scores from the paths of the points.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+
+    Returns:
+        pd.Index: Name of each file without its extension.
+    """
+    return pd.Index([os.path.basename(filename).split(".")[0] for filename in filenames], name="filename")
+
+
+def score_points_yearly(filenames):
+    """
+    Computes the yearly indicator scores of points whose data files have the same dates.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+
+    Returns:
+        tuple:
+            - (list): Paths of the stacked points.
+            - (np.ndarray): Latitude of each stacked point.
+            - (np.ndarray): Longitude of each stacked point.
+            - (np.ndarray): The years.
+            - (dict): (points, years) array of each score.
+            - (list): Paths of the points whose dates differ from the first one, not scored.
+    """
+    stacked, lats, lons, years, yearly, others = compute_points_yearly(filenames)
+    return stacked, lats, lons, years, indicator_scores(yearly), others
+
+
+def build_final_scores(stacked, lats, lons, years, scores, periods=PERIODS, output="wide"):
+    """
+    Classifies the periods of the yearly scores of stacked points into their final scores.
+
+    Args:
+        stacked (list): Paths of the stacked points.
+        lats (np.ndarray): Latitude of each stacked point.
+        lons (np.ndarray): Longitude of each stacked point.
+        years (np.ndarray): The years.
+        scores (dict): (points, years) array of each score.
+        periods (list): (start, end) years of each period.
+        output (str): "wide" for one row per point as create_final_score_dataframe, "long" for one row per point,
+            period and score.
+
+    Returns:
+        pd.DataFrame: Final scores with 'filename' as the index, in the order of the stacked files.
+    """
+    zero_frequency, classification = classify_periods(scores, years, periods)
+    index = get_points_index(stacked)
+
+    if output == "long":
+        final_score_df = periods_to_long(zero_frequency, classification, index, periods)
+        rows_per_point = len(periods) * (len(SCORE_COLUMNS) + 1)
+        final_score_df.insert(0, "LON", lons.repeat(rows_per_point))
+        final_score_df.insert(0, "LAT", lats.repeat(rows_per_point))
+    else:
+        final_score_df = pd.DataFrame({"LAT": lats, "LON": lons, **periods_to_wide(classification, periods)}, index=index)
+    return final_score_df
+
+
+def score_points(filenames, periods=PERIODS, rolling_length=None, output="wide"):
+    """
+    Computes the final scores of points whose data files have the same dates.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+        periods (list): (start, end) years of each period.
+        rolling_length (int): Length of rolling windows starting at every year, used instead of periods if given.
+        output (str): "wide" or "long", see build_final_scores.
+
+    Returns:
+        tuple:
+            - (pd.DataFrame): Final scores with 'filename' as the index, in the order of the stacked files.
+            - (list): Paths of the points whose dates differ from the first one, not scored.
+    """
+    stacked, lats, lons, years, scores, others = score_points_yearly(filenames)
+    if rolling_length is not None:
+        periods = get_rolling_periods(years, rolling_length)
+    return build_final_scores(stacked, lats, lons, years, scores, periods, output), others
+
+
+def score_all_points(filenames, chunk_size=VECTORIZED_CHUNK_SIZE, periods=PERIODS, rolling_length=None, output="wide"):
+    """
+    Computes the final scores of all the points, by chunks of points to bound the memory. The points whose
+    dates differ from the other ones of their chunk are scored in a chunk of their own.
+    The yearly scores of all the chunks are kept before the periods are classified, so that the rolling windows
+    are built once from the years of all the points and every chunk gets the same period columns.
+
+    Args:
+        filenames (list): Paths to the data files of the points.
+        chunk_size (int): Number of points stacked together.
+        periods (list): (start, end) years of each period.
+        rolling_length (int): Length of rolling windows starting at every year, used instead of periods if given.
+        output (str): "wide" or "long", see build_final_scores.
+
+    Returns:
+        pd.DataFrame: Final scores with 'filename' as the index, in the order of the files.
+    """
+    chunks = []
+    pending = list(filenames)
+    with tqdm(total=len(pending), desc="Scoring the points by chunks") as progress:
+        while pending:
+            chunk, pending = pending[:chunk_size], pending[chunk_size:]
+            *chunk_scores, others = score_points_yearly(chunk)
+            chunks.append(chunk_scores)
+            pending = others + pending
+            progress.update(len(chunk) - len(others))
+
+    if rolling_length is not None:
+        periods = get_rolling_periods(np.concatenate([years for _, _, _, years, _ in chunks]), rolling_length)
+    results = [build_final_scores(*chunk_scores, periods, output) for chunk_scores in chunks]
+    return pd.concat(results).loc[get_points_index(filenames)]
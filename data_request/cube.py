@@ -0,0 +1,150 @@
+from utils.imports import *
+from utils.variables import *
+
+
+# --- Climate cube ---
+# Single chunked Zarr store holding the daily data of all the points, with the dimensions (point, time, variable).
+# The coordinates are stored next to the data: latitude and longitude of each point, the dates as seconds since
+# the epoch and the variable names. Only the chunks covering the requested slice are read from the disk.
+
+def get_cube_dates(start_date, end_date):
+    """
+    Builds the daily time axis of the cube.
+
+    Args:
+        start_date (str): First day, as given to the API.
+        end_date (str): Last day, as given to the API.
+
+    Returns:
+        pd.DatetimeIndex: Daily dates in UTC, both ends included.
+    """
+    return pd.date_range(start=start_date, end=end_date, freq="D", tz="UTC", name="date")
+
+
+class ClimateCube:
+    """
+    Chunked store of the daily data of all the points.
+
+    Args:
+        path (str): Path to the Zarr store.
+        mode (str): 'r' to only read the cube, 'r+' to write points into it.
+    """
+    def __init__(self, path, mode="r"):
+        self.path = path
+        self.group = zarr.open_group(path, mode=mode)
+        self.data = self.group["data"]
+        self.written = self.group["written"]
+        self.dates = pd.to_datetime(self.group["time"][:], unit="s", utc=True).rename("date")
+        self.variables = list(self.group["variable"][:])
+        self.lats = self.group["lat"][:]
+        self.lons = self.group["lon"][:]
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path, lats, lons, start_date, end_date, chunks=CUBE_CHUNKS):
+        """
+        Creates an empty cube for the given points and date range. The data is filled with NaN until written.
+
+        Args:
+            path (str): Path to the Zarr store.
+            lats (list): Latitude of each point.
+            lons (list): Longitude of each point.
+            start_date (str): First day of the data.
+            end_date (str): Last day of the data.
+            chunks (dict): Chunk size along the 'point', 'time' and 'variable' dimensions.
+
+        Returns:
+            ClimateCube: The cube opened for writing.
+        """
+        dates = get_cube_dates(start_date, end_date)
+        shape = (len(lats), len(dates), len(VARIABLES_LIST))
+        chunk_shape = tuple(min(chunks[dim], size) for dim, size in zip(CUBE_DIMENSIONS, shape))
+
+        group = zarr.open_group(path, mode="w")
+        group.create_array("data", shape=shape, chunks=chunk_shape, dtype="float32", fill_value=np.nan,
+                           dimension_names=CUBE_DIMENSIONS)
+        group.create_array("written", shape=(len(lats),), dtype=bool, fill_value=False, dimension_names=["point"])
+        group.create_array("lat", data=np.asarray(lats, dtype="float64"), dimension_names=["point"])
+        group.create_array("lon", data=np.asarray(lons, dtype="float64"), dimension_names=["point"])
+        group.create_array("time", data=dates.asi8 // 10**9, dimension_names=["time"])
+        group["time"].attrs["units"] = "seconds since 1970-01-01 00:00:00 UTC"
+        variable = group.create_array("variable", shape=(len(VARIABLES_LIST),), dtype=str, dimension_names=["variable"])
+        variable[:] = np.array(VARIABLES_LIST)
+
+        return cls(path, mode="r+")
+
+    def time_slice(self, start_date=None, end_date=None):
+        """
+        Converts a date range into a slice of the time dimension.
+
+        Args:
+            start_date (str): First day to keep, None to start at the beginning.
+            end_date (str): Last day to keep, None to go until the end.
+
+        Returns:
+            slice: Slice of the time dimension.
+        """
+        start = 0 if start_date is None else self.dates.searchsorted(pd.Timestamp(start_date, tz="UTC"))
+        end = len(self.dates) if end_date is None else self.dates.searchsorted(pd.Timestamp(end_date, tz="UTC"), side="right")
+        return slice(start, end)
+
+    def is_written(self, point):
+        """
+        Tells if the data of a point has been written in the cube.
+
+        Args:
+            point (int): Position of the point in the cube.
+
+        Returns:
+            bool: True if the point has been written.
+        """
+        return bool(self.written[point])
+
+    def write_point(self, point, dates, block):
+        """
+        Writes the daily data of one point. The dates have to be the ones of the cube.
+
+        Args:
+            point (int): Position of the point in the cube, the index of the point in the coordinates file.
+            dates (np.ndarray): int64 dates in seconds since the epoch.
+            block (np.ndarray): float32 block of shape (days, variables), in the order of the cube variables.
+        """
+        if len(dates) != len(self.dates) or dates[0] != self.dates[0].timestamp():
+            raise ValueError(f"The dates of point {point} do not match the time axis of the cube {self.path}")
+
+        with self.lock:
+            self.data[point] = block
+            self.written[point] = True
+
+    def read_point(self, point, start_date=None, end_date=None):
+        """
+        Reads the daily data of one point.
+
+        Args:
+            point (int): Position of the point in the cube.
+            start_date (str): First day to read, None to start at the beginning.
+            end_date (str): Last day to read, None to go until the end.
+
+        Returns:
+            pd.DataFrame: Daily data with 'date' as the index and one column per variable.
+        """
+        time_slice = self.time_slice(start_date, end_date)
+        return pd.DataFrame(self.data[point, time_slice, :], index=self.dates[time_slice], columns=self.variables)
+
+    def read_variable(self, variable, start_date=None, end_date=None, points=slice(None)):
+        """
+        Reads one variable for several points, only reading the chunks that cover these points and dates.
+
+        Args:
+            variable (str): Name of the variable.
+            start_date (str): First day to read, None to start at the beginning.
+            end_date (str): Last day to read, None to go until the end.
+            points (slice | list): Points to read, all of them by default.
+
+        Returns:
+            pd.DataFrame: Daily data with 'date' as the index and one column per point.
+        """
+        time_slice = self.time_slice(start_date, end_date)
+        point_indexes = np.arange(len(self.lats))[points]
+        values = self.data.get_orthogonal_selection((point_indexes, time_slice, self.variables.index(variable)))
+        return pd.DataFrame(values.T, index=self.dates[time_slice], columns=point_indexes)
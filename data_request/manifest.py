@@ -0,0 +1,229 @@
+from utils.imports import *
+from utils.variables import *
+
+
+# --- Download manifest ---
+# JSON lines journal of the downloaded files: one line is appended each time the status of a point changes,
+# and the last line of a point is the one that counts. Appending only means a crash can not corrupt the records
+# already written.
+
+def describe_file(path):
+    """
+    Computes the size, checksum and number of data rows of a downloaded file, reading it only once.
+    The rows of a Parquet file are taken from its footer.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        dict: Size in bytes, SHA-256 checksum and number of rows (header excluded).
+    """
+    checksum = hashlib.sha256()
+    size = 0
+    lines = 0
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(MANIFEST_READ_CHUNK_SIZE), b""):
+            checksum.update(chunk)
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+
+    if path.endswith(DATASET_EXTENSIONS["parquet"]):
+        try:
+            rows = pq.read_metadata(path).num_rows
+        except Exception:
+            # Unreadable footer, the file is truncated
+            rows = 0
+    else:
+        rows = max(lines - 1, 0)
+
+    return {"bytes": size, "sha256": checksum.hexdigest(), "rows": rows}
+
+
+def read_file_dates(path):
+    """
+    Reads only the dates of a downloaded file.
+
+    Args:
+        path (str): Path to the CSV or Parquet file.
+
+    Returns:
+        pd.DatetimeIndex: Dates of the file, in UTC.
+    """
+    if path.endswith(DATASET_EXTENSIONS["parquet"]):
+        return pd.DatetimeIndex(pq.read_table(path, columns=["date"]).column("date").to_pandas())
+    return pd.DatetimeIndex(pd.read_csv(path, usecols=["date"], parse_dates=["date"])["date"])
+
+
+class DownloadManifest:
+    """
+    Records the status of each point of the dataset so that a run can be resumed where it stopped.
+
+    Args:
+        path (str): Path to the JSON lines file of the manifest.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut by a crash
+                        continue
+                    self.entries[entry["index"]] = entry
+
+    def record(self, index, lat, lon, filename, status, error=None, **file_info):
+        """
+        Appends the new status of a point to the manifest.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            filename (str): Name of the file of the point in the dataset folder.
+            status (str): Status of the point ('done', 'failed', 'empty' or 'corrupt').
+            error (str): Error message if any.
+            **file_info: Size, checksum and rows of the file as given by describe_file.
+        """
+        entry = {"index": int(index), "lat": float(lat), "lon": float(lon), "filename": filename, "status": status,
+                 "error": error, "time": datetime.now().isoformat(timespec="seconds"), **file_info}
+        with self.lock:
+            self.entries[entry["index"]] = entry
+            with open(self.path, "a") as file:
+                file.write(json.dumps(entry) + "\n")
+                file.flush()
+
+    def record_file(self, index, lat, lon, path, dates=None):
+        """
+        Describes a file that has just been saved and records it as done, with the date range it covers.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            path (str): Path to the saved file.
+            dates (np.ndarray): int64 dates of the file in seconds since the epoch, read from the file if None.
+        """
+        dates = read_file_dates(path) if dates is None else pd.to_datetime(dates, unit="s", utc=True)
+        date_range = {"start_date": dates[0].strftime("%Y-%m-%d"), "end_date": dates[-1].strftime("%Y-%m-%d")} if len(dates) else {}
+        self.record(index, lat, lon, os.path.basename(path), "done", **describe_file(path), **date_range)
+
+    def is_complete(self, index, dataset_folder):
+        """
+        Tells if a point has been saved and its file is still there with the recorded size. The checksum is only
+        checked by verify_file, as it needs to read the whole file.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            dataset_folder (str): Path to the dataset folder.
+
+        Returns:
+            bool: True if the point does not need to be requested again.
+        """
+        entry = self.entries.get(int(index))
+        if entry is None or entry["status"] != "done":
+            return False
+        path = os.path.join(dataset_folder, entry["filename"])
+        return os.path.exists(path) and os.path.getsize(path) == entry["bytes"]
+
+    def get_stored_range(self, index, dataset_folder):
+        """
+        Gives the first and last days saved for a point. Records written before the date ranges were
+        recorded are completed by reading the dates of their file.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            dataset_folder (str): Path to the dataset folder.
+
+        Returns:
+            tuple: First and last days as 'YYYY-MM-DD' strings, None if the point is not saved.
+        """
+        if not self.is_complete(index, dataset_folder):
+            return None
+
+        entry = self.entries[int(index)]
+        if "start_date" not in entry:
+            dates = read_file_dates(os.path.join(dataset_folder, entry["filename"]))
+            if not len(dates):
+                return None
+            entry["start_date"], entry["end_date"] = dates[0].strftime("%Y-%m-%d"), dates[-1].strftime("%Y-%m-%d")
+
+        return entry["start_date"], entry["end_date"]
+
+    def get_file_path(self, index, dataset_folder):
+        """
+        Gives the path of the file recorded for a point.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            dataset_folder (str): Path to the dataset folder.
+
+        Returns:
+            str: Path to the file, None if the point has no file recorded.
+        """
+        entry = self.entries.get(int(index))
+        if entry is None or not entry.get("filename"):
+            return None
+        return os.path.join(dataset_folder, entry["filename"])
+
+    def list_point_files(self, dataset_folder):
+        """
+        Lists the data files of the dataset folder, one per point. When a point has a file in each format, the one
+        recorded in the manifest is kept, the parquet one if neither is recorded.
+
+        Args:
+            dataset_folder (str): Path to the dataset folder.
+
+        Returns:
+            list: Names of the files in the dataset folder, sorted.
+        """
+        recorded = {entry["filename"] for entry in self.entries.values() if entry.get("filename")}
+        files = {}
+        for filename in sorted(os.listdir(dataset_folder)):
+            stem, extension = os.path.splitext(filename)
+            if extension not in DATASET_EXTENSIONS.values():
+                continue
+            if stem not in files or filename in recorded or (files[stem] not in recorded and extension == DATASET_EXTENSIONS["parquet"]):
+                files[stem] = filename
+        return sorted(files.values())
+
+    def verify_file(self, index, lat, lon, path, expected_rows):
+        """
+        Checks the file of a point against its record, without requesting it again. A file that has no record
+        yet (downloaded before the manifest existed) is adopted if it has the expected number of rows.
+        The result is recorded in the manifest, so that the corrupt files are requested on the next run.
+
+        Args:
+            index (int): Index of the point in the coordinates file.
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            path (str): Path to the file of the point.
+            expected_rows (int): Number of days the file should contain.
+
+        Returns:
+            str: Status of the point after the check ('done', 'missing' or 'corrupt').
+        """
+        filename = os.path.basename(path)
+        if not os.path.exists(path):
+            return "missing"
+
+        file_info = describe_file(path)
+        entry = self.entries.get(int(index))
+        if entry is not None and entry.get("sha256") == file_info["sha256"]:
+            # Same file as the recorded one, it keeps its verdict
+            status = "done" if entry["status"] == "done" else "corrupt"
+        elif entry is not None and entry["status"] == "done":
+            status = "corrupt"
+        else:
+            status = "done" if file_info["rows"] == expected_rows else "corrupt"
+
+        if entry is None or entry["status"] != status or entry.get("sha256") != file_info["sha256"]:
+            self.record(index, lat, lon, filename, status, **file_info)
+
+        return status
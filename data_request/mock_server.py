@@ -0,0 +1,196 @@
+from utils.imports import *
+from utils.variables import *
+from data_request.synthetic import build_daily_response
+
+
+# --- Local stand-in of the Open Meteo climate API ---
+# Serves /v1/climate with deterministic synthetic FlatBuffers responses, so that the downloader can be run and
+# measured without the real API. The latency, the error rate and the request limit can be configured to
+# reproduce the behaviour of the real service.
+
+@functools.lru_cache(maxsize=MOCK_SERVER_CACHE_SIZE)
+def get_cached_response(lat, lon, start_date, end_date, variables, model=DATA_MODEL):
+    """
+    Builds the message of one location once, building a century of data being much slower than sending it.
+
+    Args:
+        lat (float): Latitude of the point.
+        lon (float): Longitude of the point.
+        start_date (str): First day of the data.
+        end_date (str): Last day of the data.
+        variables (tuple): Names of the daily variables.
+        model (str): Name of the climate model.
+
+    Returns:
+        bytes: The length prefixed message of the location.
+    """
+    return build_daily_response(lat, lon, start_date, end_date, list(variables), model=model)
+
+
+def get_list_parameter(query, name):
+    """
+    Reads a list parameter, given either as repeated keys or as comma separated values.
+
+    Args:
+        query (dict): Parsed query string.
+        name (str): Name of the parameter.
+
+    Returns:
+        list: The values of the parameter.
+    """
+    return [value for item in query.get(name, []) for value in item.split(",") if value]
+
+
+class MockOpenMeteoServer(ThreadingHTTPServer):
+    """
+    HTTP server answering like the climate API.
+
+    Args:
+        address (tuple): Host and port to listen on, port 0 to pick a free one.
+        latency (float): Fixed delay of each answer, in seconds.
+        latency_per_location (float): Additional delay for each location of the request, in seconds.
+        error_rate (float): Probability of answering with a server error.
+        requests_per_minute (int): Number of requests accepted per minute before answering 429, 0 for no limit.
+        seed (int): Seed of the random errors.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, latency=0, latency_per_location=0, error_rate=0, requests_per_minute=0, seed=0):
+        super().__init__(address, MockOpenMeteoHandler)
+        self.latency = latency
+        self.latency_per_location = latency_per_location
+        self.error_rate = error_rate
+        self.requests_per_minute = requests_per_minute
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.accepted_times = collections.deque()
+        self.stats = {"requests": 0, "locations": 0, "throttled": 0, "errors": 0}
+
+    @property
+    def url(self):
+        """
+        URL of the climate endpoint, to give to the downloader.
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/climate"
+
+    def admit(self):
+        """
+        Decides what happens to an incoming request: throttled, failed or served.
+
+        Returns:
+            str: 'throttled', 'error' or 'ok'.
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            while self.accepted_times and now - self.accepted_times[0] > 60:
+                self.accepted_times.popleft()
+            if self.requests_per_minute and len(self.accepted_times) >= self.requests_per_minute:
+                self.stats["throttled"] += 1
+                return "throttled"
+            self.accepted_times.append(now)
+            if self.rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return "error"
+            return "ok"
+
+
+class MockOpenMeteoHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the requests of the mock server.
+    """
+    def send_json(self, status, reason):
+        """
+        Sends an error the way the API does, as a JSON body.
+
+        Args:
+            status (int): HTTP status code.
+            reason (str): Reason given in the body.
+        """
+        body = json.dumps({"error": True, "reason": reason}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/v1/climate":
+            self.send_json(404, f"Unknown endpoint {url.path}")
+            return
+
+        query = urllib.parse.parse_qs(url.query)
+        try:
+            lats = [float(value) for value in get_list_parameter(query, "latitude")]
+            lons = [float(value) for value in get_list_parameter(query, "longitude")]
+            start_date = query["start_date"][0]
+            end_date = query["end_date"][0]
+            variables = tuple(get_list_parameter(query, "daily"))
+            model = query.get("models", [DATA_MODEL])[0]
+            if not lats or len(lats) != len(lons) or not variables:
+                raise ValueError("latitude, longitude and daily must be given, with as many latitudes as longitudes")
+            pd.Timestamp(start_date), pd.Timestamp(end_date)
+        except (KeyError, ValueError) as e:
+            self.send_json(400, f"Invalid parameters: {e}")
+            return
+
+        decision = self.server.admit()
+        time.sleep(self.server.latency + self.server.latency_per_location * len(lats))
+        if decision == "throttled":
+            self.send_json(429, "Minutely API request limit exceeded. Please try again in one minute.")
+            return
+        if decision == "error":
+            self.send_json(500, "Synthetic server error")
+            return
+
+        body = b"".join(get_cached_response(lat, lon, start_date, end_date, variables, model) for lat, lon in zip(lats, lons))
+        with self.server.lock:
+            self.server.stats["locations"] += len(lats)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would flood the output of the benchmarks
+        pass
+
+
+def start_mock_server(host=MOCK_SERVER_HOST, port=0, **settings):
+    """
+    Starts the mock server in a background thread.
+
+    Args:
+        host (str): Host to listen on.
+        port (int): Port to listen on, 0 to pick a free one.
+        **settings: Latency, error rate, request limit and seed, see MockOpenMeteoServer.
+
+    Returns:
+        MockOpenMeteoServer: The running server, to stop with shutdown().
+    """
+    server = MockOpenMeteoServer((host, port), **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serves synthetic Open Meteo climate data on /v1/climate.")
+    parser.add_argument("--host", default=MOCK_SERVER_HOST, help="Host to listen on.")
+    parser.add_argument("--port", type=int, default=MOCK_SERVER_PORT, help="Port to listen on.")
+    parser.add_argument("--latency", type=float, default=0, help="Fixed delay of each answer, in seconds.")
+    parser.add_argument("--latency-per-location", type=float, default=0, help="Additional delay for each location, in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Probability of answering with a server error.")
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="Requests accepted per minute before answering 429, 0 for no limit.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random errors.")
+    args = parser.parse_args()
+
+    server = MockOpenMeteoServer((args.host, args.port), latency=args.latency, latency_per_location=args.latency_per_location,
+                                 error_rate=args.error_rate, requests_per_minute=args.requests_per_minute, seed=args.seed)
+    print(f"Mock Open Meteo server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(server.stats)
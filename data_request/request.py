@@ -1,20 +1,28 @@
 from utils.imports import *
 from utils.variables import *
+from data_request.manifest import DownloadManifest
+from data_request.cube import ClimateCube, get_cube_dates
+from data_request.response_cache import ResponseCache, split_messages
+from data_processing.main_functions import loads_data, get_model_path
 
 
-cache_session = requests_cache.CachedSession('.cache', expire_after = -1)
-retry_session = retry(cache_session, retries = 5, backoff_factor = 0.2)
-openmeteo = openmeteo_requests.Client(session = retry_session)
+# The retries, throttled answers and server errors included, are all made by get_data_with_retry, so that every
+# attempt goes through the shared rate limiter
+session = requests.Session()
 
 # This open the available coordinates of open meteo that we will take
 
-def build_api_params(lat, lon):
+def build_api_params(lat, lon, start_date=DATA_START_DATE, end_date=DATA_END_DATE, model=DATA_MODEL):
     """
     Constructs the API parameters for the request based on latitude, longitude, and variables.
+    Lists of latitudes and longitudes can be given to request several locations in one call.
     
     Args:
-        lat (float): Latitude of the location.
-        lon (float): Longitude of the location.
+        lat (float | list): Latitude of the location, or latitudes of the locations.
+        lon (float | list): Longitude of the location, or longitudes of the locations.
+        start_date (str): First day to request.
+        end_date (str): Last day to request.
+        model (str): Climate model to request.
     
     Returns:
         dict: Parameters for the API request.
@@ -22,9 +30,9 @@ def build_api_params(lat, lon):
     return {
         "latitude": lat,
         "longitude": lon,
-        "start_date": "1950-01-01",
-        "end_date": "2050-12-31",
-        "models": "MRI_AGCM3_2_S",
+        "start_date": start_date,
+        "end_date": end_date,
+        "models": model,
         "daily": VARIABLES_LIST,
         "timezone": "auto",
         "wind_speed_unit": "ms"
@@ -57,11 +65,95 @@ def get_data_from_open_meteo(url, params):
     Returns:
         dict: The API response containing weather data.
     """
-    responses = openmeteo.weather_api(url, params=params)
+    responses = get_all_data_from_open_meteo(url, params)
     response = responses[0]
     return response
 
 
+class ApiRequestError(openmeteo_requests.OpenMeteoRequestsError):
+    """
+    Error of a request to the Open Meteo API, keeping the HTTP status of the answer so that the retries can be
+    decided on it.
+    
+    Args:
+        message (str): Description of the error.
+        status_code (int): HTTP status of the answer, None when no answer has been received.
+    """
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def fetch_payload(url, params):
+    """
+    Sends one request to the Open Meteo API and returns the raw FlatBuffers payload, without retrying.
+    
+    Args:
+        url (str): The API endpoint URL for fetching weather data.
+        params (dict): Parameters for the API request.
+    
+    Returns:
+        bytes: The length prefixed messages of all the locations of the request.
+    
+    Raises:
+        ApiRequestError: If no answer has been received or if the API answered with an error status.
+    """
+    try:
+        response = session.get(url, params={**params, "format": "flatbuffers"})
+    except requests.RequestException as e:
+        raise ApiRequestError(f"failed to request {url!r}: {e}") from e
+    if response.status_code >= 400:
+        # The reason given by the API is in the body, which is not always JSON when a proxy answers
+        raise ApiRequestError(f"failed to request {url!r}: {response.status_code} {response.text[:200]}", response.status_code)
+
+    return response.content
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_cache(path=RESPONSE_CACHE_PATH):
+    """
+    Opens the response cache the first time it is needed, so that importing this module does not create it.
+
+    Args:
+        path (str): Path to the SQLite file.
+
+    Returns:
+        ResponseCache: The cache, shared by all the threads of the downloader.
+    """
+    return ResponseCache(path)
+
+
+def get_all_data_from_open_meteo(url, params):
+    """
+    Fetches weather data from the Open Meteo API for all the locations of the parameters.
+    Each location is looked up in the response cache first, only the missing ones are requested,
+    in a single call, and their messages are then added to the cache.
+    
+    Args:
+        url (str): The API endpoint URL for fetching weather data.
+        params (dict): Parameters for the API request.
+    
+    Returns:
+        list: The API responses, one per location in the order of the parameters.
+    """
+    lats = params["latitude"] if isinstance(params["latitude"], (list, tuple)) else [params["latitude"]]
+    lons = params["longitude"] if isinstance(params["longitude"], (list, tuple)) else [params["longitude"]]
+    response_cache = get_response_cache()
+    keys = [response_cache.make_key(url, {**params, "latitude": lat, "longitude": lon}) for lat, lon in zip(lats, lons)]
+    messages = [response_cache.get(key) for key in keys]
+
+    missing = [position for position, message in enumerate(messages) if message is None]
+    if missing:
+        missing_params = {**params, "latitude": [lats[position] for position in missing],
+                          "longitude": [lons[position] for position in missing]}
+        for position, message in zip(missing, split_messages(fetch_payload(url, missing_params))):
+            messages[position] = message
+            response_cache.put(keys[position], message)
+
+    # Locations without any answer stay None, the caller reports them as empty
+    return [WeatherApiResponse.GetRootAs(message, 4) if message is not None else None for message in messages]
+
+
 def fill_daily_dict(daily, lat, lon):
     """
     Fills a dictionary with daily weather data including date, latitude, and longitude.
@@ -91,34 +183,375 @@ def fill_daily_dict(daily, lat, lon):
     return daily_data
 
 
-def save_daily_dataset(daily_data, dataset_folder, filename_base, index, lat, lon):
+def fill_daily_block(daily, block=None):
+    """
+    Copies the daily weather data of a response straight into a float32 block with one column per variable,
+    without building any dictionary or DataFrame. The dates are kept as seconds since the epoch and the latitude
+    and longitude are not repeated on each row. The block of the previous response is reused when it has the right shape.
+    
+    Args:
+        daily (object): Object containing daily weather data from the API response.
+        block (np.ndarray): Block to fill, a new one is allocated if None or if its shape does not match.
+        
+    Returns:
+        tuple:
+            - (np.ndarray): int64 dates in seconds since the epoch (UTC).
+            - (np.ndarray): float32 block of shape (days, variables), in the order of VARIABLES_LIST.
+    """
+    dates = np.arange(daily.Time(), daily.TimeEnd(), daily.Interval(), dtype=np.int64)
+    shape = (len(dates), len(VARIABLES_LIST))
+    if block is None or block.shape != shape:
+        # Column major so that each variable is contiguous, as the Parquet writer wants it
+        block = np.empty(shape, dtype=np.float32, order="F")
+
+    for var_idx in range(len(VARIABLES_LIST)):
+        # ValuesAsNumpy is a view on the response buffer, this is the only copy of the values
+        block[:, var_idx] = daily.Variables(var_idx).ValuesAsNumpy()
+
+    return dates, block
+
+
+def get_missing_ranges(stored_range, start_date, end_date):
     """
-    Saves the daily weather data to a CSV file.
+    Computes the date ranges to request so that a point covers the requested period, given what is already saved.
     
     Args:
-        daily_data (dict): Dictionary containing daily weather data.
+        stored_range (tuple): First and last days already saved, None if nothing is saved.
+        start_date (str): First day of the requested period.
+        end_date (str): Last day of the requested period.
+    
+    Returns:
+        list: (start_date, end_date) ranges to request, empty if the saved data already covers the period.
+    """
+    if stored_range is None:
+        return [(start_date, end_date)]
+
+    stored_start, stored_end = (pd.Timestamp(date) for date in stored_range)
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    one_day = pd.Timedelta(days=1)
+    ranges = []
+    if start < stored_start:
+        ranges.append((start, min(end, stored_start - one_day)))
+    if end > stored_end:
+        ranges.append((max(start, stored_end + one_day), end))
+
+    return [(first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")) for first, last in ranges]
+
+
+def merge_daily_blocks(dates_list, blocks_list):
+    """
+    Merges several pieces of daily data of one point into a single block sorted by date. When a date is in several
+    pieces, the value of the last piece is kept, so that the data just requested replaces the saved one.
+    
+    Args:
+        dates_list (list): int64 dates in seconds since the epoch of each piece.
+        blocks_list (list): float32 blocks of shape (days, variables) of each piece.
+    
+    Returns:
+        tuple:
+            - (np.ndarray): Sorted int64 dates without duplicates.
+            - (np.ndarray): float32 block of the merged data.
+    """
+    dates = np.concatenate(dates_list)
+    block = np.concatenate(blocks_list)
+    # Looking at the reversed dates makes np.unique return the last occurrence of each date
+    unique_dates, reversed_positions = np.unique(dates[::-1], return_index=True)
+    keep = len(dates) - 1 - reversed_positions
+
+    return unique_dates, np.asfortranarray(block[keep])
+
+
+def get_point_path(dataset_folder, filename_base, index, dataset_format=DATASET_FORMAT):
+    """
+    Builds the path of the file of a point.
+    
+    Args:
+        dataset_folder (str): Path to the dataset folder.
+        filename_base (str): Base name for the output file.
+        index (int): Index of the point in the coordinates file.
+        dataset_format (str): Format of the file, "csv" or "parquet".
+    
+    Returns:
+        str: Path to the file of the point.
+    """
+    return f'{dataset_folder}/{filename_base}_{index}{DATASET_EXTENSIONS[dataset_format]}'
+
+
+def get_expected_rows(params):
+    """
+    Computes the number of days a complete file should contain for the given request parameters.
+    
+    Args:
+        params (dict): Parameters for the API request.
+    
+    Returns:
+        int: Number of days between the start and end dates, both included.
+    """
+    return (pd.Timestamp(params["end_date"]) - pd.Timestamp(params["start_date"])).days + 1
+
+
+def write_daily_parquet(dates, block, path, lat, lon):
+    """
+    Writes the daily weather data of one point to a Parquet file. The variables are stored as float32 columns,
+    the dates as second timestamps with a delta encoding, and the latitude and longitude only once in the file
+    metadata instead of two repeated columns.
+    
+    Args:
+        dates (np.ndarray): int64 dates in seconds since the epoch.
+        block (np.ndarray): float32 block of shape (days, variables).
+        path (str): Path of the Parquet file.
+        lat (float): Latitude of the location.
+        lon (float): Longitude of the location.
+    """
+    columns = {"date": pa.array(dates, type=pa.timestamp("s", tz="UTC"))}
+    for var_idx, var_name in enumerate(VARIABLES_LIST):
+        columns[var_name] = pa.array(block[:, var_idx])
+
+    table = pa.table(columns).replace_schema_metadata({PARQUET_LAT_KEY: repr(float(lat)), PARQUET_LON_KEY: repr(float(lon))})
+    column_encoding = {"date": "DELTA_BINARY_PACKED", **{var_name: "BYTE_STREAM_SPLIT" for var_name in VARIABLES_LIST}}
+    pq.write_table(table, path, compression=PARQUET_COMPRESSION, use_dictionary=False, column_encoding=column_encoding)
+
+
+def write_daily_csv(dates, block, path, lat, lon):
+    """
+    Writes the daily weather data of one point to a CSV file, with the same layout as the historical files
+    (date, lat and lon columns followed by the variables).
+    
+    Args:
+        dates (np.ndarray): int64 dates in seconds since the epoch.
+        block (np.ndarray): float32 block of shape (days, variables).
+        path (str): Path of the CSV file.
+        lat (float): Latitude of the location.
+        lon (float): Longitude of the location.
+    """
+    daily_dataframe = pd.DataFrame(block, columns=VARIABLES_LIST, copy=False)
+    daily_dataframe.insert(0, "date", pd.to_datetime(dates, unit="s", utc=True))
+    daily_dataframe.insert(1, "lat", lat)
+    daily_dataframe.insert(2, "lon", lon)
+    daily_dataframe.to_csv(path)
+
+
+def save_daily_dataset(dates, block, dataset_folder, filename_base, index, lat, lon, dataset_format=DATASET_FORMAT):
+    """
+    Saves the daily weather data to a CSV or Parquet file. The file is written under a temporary name and then renamed,
+    so that a crash never leaves a half written file under the final name. The file of the point in the other format,
+    left by a run with another --format, is removed, so that the point is not processed twice.
+    
+    Args:
+        dates (np.ndarray): int64 dates in seconds since the epoch.
+        block (np.ndarray): float32 block of shape (days, variables).
         dataset_folder (str): Path to the folder where the file will be saved.
-        filename_base (str): Base name for the output CSV file.
+        filename_base (str): Base name for the output file.
         index (int): Index for distinguishing multiple output files.
         lat (float): Latitude of the location.
         lon (float): Longitude of the location.
+        dataset_format (str): Format of the file, "csv" or "parquet".
+    
+    Returns:
+        str: Path to the saved file.
     """
-    daily_dataframe = pd.DataFrame(data = daily_data)
-    os.path.join(dataset_folder, filename_base)
-    daily_dataframe.to_csv(f'{dataset_folder}/{filename_base}_{index}.csv')
+    path = get_point_path(dataset_folder, filename_base, index, dataset_format)
+    if dataset_format == "parquet":
+        write_daily_parquet(dates, block, f'{path}.tmp', lat, lon)
+    else:
+        write_daily_csv(dates, block, f'{path}.tmp', lat, lon)
+    os.replace(f'{path}.tmp', path)
+    for other_format in DATASET_EXTENSIONS:
+        other_path = get_point_path(dataset_folder, filename_base, index, other_format)
+        if other_format != dataset_format and os.path.exists(other_path):
+            os.remove(other_path)
     print(f"Request number {index} done for Lat:{lat}, and Lon:{lon}")
 
+    return path
 
 
+class RateLimiter:
+    """
+    Spaces out the request starts of all the workers so that the whole pool stays within the request budget.
+    
+    Args:
+        requests_per_minute (float): Maximum number of requests started per minute, None to disable the limit.
+    """
+    def __init__(self, requests_per_minute):
+        self.interval = 60 / requests_per_minute if requests_per_minute else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
 
-# --- Main function to get openmeteo data from Gambia ---
-def request_all_data_gambia(coordinates_csv, dataset_folder):
+    def wait(self):
+        """
+        Blocks the calling worker until its request slot is reached.
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0, slot - now))
+
+    def pause(self, delay):
+        """
+        Pushes back the next request slot for every worker, used when the API tells us we are going too fast.
+        
+        Args:
+            delay (float): Pause in seconds.
+        """
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + delay)
+
+
+def is_rate_limit_error(error):
     """
-    Orchestrates the process of requesting and saving daily weather data for multiple coordinates.
+    Tells if an exception raised during a request comes from the API request limit.
+    
+    Args:
+        error (Exception): Exception raised during the request.
+    
+    Returns:
+        bool: True if the request has been throttled.
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+def is_retryable_error(error):
+    """
+    Tells if a request can succeed when sent again: the client errors other than the throttling, such as a
+    400 Bad Request, give the same answer at every attempt.
+    
+    Args:
+        error (Exception): Exception raised during the request.
+    
+    Returns:
+        bool: True if the request is worth retrying.
+    """
+    status_code = getattr(error, "status_code", None)
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def get_data_with_retry(url, params, rate_limiter, retries=REQUEST_RETRIES, backoff_factor=REQUEST_BACKOFF_FACTOR):
+    """
+    Fetches the data of one request, retrying with an exponential backoff on the errors that can be retried. When
+    the API throttles us, the pause is shared with all the workers through the rate limiter.
+    
+    Args:
+        url (str): The API endpoint URL for fetching weather data.
+        params (dict): Parameters for the API request.
+        rate_limiter (RateLimiter): Limiter shared by all the workers.
+        retries (int): Number of retries before giving up.
+        backoff_factor (float): Base of the waiting time between two attempts, in seconds.
+    
+    Returns:
+        list: The API responses, one per location.
+    """
+    for attempt in range(retries + 1):
+        rate_limiter.wait()
+        try:
+            return get_all_data_from_open_meteo(url, params)
+        except Exception as e:
+            if attempt == retries or not is_retryable_error(e):
+                raise
+            delay = backoff_factor * 2 ** attempt
+            if is_rate_limit_error(e):
+                delay = max(delay, RATE_LIMIT_PAUSE)
+                rate_limiter.pause(delay)
+            time.sleep(delay)
+
+
+def request_points_batch(url, points, dataset_folder, filename_base, rate_limiter, manifest, dataset_format=DATASET_FORMAT, cube=None,
+                         ranges=((DATA_START_DATE, DATA_END_DATE),), merge=False, model=DATA_MODEL):
+    """
+    Requests the daily weather data of a batch of points in a single call per date range, and saves the file of each point.
+    When merging, the new days are added to the data already saved for each point instead of replacing it.
+    Errors are captured and returned instead of raised, so that one bad batch does not stop the others.
+    
+    Args:
+        url (str): The API endpoint URL for fetching weather data.
+        points (list): List of (index, lat, lon) tuples, the index being the one of the point in the coordinates file.
+        dataset_folder (str): Path to the folder where the files will be saved.
+        filename_base (str): Base name for the output files.
+        rate_limiter (RateLimiter): Limiter shared by all the workers.
+        manifest (DownloadManifest): Manifest where the status of each point is recorded.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+        cube (ClimateCube): Cube where the points are also written, None to only write the files.
+        ranges (list): (start_date, end_date) ranges to request, the same for all the points of the batch.
+        merge (bool): True to merge the requested days into the files already saved.
+        model (str): Climate model to request.
+    
+    Returns:
+        list: Status of the request for each point of the batch.
+    """
+    results = [{"model": model, "index": index, "lat": lat, "lon": lon, "status": "done", "error": None} for index, lat, lon in points]
+    lats, lons = [lat for _, lat, _ in points], [lon for _, _, lon in points]
+    try:
+        ranges_responses = [get_data_with_retry(url, build_api_params(lats, lons, start_date, end_date, model), rate_limiter)
+                            for start_date, end_date in ranges]
+    except Exception as e:
+        for result in results:
+            result["status"] = "failed"
+            result["error"] = str(e)
+            manifest.record(result["index"], result["lat"], result["lon"], None, "failed", error=str(e))
+            print(f"Error for point: Latitude {result['lat']}, Longitude {result['lon']} - {str(e)}")
+        return results
+
+    # The API answers with one response per location, in the order of the request.
+    # All the responses have the same shape, so they share the same block.
+    block = None
+    for position, result in enumerate(results):
+        index, lat, lon = result["index"], result["lat"], result["lon"]
+        try:
+            responses = [responses[position] for responses in ranges_responses if position < len(responses) and responses[position]]
+            if len(responses) == len(ranges):
+                if merge:
+                    stored_path = manifest.get_file_path(index, dataset_folder)
+                    stored, _, _ = loads_data(stored_path)
+                    pieces = [fill_daily_block(response.Daily()) for response in responses]
+                    dates, point_block = merge_daily_blocks([stored.index.as_unit("s").asi8] + [piece[0] for piece in pieces],
+                                                            [stored[VARIABLES_LIST].to_numpy(dtype=np.float32)] + [piece[1] for piece in pieces])
+                else:
+                    dates, block = fill_daily_block(responses[0].Daily(), block)
+                    point_block = block
+                path = save_daily_dataset(dates, point_block, dataset_folder, filename_base, index, lat, lon, dataset_format)
+                manifest.record_file(index, lat, lon, path, dates)
+                if cube is not None:
+                    write_point_in_cube(cube, index, dates, point_block)
+            else:
+                result["status"] = "empty"
+                manifest.record(index, lat, lon, None, "empty")
+                print(f"No data for point: Latitude {lat}, Longitude {lon}")
+
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+            manifest.record(index, lat, lon, None, "failed", error=str(e))
+            print(f"Error for point: Latitude {lat}, Longitude {lon} - {str(e)}")
+
+    return results
+
+
+def make_batches(points, batch_size):
+    """
+    Splits the points into batches of points requested together.
+    
+    Args:
+        points (list): List of (index, lat, lon) tuples.
+        batch_size (int): Number of points per request.
+    
+    Returns:
+        list: List of batches, each one being a list of (index, lat, lon) tuples.
+    """
+    return [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+
+
+def prepare_dataset_folder(coordinates_csv, dataset_folder):
+    """
+    Checks the coordinates file, creates the dataset folder if needed and loads the points.
     
     Args:
         coordinates_csv (str): Path to the CSV file containing coordinates.
         dataset_folder (str): Path to the folder where the results will be saved.
+    
+    Returns:
+        tuple:
+            - (list): List of (index, lat, lon) tuples.
+            - (DownloadManifest): Manifest of the dataset folder.
     """
     try:
         with open(coordinates_csv, 'r') as file:
@@ -132,30 +565,235 @@ def request_all_data_gambia(coordinates_csv, dataset_folder):
     else:
         os.makedirs(dataset_folder)
         print("Dataset folder created")
-    filename_base = "cmip6_era5_data_daily"
-    url ="https://climate-api.open-meteo.com/v1/climate"
     df = pd.read_csv(coordinates_csv)
+    points = [(index, *get_lat_lon(row)) for index, row in df.iterrows()]
+    manifest = DownloadManifest(os.path.join(dataset_folder, MANIFEST_FILENAME))
+
+    return points, manifest
+
+
+def open_cube(cube_path, points, start_date=DATA_START_DATE, end_date=DATA_END_DATE):
+    """
+    Opens the cube of the dataset, or creates it if it does not exist yet. A cube built for another date range
+    is created again, the saved points being copied back into it from their files.
+    
+    Args:
+        cube_path (str): Path to the Zarr store.
+        points (list): List of (index, lat, lon) tuples of the coordinates file.
+        start_date (str): First day of the time axis.
+        end_date (str): Last day of the time axis.
     
-    for index, row in df.iterrows():
+    Returns:
+        ClimateCube: The cube opened for writing.
+    """
+    if os.path.exists(cube_path):
+        cube = ClimateCube(cube_path, mode="r+")
+        if len(cube.lats) != len(points):
+            raise ValueError(f"The cube {cube_path} has {len(cube.lats)} points while the coordinates file has {len(points)}")
+        if cube.dates.equals(get_cube_dates(start_date, end_date)):
+            return cube
+        print(f"The date range of the cube {cube_path} changed, it is created again")
 
-        lat, lon = get_lat_lon(row)
-        params = build_api_params(lat, lon)
+    return ClimateCube.create(cube_path, [lat for _, lat, _ in points], [lon for _, _, lon in points], start_date, end_date)
 
-        try:
-            
-            response = get_data_from_open_meteo(url, params)
-            if response:
-                
-                daily = response.Daily()
-                daily_data = fill_daily_dict(daily, lat, lon)
-                save_daily_dataset(daily_data, dataset_folder, filename_base, index, lat, lon)
 
-            else:
-                print(f"No data for point: Latitude {lat}, Longitude {lon}")
-            
-        except Exception as e:
-            print(f"Error for point: Latitude {lat}, Longitude {lon} - {str(e)}")
-        # Time sleep here to not causing trouble reaching the request limit
-        time.sleep(2)
+def write_point_in_cube(cube, index, dates, block):
+    """
+    Writes the data of a point in the cube, keeping only the days of the time axis of the cube,
+    as a saved file can cover a longer period than the one requested.
+    
+    Args:
+        cube (ClimateCube): The cube opened for writing.
+        index (int): Index of the point in the coordinates file.
+        dates (np.ndarray): int64 dates in seconds since the epoch.
+        block (np.ndarray): float32 block of shape (days, variables).
+    """
+    keep = np.isin(dates, cube.dates.as_unit("s").asi8)
+    cube.write_point(index, dates[keep], block[keep])
+
+
+def fill_cube_from_files(cube, points, dataset_folder, dataset_format=DATASET_FORMAT):
+    """
+    Writes in the cube the points that have already been saved as files but are not in the cube yet,
+    so that they do not need to be requested again.
+    
+    Args:
+        cube (ClimateCube): The cube opened for writing.
+        points (list): List of (index, lat, lon) tuples already saved.
+        dataset_folder (str): Path to the dataset folder.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+    """
+    missing = [index for index, _, _ in points if not cube.is_written(index)]
+    for index in tqdm(missing, desc="Writing the saved points in the cube"):
+        data, _, _ = loads_data(get_point_path(dataset_folder, DATASET_FILENAME_BASE, index, dataset_format))
+        write_point_in_cube(cube, index, data.index.as_unit("s").asi8, data[VARIABLES_LIST].to_numpy(dtype=np.float32))
+
+
+def verify_dataset(coordinates_csv, dataset_folder, dataset_format=DATASET_FORMAT, start_date=DATA_START_DATE, end_date=DATA_END_DATE):
+    """
+    Checks the files already downloaded against the manifest without requesting anything. Corrupt files are
+    recorded as such in the manifest, so that the next run requests them again.
+    The file recorded for a point is checked whatever its format, the format only applies to the points without record.
+    
+    Args:
+        coordinates_csv (str): Path to the CSV file containing coordinates.
+        dataset_folder (str): Path to the dataset folder.
+        dataset_format (str): Format of the files of the points without record, "csv" or "parquet".
+        start_date (str): First day the files of the points without record should contain.
+        end_date (str): Last day the files of the points without record should contain.
+    
+    Returns:
+        pd.DataFrame: Status of each point after the check, ordered as the coordinates file.
+    """
+    points, manifest = prepare_dataset_folder(coordinates_csv, dataset_folder)
+    expected_rows = get_expected_rows(build_api_params(None, None, start_date, end_date))
+    results = []
+    for index, lat, lon in tqdm(points, desc="Verifying the files of the points"):
+        path = manifest.get_file_path(index, dataset_folder) or get_point_path(dataset_folder, DATASET_FILENAME_BASE, index, dataset_format)
+        status = manifest.verify_file(index, lat, lon, path, expected_rows)
+        results.append({"index": index, "lat": lat, "lon": lon, "status": status})
+
+    results = pd.DataFrame(results)
+    print(results["status"].value_counts().to_string())
+    bad = results[results["status"] != "done"]
+    if len(bad):
+        print(f"{len(bad)} points over {len(results)} will be requested on the next run:")
+        print(bad.to_string(index=False))
+
+    return results
+
+
+def plan_model_requests(points, manifest, dataset_folder, start_date, end_date):
+    """
+    Sorts the points of a model into the ones already saved and the ones to request. The points that are missing,
+    failed or corrupt are fully requested, the saved points only request the days they are missing.
+    The points needing the same ranges are grouped so that they can be batched together.
+    
+    Args:
+        points (list): List of (index, lat, lon) tuples.
+        manifest (DownloadManifest): Manifest of the dataset folder of the model.
+        dataset_folder (str): Dataset folder of the model.
+        start_date (str): First day to request.
+        end_date (str): Last day to request.
+    
+    Returns:
+        tuple:
+            - (list): The points already saved, as (index, lat, lon) tuples.
+            - (dict): Points to request for each (ranges, merge) pair.
+    """
+    present = []
+    groups = collections.defaultdict(list)
+    for index, lat, lon in points:
+        stored_range = manifest.get_stored_range(index, dataset_folder)
+        ranges = get_missing_ranges(stored_range, start_date, end_date)
+        if ranges:
+            groups[(tuple(ranges), stored_range is not None)].append((index, lat, lon))
+        else:
+            present.append((index, lat, lon))
+
+    return present, groups
+
+
+# --- Main function to get openmeteo data from Gambia ---
+def request_all_data_gambia(coordinates_csv, dataset_folder, concurrency=REQUEST_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE, batch_size=REQUEST_BATCH_SIZE,
+                            dataset_format=DATASET_FORMAT, cube_path=None, url=OPEN_METEO_URL, start_date=DATA_START_DATE, end_date=DATA_END_DATE,
+                            models=(DATA_MODEL,)):
+    """
+    Orchestrates the process of requesting and saving daily weather data for multiple coordinates.
+    The points are grouped in batches requested in one call, the batches are spread over a pool of workers,
+    and the output files keep the index of the point in the coordinates file whatever the order in which
+    the requests finish. The points already saved according to the manifest are not requested again, and
+    the points saved for a shorter period only request the missing days, which are merged into their files.
+    The points can also be written in a single chunked cube, next to the per point files.
+    Several climate models can be requested at once: their batches share the pool and the request budget,
+    and each model is saved in its own dataset folder and cube (see get_model_path).
+    
+    Args:
+        coordinates_csv (str): Path to the CSV file containing coordinates.
+        dataset_folder (str): Path to the folder where the results will be saved.
+        concurrency (int): Number of requests running at the same time.
+        requests_per_minute (float): Request budget shared by all the workers, None to disable the limit.
+        batch_size (int): Number of points requested in one call.
+        dataset_format (str): Format of the files, "csv" or "parquet".
+        cube_path (str): Path to the Zarr cube to write, None to only write the per point files.
+        url (str): The API endpoint URL, to use another server than the Open Meteo one.
+        start_date (str): First day to request.
+        end_date (str): Last day to request.
+        models (list): Climate models to request.
+    
+    Returns:
+        pd.DataFrame: Status of the request for each model and point, ordered by model then as the coordinates file.
+    """
+    filename_base = DATASET_FILENAME_BASE
+    rate_limiter = RateLimiter(requests_per_minute)
 
-request_all_data_gambia(COORDINATES_FILE, DATASET_FOLDER)
\ No newline at end of file
+    present = []
+    models_tasks = []
+    for model in models:
+        model_folder = get_model_path(dataset_folder, model)
+        points, manifest = prepare_dataset_folder(coordinates_csv, model_folder)
+        model_present, groups = plan_model_requests(points, manifest, model_folder, start_date, end_date)
+        present += [{"model": model, "index": index, "lat": lat, "lon": lon, "status": "present", "error": None}
+                    for index, lat, lon in model_present]
+        extended = sum(len(group) for (_, merge), group in groups.items() if merge)
+        print(f"{model}: {len(model_present)} points already saved, {len(points) - len(model_present) - extended} points to request, "
+              f"{extended} points to extend to {start_date} - {end_date}")
+
+        cube = None
+        if cube_path is not None:
+            cube = open_cube(get_model_path(cube_path, model), points, start_date, end_date)
+            fill_cube_from_files(cube, model_present, model_folder, dataset_format)
+
+        models_tasks.append([(batch, model_folder, manifest, cube, ranges, merge, model)
+                             for (ranges, merge), group in groups.items() for batch in make_batches(group, batch_size)])
+
+    # The batches of the models are interleaved, so that all the models progress together
+    tasks = [task for round_tasks in itertools.zip_longest(*models_tasks) for task in round_tasks if task is not None]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(request_points_batch, url, batch, model_folder, filename_base, rate_limiter, manifest, dataset_format, cube,
+                            ranges, merge, model)
+            for batch, model_folder, manifest, cube, ranges, merge, model in tasks
+        ]
+        for _ in tqdm(as_completed(futures), total=len(futures), desc="Requesting the batches of points"):
+            pass
+
+    stats = get_response_cache().stats()
+    print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+          f"{stats['bytes_saved'] / 1024**2:,.1f} MB not downloaded, {stats['entries']} entries using "
+          f"{stats['stored_bytes'] / 1024**2:,.1f} MB, {stats['evictions']} evicted")
+
+    results = pd.DataFrame(present + [result for future in futures for result in future.result()],
+                           columns=["model", "index", "lat", "lon", "status", "error"])
+    results["model"] = pd.Categorical(results["model"], categories=list(models), ordered=True)
+    results = results.sort_values(["model", "index"]).reset_index(drop=True)
+    failed = results[~results["status"].isin(["done", "present"])]
+    if len(failed):
+        print(f"{len(failed)} points over {len(results)} have not been saved:")
+        print(failed.to_string(index=False))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Requests the daily climate data of all the points from Open Meteo.")
+    parser.add_argument("--concurrency", type=int, default=REQUEST_CONCURRENCY, help="Number of requests running at the same time.")
+    parser.add_argument("--requests-per-minute", type=float, default=REQUESTS_PER_MINUTE, help="Request budget shared by all the workers, 0 to disable the limit.")
+    parser.add_argument("--start-date", default=DATA_START_DATE, help="First day to request, the saved points only request the days they miss.")
+    parser.add_argument("--end-date", default=DATA_END_DATE, help="Last day to request, the saved points only request the days they miss.")
+    parser.add_argument("--models", nargs="+", choices=CLIMATE_MODELS, default=[DATA_MODEL], help="Climate models to request, each one is saved in its own dataset folder.")
+    parser.add_argument("--batch-size", type=int, default=REQUEST_BATCH_SIZE, help="Number of points requested in one call.")
+    parser.add_argument("--verify", action="store_true", help="Only check the files already downloaded, without requesting anything.")
+    parser.add_argument("--format", choices=list(DATASET_EXTENSIONS), default=DATASET_FORMAT, help="Format of the per point files.")
+    parser.add_argument("--url", default=OPEN_METEO_URL, help="Climate API endpoint, for example the one of data_request/mock_server.py.")
+    parser.add_argument("--cube", action="store_true", help=f"Also write all the points in the chunked cube {CUBE_PATH}.")
+    args = parser.parse_args()
+
+    if args.verify:
+        for model in args.models:
+            verify_dataset(COORDINATES_FILE, get_model_path(DATASET_FOLDER, model), dataset_format=args.format, start_date=args.start_date,
+                           end_date=args.end_date)
+    else:
+        request_all_data_gambia(COORDINATES_FILE, DATASET_FOLDER, concurrency=args.concurrency, requests_per_minute=args.requests_per_minute,
+                                batch_size=args.batch_size, dataset_format=args.format, cube_path=CUBE_PATH if args.cube else None,
+                                url=args.url, start_date=args.start_date, end_date=args.end_date, models=args.models)
@@ -0,0 +1,80 @@
+from utils.imports import *
+from utils.variables import *
+from utils.sqlite_cache import SQLiteCache
+
+
+# --- Response cache of the downloader ---
+# SQLite store of the API messages, one entry per location. The key is built from the normalized request
+# parameters of the location, so that a point requested alone or inside any batch hits the same entry, and so that
+# the formatting of the coordinates does not matter. The messages are compressed, the store is bounded in size and
+# the least recently used entries are evicted first (see utils/sqlite_cache.py).
+
+def split_messages(payload):
+    """
+    Splits an API payload into the length prefixed messages of each location.
+
+    Args:
+        payload (bytes): Body of the API response.
+
+    Returns:
+        list: The message of each location, still prefixed by its length.
+    """
+    messages = []
+    position = 0
+    while position < len(payload):
+        length = int.from_bytes(payload[position:position + 4], byteorder="little")
+        # In a stream, error messages start with "Unexpected"
+        if length == 0x78656E55:
+            raise ValueError(payload[position:].decode("utf-8"))
+        messages.append(payload[position:position + 4 + length])
+        position += length + 4
+
+    return messages
+
+
+def normalize_param(value):
+    """
+    Converts a request parameter into a stable string: floats are written with a fixed number of decimals
+    and lists are joined.
+
+    Args:
+        value: Value of the parameter.
+
+    Returns:
+        str: Normalized value.
+    """
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return ",".join(normalize_param(item) for item in value)
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.{RESPONSE_CACHE_COORDINATE_DECIMALS}f}"
+    return str(value)
+
+
+class ResponseCache(SQLiteCache):
+    """
+    Bounded and compressed cache of the API messages, with hit and miss counters.
+
+    Args:
+        path (str): Path to the SQLite file.
+        max_bytes (int): Maximum size of the compressed messages, the least recently used ones are evicted above it.
+        max_age_days (float): Age after which an entry is considered stale and removed, None to keep entries forever.
+        compression_level (int): zlib compression level of the messages.
+    """
+    def __init__(self, path, max_bytes=RESPONSE_CACHE_MAX_BYTES, max_age_days=RESPONSE_CACHE_MAX_AGE_DAYS,
+                 compression_level=RESPONSE_CACHE_COMPRESSION_LEVEL):
+        super().__init__(path, max_bytes, max_age_days=max_age_days, compression_level=compression_level, table="responses")
+
+    @staticmethod
+    def make_key(url, params):
+        """
+        Builds the key of a request from its URL and its normalized parameters.
+
+        Args:
+            url (str): The API endpoint URL.
+            params (dict): Parameters of the request of one location.
+
+        Returns:
+            str: SHA-256 of the normalized request.
+        """
+        normalized = {name: normalize_param(value) for name, value in params.items()}
+        return hashlib.sha256(json.dumps([url, normalized], sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,170 @@
+from utils.imports import *
+from utils.variables import *
+from data_request.response_cache import split_messages
+
+
+# --- Synthetic Open Meteo responses ---
+# Builds FlatBuffers messages with the same layout as the ones of the climate API, so that the fetch path can be
+# exercised and measured without reaching the real API. The value of a day is deterministic for a given point and
+# variable, whatever the date range requested, and look roughly like the Gambian climate (seasonal cycle with a rainy season from July to October).
+
+# Mean, seasonal amplitude, noise and lower bound of each variable
+SYNTHETIC_VARIABLES_SHAPE = {
+    "temperature_2m_mean": (27, 2, 1, None),
+    "temperature_2m_max": (33, 3, 1.5, None),
+    "temperature_2m_min": (22, 2, 1, None),
+    "wind_speed_10m_mean": (2.5, 0.5, 0.8, 0),
+    "wind_speed_10m_max": (6, 1, 2, 0),
+    "shortwave_radiation_sum": (20, 3, 3, 0),
+    "relative_humidity_2m_mean": (65, 20, 5, 0),
+    "relative_humidity_2m_max": (85, 15, 5, 0),
+    "relative_humidity_2m_min": (45, 20, 5, 0),
+    "soil_moisture_0_to_10cm_mean": (0.2, 0.1, 0.03, 0),
+}
+
+
+def get_synthetic_seed(lat, lon, variable, model=DATA_MODEL):
+    """
+    Builds a seed that only depends on the point, the variable and the model, so that every process gives the same values.
+
+    Args:
+        lat (float): Latitude of the point.
+        lon (float): Longitude of the point.
+        variable (str): Name of the variable.
+        model (str): Name of the climate model.
+
+    Returns:
+        int: Seed of the random generator.
+    """
+    key = f"{round(float(lat), 4)}|{round(float(lon), 4)}|{variable}"
+    if model != DATA_MODEL:
+        key += f"|{model}"
+    return zlib.crc32(key.encode())
+
+
+def draw_daily(seed, dates, draw):
+    """
+    Draws random values for each day. The values of a year come from a generator seeded with the year, so that
+    a day gets the same value whatever the date range requested, as with the real API.
+
+    Args:
+        seed (int): Seed of the point and variable.
+        dates (pd.DatetimeIndex): Days to draw.
+        draw (callable): Function drawing n values from a generator, called as draw(rng, n).
+
+    Returns:
+        np.ndarray: One value per day.
+    """
+    values = np.empty(len(dates))
+    years = dates.year.values
+    day_of_year = dates.dayofyear.values
+    for year in np.unique(years):
+        in_year = years == year
+        values[in_year] = draw(np.random.default_rng([seed, int(year)]), 366)[day_of_year[in_year] - 1]
+
+    return values
+
+
+def generate_synthetic_values(lat, lon, variable, dates, model=DATA_MODEL):
+    """
+    Generates the daily values of one variable for one point.
+
+    Args:
+        lat (float): Latitude of the point.
+        lon (float): Longitude of the point.
+        variable (str): Name of the variable.
+        dates (pd.DatetimeIndex): Days to generate.
+        model (str): Name of the climate model, each model gives different values.
+
+    Returns:
+        np.ndarray: float32 values, one per day.
+    """
+    seed = get_synthetic_seed(lat, lon, variable, model)
+    day_of_year = dates.dayofyear.values
+    # Bell shaped rainy season centered on mid August
+    wet_season = np.exp(-((day_of_year - 225) / 40) ** 2)
+
+    if variable == "precipitation_sum":
+        rainy_day = draw_daily(seed, dates, lambda rng, n: rng.random(n)) < 0.1 + 0.5 * wet_season
+        values = draw_daily(seed + 1, dates, lambda rng, n: rng.standard_gamma(0.6, n)) * (2 + 20 * wet_season) * rainy_day
+    else:
+        mean, amplitude, noise, lower_bound = SYNTHETIC_VARIABLES_SHAPE.get(variable, (0, 1, 1, None))
+        if variable.startswith("temperature"):
+            # Warmest before the rains
+            seasonal_cycle = np.sin(2 * np.pi * (day_of_year - 30) / 365.25)
+        else:
+            seasonal_cycle = 2 * wet_season - 1
+        values = mean + amplitude * seasonal_cycle + draw_daily(seed, dates, lambda rng, n: rng.normal(0, noise, n))
+        if lower_bound is not None:
+            values = np.maximum(values, lower_bound)
+        if variable.startswith("relative_humidity"):
+            values = np.minimum(values, 100)
+
+    return values.astype(np.float32)
+
+
+def build_daily_response(lat, lon, start_date, end_date, variables, utc_offset_seconds=0, model=DATA_MODEL):
+    """
+    Builds the FlatBuffers message of one location, as sent by the API for a daily request.
+
+    Args:
+        lat (float): Latitude of the point.
+        lon (float): Longitude of the point.
+        start_date (str): First day of the data.
+        end_date (str): Last day of the data, included.
+        variables (list): Names of the daily variables, in the order of the request.
+        utc_offset_seconds (int): Offset of the timezone of the point.
+        model (str): Name of the climate model.
+
+    Returns:
+        bytes: The message prefixed by its length, ready to be concatenated with the ones of the other locations.
+    """
+    dates = pd.date_range(start=start_date, end=end_date, freq="D")
+    time_start = int(dates[0].timestamp()) - utc_offset_seconds
+    interval = 24 * 3600
+
+    builder = flatbuffers.Builder(1024 + 4 * len(dates) * len(variables))
+    variable_offsets = []
+    for variable in variables:
+        values = builder.CreateNumpyVector(generate_synthetic_values(lat, lon, variable, dates, model))
+        # VariableWithValues table, the values vector is its 4th field
+        builder.StartObject(13)
+        builder.PrependUOffsetTRelativeSlot(3, values, 0)
+        variable_offsets.append(builder.EndObject())
+
+    builder.StartVector(4, len(variable_offsets), 4)
+    for offset in reversed(variable_offsets):
+        builder.PrependUOffsetTRelative(offset)
+    variables_vector = builder.EndVector()
+
+    # VariablesWithTime table: time, time_end, interval, variables
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, time_start, 0)
+    builder.PrependInt64Slot(1, time_start + len(dates) * interval, 0)
+    builder.PrependInt32Slot(2, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables_vector, 0)
+    daily = builder.EndObject()
+
+    # WeatherApiResponse table: latitude, longitude, utc offset and daily data
+    builder.StartObject(15)
+    builder.PrependFloat32Slot(0, lat, 0)
+    builder.PrependFloat32Slot(1, lon, 0)
+    builder.PrependInt32Slot(6, utc_offset_seconds, 0)
+    builder.PrependUOffsetTRelativeSlot(10, daily, 0)
+    builder.Finish(builder.EndObject())
+
+    message = bytes(builder.Output())
+    return len(message).to_bytes(4, byteorder="little") + message
+
+
+def parse_responses(payload):
+    """
+    Splits a payload made of several length prefixed messages into API responses, as the Open Meteo client does.
+
+    Args:
+        payload (bytes): Concatenated messages.
+
+    Returns:
+        list: One WeatherApiResponse per location.
+    """
+    return [WeatherApiResponse.GetRootAs(message, 4) for message in split_messages(payload)]
@@ -1,44 +1,78 @@
 from data_processing.main_functions import *
 from data_processing.plot import plot_results_from_dataframe
-from utils.variables import DATASET_FOLDER, GRAPH_FOLDER, FINAL_CSV_PATH, DAILY_AGG_FOLDER, YEARLY_AGG_FOLDER
+from data_processing.vectorized import score_all_points
+from data_processing.result_sink import FinalScoreSink
+from data_processing.result_cache import get_result_cache
+from data_processing.periods import parse_periods, long_to_wide
+from data_processing.stage_store import run_point_stages, get_point_name
+from data_request.manifest import DownloadManifest
+from data_processing.profiling import profiled, set_profiled_point, flush_profile, enable_profiling, get_records_path, finish_profiling
+from utils.variables import DATASET_FOLDER, GRAPH_FOLDER, FINAL_CSV_PATH, FINAL_PARQUET_PATH, RESULT_CACHE_PATH, STAGES_FOLDER, PROFILE_PATHS, DAILY_AGG_FOLDER, YEARLY_AGG_FOLDER, MANIFEST_FILENAME
 
-def process_data(filename, save_csv:bool):
+def process_data(filename, save_csv:bool, save_final_score:bool=True, cache_path=None, stages_folder=None):
     """
     Main function to process climate data for a specific location.
 
     Args:
         filename (str): Path to the input data file.
+        save_csv (bool): Save the daily and yearly aggregations of the point.
+        save_final_score (bool): Save the final scores of the point in final_score.csv.
+        cache_path (str): Path to the result cache, None to calculate everything. The cache is not used
+            when the aggregations are saved, they need the daily data.
+        stages_folder (str): Folder where the daily, monthly and yearly stages of the point are persisted and
+            read back when still valid, None to calculate them in memory.
 
     Returns:
         final_score_df (pd.DataFrame): DataFrame with final scores.
         final_score_columns (list): List of final score column names.
     """
-    # Loading the data
-    data, lat, lon = loads_data(filename)
-    saving_filename = filename.split("\\")[1]
- 
-    # Making on different time scale
-    data_daily_growing_season, data_yearly_mean_temp = daily_work(data)
-    save_agg_csv(save_csv, DAILY_AGG_FOLDER, saving_filename, data_daily_growing_season)
-    data_monthly_growing_season = monthly_work(data_daily_growing_season)
-    data_yearly_growing_season, df_aggregate_yearly = yearly_work(data_daily_growing_season, data_monthly_growing_season, data_yearly_mean_temp)
-    save_agg_csv(save_csv, YEARLY_AGG_FOLDER, saving_filename, df_aggregate_yearly)
-
-    # Looping on periods to calculate risks on them
-    risk_df_data = loop_to_process_data_on_periods(data_yearly_growing_season, SCORE_COLUMNS)
-    risk_df, final_score_columns = convert_into_dataframe(risk_df_data)
-    data_yearly_growing_season['temperature_2m_mean'] = data_yearly_mean_temp
-    # Making a clean table of the different final score
-    final_score_df = create_final_score_dataframe(lat,lon, PERIODS, final_score_columns, risk_df)
-    final_score_df.to_csv("final_score.csv",index=False)
+    set_profiled_point(filename)
+    cache = get_result_cache(cache_path) if cache_path and not save_csv else None
+    cached_final = cached_yearly = None
+    if cache is not None:
+        yearly_key, final_key = profiled("hash_file", cache.get_point_keys, filename)
+        cached_final = profiled("result_cache_get", cache.get_frame, final_key)
+        if cached_final is None:
+            cached_yearly = profiled("result_cache_get", cache.get_frame, yearly_key)
 
+    if cached_final is not None:
+        final_score_df = cached_final[0]
+        final_score_columns = SCORE_COLUMNS + ["Final_Score"]
+    else:
+        if cached_yearly is not None:
+            # Only the scores depend on the settings that changed
+            df_aggregate_yearly, lat, lon = cached_yearly
+            data_yearly_growing_season = df_aggregate_yearly.join(pd.DataFrame(profiled("indicator_scores", indicator_scores, df_aggregate_yearly),
+                                                                               index=df_aggregate_yearly.index))
+        else:
+            # Making on different time scale, from the last persisted stage that is still valid
+            data_yearly_growing_season, data_daily_growing_season, lat, lon = run_point_stages(filename, save_csv, stages_folder)
+            df_aggregate_yearly = data_yearly_growing_season.drop(columns=list(INDICATOR_SCORE_RULES))
+            saving_filename = get_point_name(filename) + ".csv"
+            save_agg_csv(save_csv, DAILY_AGG_FOLDER, saving_filename, data_daily_growing_season)
+            save_agg_csv(save_csv, YEARLY_AGG_FOLDER, saving_filename, df_aggregate_yearly)
+            if cache is not None:
+                profiled("result_cache_put", cache.put_frame, yearly_key, df_aggregate_yearly, lat, lon)
+
+        # Looping on periods to calculate risks on them
+        risk_df_data = profiled("loop_to_process_data_on_periods", loop_to_process_data_on_periods, data_yearly_growing_season, SCORE_COLUMNS)
+        risk_df, final_score_columns = convert_into_dataframe(risk_df_data)
+        # Making a clean table of the different final score
+        final_score_df = profiled("create_final_score_dataframe", create_final_score_dataframe, lat,lon, PERIODS, final_score_columns, risk_df)
+        if cache is not None:
+            profiled("result_cache_put", cache.put_frame, final_key, final_score_df, lat, lon)
+
+    if save_final_score:
+        profiled("save_final_score", pd.DataFrame.to_csv, final_score_df, "final_score.csv", index=False)
+
+    flush_profile()
     return final_score_df, final_score_columns
 
 
 def save_agg_csv(save_csv, folder, filename, df):
     if save_csv:
         path = os.path.join(folder, filename)
-        df.to_csv(path)
+        profiled("save_agg_csv", pd.DataFrame.to_csv, df, path)
 
 def calculate_score_for_one_point():
     """
@@ -68,11 +102,98 @@ def get_point_for_score():
 
 
 
-def calculate_score_for_all_points():
+def get_final_score_wanted(df, coords_to_get_score):
+    """
+    Selects the final scores of the points asked for, as done row by row in calculate_score_for_all_points.
+
+    Args:
+        df (pd.DataFrame): Final scores with 'filename' as the index.
+        coords_to_get_score (list): (lat, lon) of the points asked for.
+
+    Returns:
+        pd.DataFrame: Final scores of the points asked for.
+    """
+    df_final_score = pd.DataFrame()
+    for position in range(len(df)):
+        new_final_row = df.iloc[[position]].reset_index(drop=True)
+        for lat, lon in coords_to_get_score:
+            if abs(new_final_row["LAT"].values[0]- lat)<10e-8 and abs(new_final_row["LON"].values[0]- lon)<10e-8:
+                df_final_score = pd.concat([df_final_score, new_final_row])
+    return df_final_score
+
+
+def process_data_in_parallel(files_list, index_to_make_csv_with, jobs, cache_path=None, stages_folder=None, profile_records_path=None,
+                             profile_memory=False):
+    """
+    Processes the files of the dataset folder in a pool of processes. The results are given back in the order
+    of files_list as soon as the results before them are done, whatever the order in which the workers finish,
+    and the first error stops the pool and is raised with the name of the file that failed.
+
+    Args:
+        files_list (list): Names of the files in the dataset folder.
+        index_to_make_csv_with (list): Names of the files whose daily and yearly aggregations are saved.
+        jobs (int): Number of processes.
+        cache_path (str): Path to the result cache, opened by each worker, None to calculate everything.
+        stages_folder (str): Folder of the persisted stages of the points, None to keep them in memory.
+        profile_records_path (str): File the workers append the records of their stages to, None not to profile them.
+        profile_memory (bool): The workers also record the change of the traced memory of each stage.
+
+    Yields:
+        tuple: The result of process_data for each file, in the order of files_list.
+    """
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=enable_profiling if profile_records_path else None,
+                                   initargs=(profile_records_path, profile_memory) if profile_records_path else ())
+    # final_score.csv is written by the parent, several workers writing the same file would mix it up
+    futures = {
+        executor.submit(process_data, os.path.join(DATASET_FOLDER, filename), filename.split(".")[0] + ".csv" in index_to_make_csv_with, False, cache_path, stages_folder): filename
+        for filename in files_list
+    }
+    results = {}
+    position = 0
+    try:
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Creating graphs for each point and filling the dataframe"):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                raise RuntimeError(f"Processing {futures[future]} failed: {e}") from e
+
+            # Only the results finished before their turn are kept in memory
+            while position < len(files_list) and files_list[position] in results:
+                result = results.pop(files_list[position])
+                position += 1
+                if position == len(files_list):
+                    result[0].to_csv("final_score.csv", index=False)
+                yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def calculate_score_for_all_points(vectorized=False, jobs=1, resume=False, final_format="csv", use_cache=True,
+                                   periods=PERIODS, rolling_length=None, period_format="wide", stages_folder=None,
+                                   profile_path=None, profile_format="jsonl", profile_memory=False):
     """
     Function to calculate and plot scores for all points in a dataset (multiple locations).
+    The final score of each point is appended to the output as soon as it is calculated.
+
+    Args:
+        vectorized (bool): Score all the points at once with the vectorized engine instead of one by one.
+            The daily and yearly aggregations of the points of index_to_make_csv_with are still saved.
+        jobs (int): Number of processes running process_data, the points are processed one by one if 1.
+        resume (bool): Keep the final scores already written and only process the other points.
+        final_format (str): "csv" to write FINAL_CSV_PATH, "parquet" to write the parts of FINAL_PARQUET_PATH.
+        use_cache (bool): Reuse the results of the points whose file and settings did not change since they have
+            been cached in RESULT_CACHE_PATH. The vectorized engine does not use the cache.
+        periods (list): (start, end) years of each period, only with the vectorized engine.
+        rolling_length (int): Length of rolling windows starting at every year, used instead of periods if given.
+        period_format (str): "wide" for one row per point, "long" for one row per point, period and score.
+        stages_folder (str): Folder where the daily, monthly and yearly stages of each point are persisted, so that
+            a later run only calculates the stages whose settings changed. None to keep them in memory. The
+            vectorized engine does not use the stages.
+        profile_path (str): Output of the profiling of the stages, None not to profile them. A summary of the
+            stages across the points is printed at the end of the run.
+        profile_format (str): "jsonl" for one record per stage call, "chrome" for a Chrome trace.
+        profile_memory (bool): Also record the change of the memory traced by tracemalloc, about three times slower.
     """
-    df = pd.DataFrame()
     if not os.path.exists(GRAPH_FOLDER):
         os.makedirs(GRAPH_FOLDER)
     if not os.path.exists(YEARLY_AGG_FOLDER):
@@ -80,7 +201,8 @@ def calculate_score_for_all_points():
     if not os.path.exists(DAILY_AGG_FOLDER):
         os.makedirs(DAILY_AGG_FOLDER)
 
-    files_list = os.listdir(DATASET_FOLDER)
+    # Only the data files, one per point, the folder also holds the download manifest
+    files_list = DownloadManifest(os.path.join(DATASET_FOLDER, MANIFEST_FILENAME)).list_point_files(DATASET_FOLDER)
 
     index_to_make_csv_with = ['cmip6_era5_data_daily_89.csv', 
                               'cmip6_era5_data_daily_53.csv',
@@ -89,32 +211,78 @@ def calculate_score_for_all_points():
                             ]
     
     coords_to_get_score = get_point_for_score()
-    df_final_score = pd.DataFrame()
+    output_path = FINAL_CSV_PATH if final_format == "csv" else FINAL_PARQUET_PATH
+    cache_path = RESULT_CACHE_PATH if use_cache else None
+    profile_records_path = get_records_path(profile_path, profile_format) if profile_path else None
+    if profile_records_path:
+        # The records of all the processes are appended, the ones of a previous run are removed first
+        for path in {profile_path, profile_records_path}:
+            if os.path.exists(path):
+                os.remove(path)
+        enable_profiling(profile_records_path, profile_memory)
 
-    for index, filename in enumerate(tqdm(files_list, desc="Creating graphs for each point and filling the dataframe"), start=1):
-        
-        save_csv = filename in index_to_make_csv_with
-        filename_graph = filename.split(".")[0]
-
-        graph_path = os.path.join(GRAPH_FOLDER, filename_graph)
-        data_path= os.path.join(DATASET_FOLDER, filename)
-        plot_args = process_data(filename=data_path, save_csv=save_csv)
-        # plot_results_from_dataframe(*plot_args, graph_path=graph_path)
-        new_final_row = pd.DataFrame(plot_args[0])
-        for  lat, lon in coords_to_get_score:
-            if abs(new_final_row["LAT"].values[0]- lat)<10e-8 and abs(new_final_row["LON"].values[0]- lon)<10e-8:
-                print("in the condition for final score")
-                df_final_score = pd.concat([df_final_score, new_final_row])
-        new_final_row["filename"] = filename_graph
-        new_final_row.set_index('filename', inplace=True)
+    with FinalScoreSink(output_path, final_format, resume=resume) as sink:
+        files_list = [filename for filename in files_list if filename.split(".")[0] not in sink.done]
 
-        if df is None : 
-            df = new_final_row
+        if vectorized:
+            if files_list:
+                final_score_df = profiled("score_all_points", score_all_points, [os.path.join(DATASET_FOLDER, filename) for filename in files_list],
+                                          periods=periods, rolling_length=rolling_length, output=period_format)
+                profiled("write_final_score", sink.write_frame, final_score_df)
+            for filename in files_list:
+                if filename.split(".")[0] + ".csv" in index_to_make_csv_with:
+                    process_data(filename=os.path.join(DATASET_FOLDER, filename), save_csv=True)
         else:
-            df = pd.concat([df, new_final_row])
-    df.to_csv(FINAL_CSV_PATH)
-    df_final_score.to_csv("final_score_wanted.csv")
+            if jobs > 1:
+                all_plot_args = process_data_in_parallel(files_list, index_to_make_csv_with, jobs, cache_path, stages_folder, profile_records_path, profile_memory)
+            else:
+                all_plot_args = (
+                    process_data(filename=os.path.join(DATASET_FOLDER, filename), save_csv=filename.split(".")[0] + ".csv" in index_to_make_csv_with,
+                                 cache_path=cache_path, stages_folder=stages_folder)
+                    for filename in tqdm(files_list, desc="Creating graphs for each point and filling the dataframe")
+                )
+
+            for filename, plot_args in zip(files_list, all_plot_args):
+                filename_graph = filename.split(".")[0]
+                graph_path = os.path.join(GRAPH_FOLDER, filename_graph)
+                # plot_results_from_dataframe(*plot_args, graph_path=graph_path)
+                profiled("write_final_score", sink.write, filename_graph, plot_args[0])
+
+        df = sink.read()
+
+    if period_format == "long" and not df.empty:
+        # The points asked for are selected on the table with one row per point
+        df = long_to_wide(df)
+    get_final_score_wanted(df, coords_to_get_score).to_csv("final_score_wanted.csv")
+    if profile_records_path:
+        finish_profiling(profile_path, profile_format)
+
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calculates the scores of all the points of the dataset.")
+    parser.add_argument("--vectorized", action="store_true", help="Score all the points at once with array operations instead of one by one.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of processes scoring the points one by one.")
+    parser.add_argument("--resume", action="store_true", help="Keep the final scores already written and only process the other points.")
+    parser.add_argument("--final-format", choices=["csv", "parquet"], default="csv", help="Format of the final scores of all the points.")
+    parser.add_argument("--periods", type=parse_periods, default=PERIODS, help="Periods scored by the vectorized engine, as start-end separated by commas.")
+    parser.add_argument("--rolling-periods", type=int, default=None, help="Score rolling windows of this number of years starting at every year, with the vectorized engine.")
+    parser.add_argument("--period-format", choices=["wide", "long"], default="wide", help="One row per point, or one row per point, period and score.")
+    parser.add_argument("--no-cache", action="store_true", help="Calculate all the points again instead of reusing the cached results.")
+    parser.add_argument("--save-stages", nargs="?", const=STAGES_FOLDER, default=None, metavar="FOLDER",
+                        help=f"Persist the daily, monthly and yearly stages of each point as Parquet in FOLDER ({STAGES_FOLDER} by default) "
+                             "and start from the persisted stages that are still valid.")
+    parser.add_argument("--profile", action="store_true", help="Record the wall time, CPU time, rows and memory change of each stage of each point, "
+                                                                  "and print a summary of the stages at the end of the run.")
+    parser.add_argument("--profile-format", choices=list(PROFILE_PATHS), default="jsonl", help="JSON lines records, or a Chrome trace to open in Perfetto.")
+    parser.add_argument("--profile-output", default=None, help="Output of the profiling, profile.jsonl or profile_trace.json by default.")
+    parser.add_argument("--profile-memory", action="store_true", help="Also record the change of the traced memory of each stage, the run being about three times slower.")
+    args = parser.parse_args()
+    if not args.vectorized and (args.periods != PERIODS or args.rolling_periods or args.period_format != "wide"):
+        parser.error("--periods, --rolling-periods and --period-format need --vectorized")
 
-# calculate_score_for_one_point()
-calculate_score_for_all_points()
\ No newline at end of file
+    # calculate_score_for_one_point()
+    calculate_score_for_all_points(vectorized=args.vectorized, jobs=args.jobs, resume=args.resume, final_format=args.final_format,
+                                   use_cache=not args.no_cache, periods=args.periods, rolling_length=args.rolling_periods,
+                                   period_format=args.period_format, stages_folder=args.save_stages,
+                                   profile_path=(args.profile_output or PROFILE_PATHS[args.profile_format]) if args.profile else None,
+                                   profile_format=args.profile_format, profile_memory=args.profile_memory)
@@ -407,6 +407,6 @@ def creates_all_rasters():
         write_multiband_tif(output_path=output_path, grid_score_list=grid_score_list, transform_list=transform_list)
     
 
-if "__main__":
+if __name__ == "__main__":
     main_epoch_loop()
     #creates_all_rasters()
\ No newline at end of file
@@ -0,0 +1,74 @@
+from utils.imports import *
+from utils.variables import *
+from data_request.request import get_point_path, write_daily_csv
+from data_request.synthetic import generate_synthetic_values
+from data_processing.main_functions import daily_work, monthly_work, yearly_work
+import pytest
+
+
+# Years of the synthetic points: the precipitation of NO_SEASON_YEAR never starts a season and EMPTY_YEAR has no data
+TEST_START_YEAR, TEST_END_YEAR = 2000, 2005
+NO_SEASON_YEAR = 2001
+EMPTY_YEAR = 2003
+
+
+def make_daily_data(lat, lon, seed=0):
+    """
+    Builds the daily data of a point as loads_data gives it, with the synthetic values of the mock server, a year
+    without season start, a year without data and some missing days.
+
+    Args:
+        lat (float): Latitude of the point.
+        lon (float): Longitude of the point.
+        seed (int): Seed of the missing days.
+
+    Returns:
+        pd.DataFrame: Daily data with 'date' as the index.
+    """
+    dates = pd.date_range(f"{TEST_START_YEAR}-01-01", f"{TEST_END_YEAR}-12-31", freq="D", tz="UTC", name="date")
+    data = pd.DataFrame({variable: generate_synthetic_values(lat, lon, variable, dates).astype(np.float64) for variable in VARIABLES_LIST},
+                        index=dates)
+    data.loc[data.index.year == NO_SEASON_YEAR, "precipitation_sum"] = 0.1
+    data.loc[data.index.year == EMPTY_YEAR] = np.nan
+    rng = np.random.default_rng(seed)
+    for variable in ["precipitation_sum", "temperature_2m_mean", "temperature_2m_max", "soil_moisture_0_to_10cm_mean"]:
+        data.iloc[rng.choice(len(data), 40, replace=False), data.columns.get_loc(variable)] = np.nan
+    return data
+
+
+@pytest.fixture
+def daily_data():
+    return make_daily_data(13.45, -16.57)
+
+
+@pytest.fixture
+def growing_season(daily_data):
+    """
+    Daily growing season data of the point with its indicators.
+    """
+    return daily_work(daily_data)[0]
+
+
+@pytest.fixture
+def yearly_data(daily_data):
+    """
+    Yearly aggregates of the point with the season indicators and the indicator scores.
+    """
+    data_daily, data_yearly_mean_temp = daily_work(daily_data)
+    _, data_yearly_aggregates = monthly_work(data_daily)
+    return yearly_work(data_daily, data_yearly_aggregates, data_yearly_mean_temp)[0]
+
+
+@pytest.fixture
+def point_files(tmp_path):
+    """
+    Daily files of three synthetic points, written as the downloader writes them.
+    """
+    paths = []
+    for index, (lat, lon) in enumerate([(13.45, -16.57), (13.3, -15.1), (13.6, -14.2)]):
+        data = make_daily_data(lat, lon, seed=index)
+        seconds = (data.index - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(seconds=1)
+        path = get_point_path(str(tmp_path), DATASET_FILENAME_BASE, index, "csv")
+        write_daily_csv(seconds.values, data[VARIABLES_LIST].to_numpy(dtype=np.float32), path, lat, lon)
+        paths.append(path)
+    return paths
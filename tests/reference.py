@@ -0,0 +1,59 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.classify import classify_risk_frequency
+
+
+# --- References shared by the tests ---
+# The scores of a year and the classes of a period calculated one at a time, as the pipeline did before its
+# array kernels.
+
+def indicator_scores_by_row(row, thresholds=YEARLY_THRESHOLDS):
+    """
+    Calculates the indicator scores of one year with one condition per score.
+
+    Args:
+        row (pd.Series): A row of the yearly data.
+        thresholds (dict): Threshold values.
+
+    Returns:
+        dict: Score of each indicator.
+    """
+    return {
+        'temperature_score': int(thresholds['yearly_min_temp_suitability_threshold'] <= row['temperature_2m_mean'] <= thresholds['yearly_max_temp_suitability_threshold']
+                                 and row['cv_temperature'] < thresholds['yearly_max_cv_temp_suitability']),
+        'gdd_score': int(thresholds['yearly_min_gdd_suitability_threshold'] <= row['gdd']),
+        'precipitations_score': int(thresholds['yearly_min_prec_suitability_threshold'] <= row['precipitation_sum'] <= thresholds['yearly_max_prec_suitability_threshold']),
+        'ext_precipitation_score': int(row['is_extreme_precipitation'] <= thresholds['yearly_max_ext_prec_days_threshold']),
+        'soil_moisture_score': int(row['soil_moisture_deficit'] <= thresholds['yearly_max_soil_moisture_deficit_threshold']),
+        'wind_score': int(row['is_wind_above_threshold'] <= thresholds['yearly_wind_stress_threshold']),
+        'heat_stress_score': int(row['is_heat_stress'] <= thresholds['yearly_heat_days_stress_threshold']),
+        'humidity_score': int(row['is_humidity_above_threshold'] <= thresholds['yearly_humidity_stress_threshold']),
+        'solar_radiation_score': int(row['solar_radiation_mj'] >= thresholds['yearly_min_solar_radiation_suitability_threshold']),
+        'drought_score': int(row['consecutive_dry_days'] <= thresholds['yearly_dry_days_stress_threshold']),
+        'season_start_shift_score': int(row['season_start_shift'] <= thresholds['yearly_max_season_start_shift']),
+        'season_length_score': int(row['season_length'] >= thresholds['yearly_min_season_length']),
+    }
+
+
+def period_classes_by_loop(data_yearly, periods=PERIODS, score_columns=SCORE_COLUMNS):
+    """
+    Calculates the frequency of null scores of each score and period and classifies it, one period after the
+    other, the Final_Score of a period being the mean of its frequencies and of its classes.
+
+    Args:
+        data_yearly (pd.DataFrame): Yearly scores.
+        periods (list): (start, end) years of each period.
+        score_columns (list): Names of the scores.
+
+    Returns:
+        tuple: Frequency and class of each score of each period, named {score}_{start}_{end}.
+    """
+    frequencies, classes = {}, {}
+    for start, end in periods:
+        period_data = data_yearly.loc[(data_yearly.index.year >= start) & (data_yearly.index.year <= end), score_columns]
+        period_frequencies = ((period_data == 0).sum() / len(period_data) * 100).to_dict()
+        period_classes = {column: classify_risk_frequency(frequency) for column, frequency in period_frequencies.items()}
+        for period_values, values in [(period_frequencies, frequencies), (period_classes, classes)]:
+            period_values["Final_Score"] = np.mean(list(period_values.values()))
+            values.update({f"{column}_{start}_{end}": value for column, value in period_values.items()})
+    return frequencies, classes
@@ -0,0 +1,72 @@
+from utils.imports import *
+from data_processing.classify import (classify_risk_frequency_array, classify_risk_frequency, classify_risk_score_array, classify_risk_score,
+                                      classify_risk_score_codes, build_bin_edges, RISK_LABELS)
+
+
+# Ranges of the classes, (lower, upper] except the two lowest classes of the frequencies which are [lower, upper]
+FREQUENCY_RANGES = [(99, 100, False, 1), (90, 99, False, 0.84), (66, 90, False, 0.67), (33, 66, False, 0.5), (10, 33, True, 0.34),
+                    (1, 10, True, 0.17)]
+RISK_RANGES = [(0.84, 1, "Virtually certain"), (0.67, 0.84, "Very probable"), (0.5, 0.67, "Probable"), (0.34, 0.5, "As likely as not"),
+               (0.17, 0.34, "Unlikely"), (0, 0.17, "Very unlikely")]
+
+
+def classify_frequency_by_ranges(frequency):
+    for lower, upper, includes_lower, frequency_class in FREQUENCY_RANGES:
+        if (lower <= frequency if includes_lower else lower < frequency) and frequency <= upper:
+            return frequency_class
+    return 0
+
+
+def risk_label_by_ranges(score):
+    for lower, upper, label in RISK_RANGES:
+        if lower < score <= upper:
+            return label
+    return "Exceptionally improbable"
+
+
+def around(values):
+    """
+    Gives each value with the floats just below and just above it.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return np.concatenate([np.nextafter(values, -np.inf), values, np.nextafter(values, np.inf)])
+
+
+# Edges of the ranges with their neighbours, values in the ranges, out of the ranges and NaN
+FREQUENCIES = np.concatenate([around([0, 1, 10, 33, 66, 90, 99, 100]), np.linspace(-5, 105, 221), [np.nan, np.inf, -np.inf]])
+SCORES = np.concatenate([around([0, 0.17, 0.34, 0.5, 0.67, 0.84, 1]), np.linspace(-0.5, 1.5, 201), [np.nan, np.inf, -np.inf]])
+
+
+def test_bin_edges():
+    np.testing.assert_array_equal(build_bin_edges([(1, "["), (2, "]")]), [1, np.nextafter(2, np.inf)])
+
+
+def test_frequency_classes_match_the_ranges():
+    expected = [classify_frequency_by_ranges(frequency) for frequency in FREQUENCIES]
+
+    np.testing.assert_array_equal(classify_risk_frequency_array(FREQUENCIES), expected)
+    assert [classify_risk_frequency(frequency) for frequency in FREQUENCIES] == expected
+
+
+def test_frequency_classes_keep_the_shape():
+    frequencies = FREQUENCIES[:24].reshape(2, 3, 4)
+    classes = classify_risk_frequency_array(frequencies)
+
+    assert classes.shape == (2, 3, 4)
+    np.testing.assert_array_equal(classes.ravel(), classify_risk_frequency_array(frequencies.ravel()))
+
+
+def test_risk_labels_match_the_ranges():
+    expected = [risk_label_by_ranges(score) for score in SCORES]
+
+    assert list(classify_risk_score_array(SCORES)) == expected
+    assert [RISK_LABELS[code] for code in classify_risk_score_codes(SCORES)] == expected
+    assert [classify_risk_score(score)[0] for score in SCORES] == expected
+
+
+def test_risk_labels_of_the_final_scores():
+    # Means of the classes of the scores, as the Final_Score of a period
+    classes = np.array([0, 0.17, 0.34, 0.5, 0.67, 0.84, 1])
+    final_scores = np.array([np.mean(np.random.default_rng(seed).choice(classes, 12)) for seed in range(200)])
+
+    assert list(classify_risk_score_array(final_scores)) == [risk_label_by_ranges(score) for score in final_scores]
@@ -0,0 +1,86 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.periods import (get_rolling_periods, parse_periods, count_null_scores_in_periods, classify_periods, periods_to_wide,
+                                     periods_to_long, long_to_wide)
+from tests.reference import period_classes_by_loop
+
+import pytest
+
+
+# Periods of the random scores: overlapping, of one year, partly out of the years and without any year
+TEST_PERIODS = [(1980, 1989), (1985, 2004), (1990, 1990), (1995, 2020), (2030, 2040)]
+
+
+def make_scores(n_points, years, seed=0):
+    rng = np.random.default_rng(seed)
+    return {column: rng.integers(0, 2, (n_points, len(years))) * (rng.random((n_points, len(years))) < 0.9) for column in SCORE_COLUMNS}
+
+
+def get_yearly_frame(scores, years, point):
+    return pd.DataFrame({column: values[point] for column, values in scores.items()},
+                        index=pd.DatetimeIndex(pd.to_datetime({"year": years, "month": 12, "day": 31})))
+
+
+def test_rolling_periods():
+    assert get_rolling_periods(np.arange(1950, 1955), 3) == [(1950, 1952), (1951, 1953), (1952, 1954)]
+    assert get_rolling_periods(np.arange(1950, 1955), 6) == []
+
+
+def test_parse_periods():
+    assert parse_periods("1950-1979,1980-2009") == [(1950, 1979), (1980, 2009)]
+    with pytest.raises(ValueError):
+        parse_periods("1980-1950")
+    with pytest.raises(ValueError):
+        parse_periods("1950")
+
+
+def assert_periods_match_loop(zero_frequency, classification, data_yearly, periods):
+    expected_frequencies, expected_classes = period_classes_by_loop(data_yearly, periods)
+    columns = [f"{column}_{start}_{end}" for start, end in periods for column in SCORE_COLUMNS + ["Final_Score"]]
+    np.testing.assert_allclose(zero_frequency.ravel(), [expected_frequencies[column] for column in columns], rtol=1e-12)
+    np.testing.assert_allclose(classification.ravel(), [expected_classes[column] for column in columns], rtol=1e-12)
+
+
+def test_null_counts_of_the_periods():
+    years = np.arange(1980, 2011)
+    scores = make_scores(2, years)["drought_score"]
+    null_counts, lengths = count_null_scores_in_periods(scores, years, TEST_PERIODS)
+
+    for position, (start, end) in enumerate(TEST_PERIODS):
+        in_period = (years >= start) & (years <= end)
+        assert lengths[position] == in_period.sum()
+        np.testing.assert_array_equal(null_counts[:, position], (scores[:, in_period] == 0).sum(axis=1))
+
+
+@pytest.mark.parametrize("periods", [PERIODS, TEST_PERIODS, get_rolling_periods(np.arange(1980, 2011), 7)])
+def test_period_classes_match_the_loop_reference(periods):
+    years = np.arange(1980, 2011)
+    scores = make_scores(3, years)
+    zero_frequency, classification = classify_periods(scores, years, periods)
+
+    for point in range(3):
+        assert_periods_match_loop(zero_frequency[point], classification[point], get_yearly_frame(scores, years, point), periods)
+
+
+def test_period_classes_of_the_yearly_data(yearly_data):
+    periods = [(2000, 2002), (2001, 2005), (2003, 2003)]
+    scores = {column: yearly_data[column].to_numpy() for column in SCORE_COLUMNS}
+    zero_frequency, classification = classify_periods(scores, yearly_data.index.year.values, periods)
+
+    assert_periods_match_loop(zero_frequency, classification, yearly_data, periods)
+
+
+def test_long_table_back_to_wide():
+    years = np.arange(1980, 2011)
+    scores = make_scores(3, years)
+    zero_frequency, classification = classify_periods(scores, years, TEST_PERIODS)
+    index = pd.Index(["point_0", "point_1", "point_2"], name="filename")
+    lats, lons = np.array([13.1, 13.2, 13.3]), np.array([-16.1, -16.2, -16.3])
+
+    wide = pd.DataFrame({"LAT": lats, "LON": lons, **periods_to_wide(classification, TEST_PERIODS)}, index=index)
+    long = periods_to_long(zero_frequency, classification, index, TEST_PERIODS)
+    rows_per_point = len(TEST_PERIODS) * (len(SCORE_COLUMNS) + 1)
+    long.insert(0, "LON", lons.repeat(rows_per_point))
+    long.insert(0, "LAT", lats.repeat(rows_per_point))
+
+    pd.testing.assert_frame_equal(long_to_wide(long), wide)
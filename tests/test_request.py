@@ -0,0 +1,67 @@
+from utils.imports import *
+from data_request.request import get_missing_ranges, merge_daily_blocks
+
+
+def to_seconds(days):
+    return (pd.DatetimeIndex(days) - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)
+
+
+def test_missing_ranges_without_stored_data():
+    assert get_missing_ranges(None, "1950-01-01", "2050-12-31") == [("1950-01-01", "2050-12-31")]
+
+
+def test_missing_ranges_covered_period():
+    assert get_missing_ranges(("1950-01-01", "2050-12-31"), "1960-01-01", "2000-12-31") == []
+    assert get_missing_ranges(("1950-01-01", "2050-12-31"), "1950-01-01", "2050-12-31") == []
+
+
+def test_missing_ranges_extension_after():
+    assert get_missing_ranges(("1950-01-01", "2024-12-31"), "1950-01-01", "2050-12-31") == [("2025-01-01", "2050-12-31")]
+
+
+def test_missing_ranges_extension_before():
+    assert get_missing_ranges(("1970-01-01", "2050-12-31"), "1950-01-01", "2050-12-31") == [("1950-01-01", "1969-12-31")]
+
+
+def test_missing_ranges_extension_on_both_sides():
+    assert get_missing_ranges(("1970-01-01", "2024-12-31"), "1950-01-01", "2050-12-31") == [("1950-01-01", "1969-12-31"),
+                                                                                            ("2025-01-01", "2050-12-31")]
+
+
+def test_missing_ranges_period_before_stored_data():
+    assert get_missing_ranges(("1970-01-01", "2024-12-31"), "1950-01-01", "1960-12-31") == [("1950-01-01", "1960-12-31")]
+
+
+def test_merge_daily_blocks_sorts_the_pieces():
+    stored_dates = to_seconds(pd.date_range("2000-01-04", "2000-01-06"))
+    new_dates = to_seconds(pd.date_range("2000-01-01", "2000-01-03"))
+    stored_block = np.arange(6, dtype=np.float32).reshape(3, 2)
+    new_block = -np.arange(1, 7, dtype=np.float32).reshape(3, 2)
+
+    dates, block = merge_daily_blocks([stored_dates, new_dates], [stored_block, new_block])
+
+    np.testing.assert_array_equal(dates, to_seconds(pd.date_range("2000-01-01", "2000-01-06")))
+    np.testing.assert_array_equal(block, np.concatenate([new_block, stored_block]))
+    assert block.dtype == np.float32
+
+
+def test_merge_daily_blocks_keeps_the_last_piece_on_overlaps():
+    stored_dates = to_seconds(pd.date_range("2000-01-01", "2000-01-05"))
+    new_dates = to_seconds(pd.date_range("2000-01-04", "2000-01-07"))
+    stored_block = np.zeros((5, 3), dtype=np.float32)
+    new_block = np.ones((4, 3), dtype=np.float32)
+
+    dates, block = merge_daily_blocks([stored_dates, new_dates], [stored_block, new_block])
+
+    np.testing.assert_array_equal(dates, to_seconds(pd.date_range("2000-01-01", "2000-01-07")))
+    np.testing.assert_array_equal(block[:, 0], [0, 0, 0, 1, 1, 1, 1])
+
+
+def test_merge_daily_blocks_keeps_the_nan():
+    dates_list = [to_seconds(["2000-01-02"]), to_seconds(["2000-01-01"])]
+    blocks_list = [np.array([[np.nan, 1]], dtype=np.float32), np.array([[2, np.nan]], dtype=np.float32)]
+
+    dates, block = merge_daily_blocks(dates_list, blocks_list)
+
+    np.testing.assert_array_equal(dates, to_seconds(["2000-01-01", "2000-01-02"]))
+    np.testing.assert_array_equal(block, np.array([[2, np.nan], [np.nan, 1]], dtype=np.float32))
@@ -0,0 +1,70 @@
+from utils.imports import *
+from data_processing.result_sink import FinalScoreSink
+
+
+def make_final_score_row(position):
+    return pd.DataFrame({"LAT": [13 + position / 10], "LON": [-16 + position / 7], "drought_score_1950_1969": [position / 3],
+                         "Final_Score_1950_1969": [0.17 * position]})
+
+
+def write_points(sink, positions):
+    for position in positions:
+        sink.write(f"point_{position}", make_final_score_row(position))
+
+
+def test_csv_sink_resumes_after_a_cut_last_line(tmp_path):
+    path = str(tmp_path / "final.csv")
+    with FinalScoreSink(path, "csv", flush_every=1) as sink:
+        write_points(sink, range(3))
+    expected = FinalScoreSink(path, "csv", resume=True).read()
+
+    # Run killed while writing the last row
+    with open(path, "rb+") as file:
+        file.truncate(os.path.getsize(path) - 5)
+
+    with FinalScoreSink(path, "csv", flush_every=1, resume=True) as sink:
+        assert sink.done == {"point_0", "point_1"}
+        with open(path, "rb") as file:
+            assert file.read().endswith(b"\n")
+        write_points(sink, [position for position in range(3) if f"point_{position}" not in sink.done])
+        df = sink.read()
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert list(df.index) == ["point_0", "point_1", "point_2"]
+
+
+def test_csv_sink_resumes_after_complete_lines(tmp_path):
+    path = str(tmp_path / "final.csv")
+    with FinalScoreSink(path, "csv", flush_every=2) as sink:
+        write_points(sink, range(3))
+
+    sink = FinalScoreSink(path, "csv", resume=True)
+    assert sink.done == {"point_0", "point_1", "point_2"}
+    assert len(sink.read()) == 3
+
+
+def test_csv_sink_starts_again_without_resume(tmp_path):
+    path = str(tmp_path / "final.csv")
+    with FinalScoreSink(path, "csv") as sink:
+        write_points(sink, range(3))
+
+    with FinalScoreSink(path, "csv") as sink:
+        assert not sink.done
+        write_points(sink, [5])
+        assert list(sink.read().index) == ["point_5"]
+
+
+def test_parquet_sink_resumes_without_the_unfinished_part(tmp_path):
+    path = str(tmp_path / "final")
+    with FinalScoreSink(path, "parquet", flush_every=2) as sink:
+        write_points(sink, range(3))
+    # Part of a run killed before it has been renamed
+    make_final_score_row(3).to_parquet(os.path.join(path, "part_000002.parquet.tmp"))
+
+    with FinalScoreSink(path, "parquet", flush_every=2, resume=True) as sink:
+        assert sink.done == {"point_0", "point_1", "point_2"}
+        write_points(sink, [3])
+    df = FinalScoreSink(path, "parquet", resume=True).read()
+
+    assert list(df.index) == ["point_0", "point_1", "point_2", "point_3"]
+    pd.testing.assert_frame_equal(df.loc[["point_3"]].reset_index(drop=True), make_final_score_row(3))
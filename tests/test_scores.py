@@ -0,0 +1,48 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.calculation import indicator_scores
+from tests.reference import indicator_scores_by_row
+
+
+def assert_scores_match_rows(data_yearly, thresholds=YEARLY_THRESHOLDS):
+    scores = pd.DataFrame(indicator_scores(data_yearly, thresholds), index=data_yearly.index)
+    expected = data_yearly.apply(indicator_scores_by_row, axis=1, result_type='expand', thresholds=thresholds)
+    pd.testing.assert_frame_equal(scores, expected, check_dtype=False)
+    return scores
+
+
+def test_indicator_scores_match_the_row_reference(yearly_data):
+    assert_scores_match_rows(yearly_data)
+
+
+def test_indicator_scores_of_missing_values(yearly_data):
+    # A year without data or without season start never meets a condition
+    empty = yearly_data.copy()
+    empty[list(YEARLY_AGG_FUNCTIONS) + ['season_start_shift', 'temperature_2m_mean']] = np.nan
+
+    scores = assert_scores_match_rows(empty)
+    assert (scores.drop(columns='season_length_score') == 0).all().all()
+
+
+def test_indicator_scores_on_the_thresholds(yearly_data):
+    # Each column set to the threshold it is compared with, the inclusive and exclusive comparisons differ
+    on_thresholds = yearly_data.copy()
+    for conditions in INDICATOR_SCORE_RULES.values():
+        for column, _, threshold in conditions:
+            on_thresholds[column] = float(YEARLY_THRESHOLDS[threshold])
+
+    assert_scores_match_rows(on_thresholds)
+
+
+def test_indicator_scores_of_several_threshold_configurations(yearly_data):
+    configurations = [YEARLY_THRESHOLDS,
+                      {**YEARLY_THRESHOLDS, 'yearly_dry_days_stress_threshold': 20, 'yearly_min_season_length': 95},
+                      {**YEARLY_THRESHOLDS, 'yearly_min_gdd_suitability_threshold': 1000, 'yearly_max_cv_temp_suitability': 2}]
+    stacked_thresholds = {name: np.array([configuration[name] for configuration in configurations], dtype=np.float64)[:, np.newaxis]
+                          for name in YEARLY_THRESHOLDS}
+
+    scores = indicator_scores(yearly_data, stacked_thresholds)
+    for position, configuration in enumerate(configurations):
+        expected = assert_scores_match_rows(yearly_data, configuration)
+        for column in INDICATOR_SCORE_RULES:
+            np.testing.assert_array_equal(scores[column][position], expected[column].to_numpy())
@@ -0,0 +1,53 @@
+from utils.imports import *
+from data_processing.calculation import calculate_season_indicators, calculate_season_start, calculate_season_length
+from tests.conftest import TEST_START_YEAR, NO_SEASON_YEAR, EMPTY_YEAR
+
+
+def season_indicators_by_year(data_daily, precipitation):
+    """
+    Applies calculate_season_start and calculate_season_length to each year of the precipitation, a year without
+    season start having a NaN shift.
+    """
+    data_daily = data_daily.assign(precipitation_sum=precipitation)
+    shifts, lengths = [], []
+    for _, df in data_daily.groupby(data_daily.index.year):
+        has_start = (df['precipitation_sum'].rolling(window=7).sum() >= 5).any()
+        shifts.append(calculate_season_start(df) if has_start else np.nan)
+        lengths.append(calculate_season_length(df))
+    return shifts, lengths
+
+
+def assert_season_indicators_match(data_daily, stacked_precipitation):
+    season_start_shift, season_length = calculate_season_indicators(stacked_precipitation, data_daily.index)
+
+    for position, precipitation in enumerate(stacked_precipitation):
+        expected_shift, expected_length = season_indicators_by_year(data_daily, precipitation)
+        np.testing.assert_array_equal(season_start_shift[position], expected_shift)
+        np.testing.assert_array_equal(season_length[position], expected_length)
+
+
+def test_season_indicators_match_the_yearly_reference(growing_season):
+    assert_season_indicators_match(growing_season, growing_season['precipitation_sum'].to_numpy()[np.newaxis, :])
+
+
+def test_season_indicators_of_stacked_points(growing_season):
+    precipitation = growing_season['precipitation_sum'].to_numpy()
+    assert_season_indicators_match(growing_season, np.stack([precipitation, precipitation * 0.5, np.zeros_like(precipitation)]))
+
+
+def test_season_indicators_of_years_without_season(growing_season):
+    season_start_shift, season_length = calculate_season_indicators(growing_season['precipitation_sum'].to_numpy()[np.newaxis, :],
+                                                                    growing_season.index)
+
+    without_season = [NO_SEASON_YEAR - TEST_START_YEAR, EMPTY_YEAR - TEST_START_YEAR]
+    assert np.isnan(season_start_shift[0, without_season]).all()
+    assert (season_length[0, without_season] == 0).all()
+    assert not np.isnan(np.delete(season_start_shift[0], without_season)).any()
+
+
+def test_season_length_with_other_rules(growing_season):
+    rules = {'threshold_start': 10, 'consecutive_days_start': 3, 'threshold_end': 1, 'consecutive_days_end': 10}
+    _, season_length = calculate_season_indicators(growing_season['precipitation_sum'].to_numpy()[np.newaxis, :], growing_season.index, **rules)
+
+    np.testing.assert_array_equal(season_length[0], [calculate_season_length(df, **rules)
+                                                     for _, df in growing_season.groupby(growing_season.index.year)])
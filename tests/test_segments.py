@@ -0,0 +1,89 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.calculation import get_segment_starts, nan_mean_segments, coefficient_of_variation_segments, aggregate_growing_season
+from tests.conftest import TEST_START_YEAR, EMPTY_YEAR
+
+
+def coefficient_of_variation(values):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return values.std() / values.mean() * 100 if values.count() > 1 else np.nan
+
+
+def aggregate_by_resampling(data_daily):
+    """
+    Aggregates the daily data into calendar months and years by resampling, the months out of the season being
+    empty rows, with the coefficients of variation of the months of each year.
+    """
+    data_monthly = data_daily.resample('ME').agg(MONTHLY_AGG_FUNCTIONS)
+    for column, cv_column in [('temperature_2m_mean', 'cv_temperature'), ('precipitation_sum', 'cv_precipitation')]:
+        data_monthly[cv_column] = data_monthly[column].groupby(data_monthly.index.year).transform(coefficient_of_variation)
+    return data_monthly, data_monthly.resample('YE').agg(YEARLY_AGG_FUNCTIONS)
+
+
+def assert_aggregates_match_resampling(data_daily):
+    data_monthly, data_yearly = aggregate_growing_season(data_daily)
+    expected_monthly, expected_yearly = aggregate_by_resampling(data_daily)
+
+    pd.testing.assert_frame_equal(data_monthly, expected_monthly.loc[data_monthly.index], check_dtype=False, check_freq=False, rtol=1e-12)
+    pd.testing.assert_frame_equal(data_yearly, expected_yearly, check_dtype=False, check_freq=False, rtol=1e-12)
+    return data_monthly, data_yearly
+
+
+def make_segmented_values(seed=0):
+    """
+    Values of two points in segments of different lengths, with missing values, a segment of one value and a
+    segment without any value.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.repeat(np.arange(8), [5, 1, 3, 4, 6, 2, 7, 3])
+    values = rng.gamma(2, 10, (2, len(keys)))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, keys == 3] = np.nan
+    return keys, values
+
+
+def test_segment_starts():
+    np.testing.assert_array_equal(get_segment_starts(np.array([1, 1, 2, 2, 2, 5, 7, 7])), [0, 2, 5, 6])
+
+
+def test_nan_mean_segments_match_the_groupby():
+    keys, values = make_segmented_values()
+    means = nan_mean_segments(values, get_segment_starts(keys))
+
+    for point in range(2):
+        np.testing.assert_allclose(means[point], pd.Series(values[point]).groupby(keys).mean().to_numpy(), rtol=1e-12)
+
+
+def test_coefficient_of_variation_segments_match_the_groupby():
+    keys, values = make_segmented_values(1)
+    coefficients = coefficient_of_variation_segments(values, get_segment_starts(keys))
+
+    for point in range(2):
+        expected = pd.Series(values[point]).groupby(keys).apply(coefficient_of_variation).to_numpy()
+        np.testing.assert_allclose(coefficients[point], expected, rtol=1e-12)
+
+
+def test_coefficient_of_variation_segments_with_null_values():
+    # The missing values of each segment are null values, as the empty months of the resampling
+    keys, values = make_segmented_values(2)
+    lengths = np.bincount(keys)
+    n_values = lengths + np.array([7, 0, 2, 1, 0, 3, 5, 9])
+    coefficients = coefficient_of_variation_segments(values, get_segment_starts(keys), n_values)
+
+    for point in range(2):
+        expected = [coefficient_of_variation(pd.Series(np.concatenate([values[point, keys == key], np.zeros(n_values[key] - lengths[key])])))
+                    for key in range(len(lengths))]
+        np.testing.assert_allclose(coefficients[point], expected, rtol=1e-12)
+
+
+def test_growing_season_aggregates_match_the_resampling(growing_season):
+    data_monthly, data_yearly = assert_aggregates_match_resampling(growing_season)
+
+    # Only the months of the season are kept
+    assert set(data_monthly.index.month) == set(range(SEASON_THRESHOLDS['start'], SEASON_THRESHOLDS['end'] + 1))
+    assert data_yearly.loc[str(EMPTY_YEAR), ['cv_temperature', 'cv_precipitation']].isna().all(axis=None)
+
+
+def test_growing_season_aggregates_of_a_partial_first_year(growing_season):
+    # The data starts in the middle of the season of its first year
+    assert_aggregates_match_resampling(growing_season[growing_season.index >= pd.Timestamp(f"{TEST_START_YEAR}-08-15", tz="UTC")])
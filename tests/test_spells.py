@@ -0,0 +1,90 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.calculation import calculate_spells, spell_indicators, get_segment_starts
+
+import pytest
+
+
+def spells_by_loop(in_spell, breaks_spell, segment_keys, reset=False):
+    """
+    Follows the spells day by day, giving the length of the current spell of each day, and the longest spell and
+    the number of spells started in each segment.
+    """
+    segments = np.unique(segment_keys)
+    run = np.zeros(len(in_spell), dtype=np.int64)
+    longest = np.zeros(len(segments), dtype=np.int64)
+    spell_count = np.zeros(len(segments), dtype=np.int64)
+    current = 0
+    for day in range(len(in_spell)):
+        segment = np.searchsorted(segments, segment_keys[day])
+        if reset and (day == 0 or segment_keys[day] != segment_keys[day - 1]):
+            current = 0
+        if in_spell[day]:
+            current += 1
+            spell_count[segment] += current == 1
+        elif breaks_spell[day]:
+            current = 0
+        run[day] = current
+        longest[segment] = max(longest[segment], current)
+    return run, longest, spell_count
+
+
+def consecutive_dry_days_by_groups(data_daily, reset=False):
+    """
+    Counts the dry days in a row with a cumulative sum grouped by the wet days, and by the years if the spells
+    are reset at the start of each season.
+    """
+    is_wet = data_daily['precipitation_sum'] >= DAILY_THRESHOLDS['daily_dry_day_threshold']
+    is_dry = (data_daily['precipitation_sum'] < DAILY_THRESHOLDS['daily_dry_day_threshold']).astype(int)
+    return is_dry.groupby([is_wet.cumsum(), data_daily.index.year] if reset else [is_wet.cumsum()]).cumsum().to_numpy()
+
+
+def make_spell_days(seed=0):
+    """
+    Days of two points in segments, each day extending a spell, breaking it or, for the missing days, doing neither.
+    """
+    rng = np.random.default_rng(seed)
+    segment_keys = np.repeat(np.arange(6), [10, 1, 30, 7, 25, 12])
+    state = rng.choice(3, (2, len(segment_keys)), p=[0.6, 0.3, 0.1])
+    # A segment fully in a spell and a segment without any data
+    state[:, segment_keys == 2] = 0
+    state[:, segment_keys == 3] = 2
+    return segment_keys, state == 0, state == 1
+
+
+@pytest.mark.parametrize("reset", [False, True])
+def test_spells_match_the_day_by_day_loop(reset):
+    segment_keys, in_spell, breaks_spell = make_spell_days()
+    run, longest, spell_count = calculate_spells(in_spell, breaks_spell, get_segment_starts(segment_keys), reset)
+
+    for point in range(2):
+        expected_run, expected_longest, expected_count = spells_by_loop(in_spell[point], breaks_spell[point], segment_keys, reset)
+        np.testing.assert_array_equal(run[point], expected_run)
+        np.testing.assert_array_equal(longest[point], expected_longest)
+        np.testing.assert_array_equal(spell_count[point], expected_count)
+
+
+def test_spells_without_segments():
+    in_spell = np.array([True, True, False, True, True, True, False, False, True])
+    run, longest, spell_count = calculate_spells(in_spell)
+
+    np.testing.assert_array_equal(run, [1, 2, 0, 1, 2, 3, 0, 0, 1])
+    np.testing.assert_array_equal(longest, [3])
+    np.testing.assert_array_equal(spell_count, [3])
+
+
+@pytest.mark.parametrize("reset", [False, True])
+def test_consecutive_dry_days_match_the_grouped_cumsum(growing_season, reset):
+    indicators = spell_indicators(growing_season, growing_season.index, reset=reset)
+
+    np.testing.assert_array_equal(indicators['consecutive_dry_days'], consecutive_dry_days_by_groups(growing_season, reset))
+
+
+def test_spell_indicators_of_stacked_points(growing_season):
+    precipitation = growing_season['precipitation_sum'].to_numpy()
+    stacked = np.stack([precipitation, precipitation[::-1], np.full_like(precipitation, np.nan)])
+    indicators = spell_indicators({'precipitation_sum': stacked}, growing_season.index)
+
+    for position, values in enumerate(stacked):
+        expected = consecutive_dry_days_by_groups(growing_season.assign(precipitation_sum=values))
+        np.testing.assert_array_equal(indicators['consecutive_dry_days'][position], expected)
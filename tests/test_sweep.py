@@ -0,0 +1,56 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.main_functions import loads_data, daily_work, monthly_work, yearly_work
+from data_processing.sweep import build_threshold_grid, sweep_points, sweep_all_points
+from data_processing.vectorized import get_points_index
+from tests.reference import indicator_scores_by_row, period_classes_by_loop
+
+import pytest
+
+
+# Thresholds varied by the tests, whose values change the scores of the synthetic points
+SWEEP_TEST_VARIATIONS = {'yearly_dry_days_stress_threshold': [7, 25], 'yearly_min_season_length': [90, 100, 110]}
+
+
+def get_reference_final_scores(filename, thresholds):
+    """
+    Final scores of a point, the yearly aggregates of the serial pipeline being scored row by row with the
+    given thresholds and the periods classified one by one.
+    """
+    data, lat, lon = loads_data(filename)
+    data_daily, data_yearly_mean_temp = daily_work(data)
+    _, data_yearly_aggregates = monthly_work(data_daily)
+    data_yearly, _ = yearly_work(data_daily, data_yearly_aggregates, data_yearly_mean_temp)
+    scores = data_yearly.apply(indicator_scores_by_row, axis=1, result_type='expand', thresholds=thresholds)
+    _, classes = period_classes_by_loop(scores)
+    return pd.Series({"LAT": lat, "LON": lon, **classes})
+
+
+def test_threshold_grid():
+    configurations = build_threshold_grid(SWEEP_TEST_VARIATIONS)
+
+    assert len(configurations) == 6
+    assert configurations[0] == {**YEARLY_THRESHOLDS, 'yearly_dry_days_stress_threshold': 7, 'yearly_min_season_length': 90}
+    assert configurations[-1] == {**YEARLY_THRESHOLDS, 'yearly_dry_days_stress_threshold': 25, 'yearly_min_season_length': 110}
+    with pytest.raises(ValueError):
+        build_threshold_grid({'unknown_threshold': [1]})
+
+
+def test_sweep_matches_the_serial_reference(point_files):
+    configurations = build_threshold_grid(SWEEP_TEST_VARIATIONS)
+    sweep_df, others = sweep_points(point_files, configurations, config_chunk_size=4)
+
+    assert others == []
+    for configuration_position, configuration in enumerate(configurations):
+        for filename, point in zip(point_files, get_points_index(point_files)):
+            expected = get_reference_final_scores(filename, configuration)
+            row = sweep_df.loc[(configuration_position, point)]
+            np.testing.assert_allclose(row[expected.index].to_numpy(dtype=np.float64), expected.to_numpy(dtype=np.float64), rtol=1e-12)
+
+
+def test_sweep_of_all_points_by_chunks(point_files):
+    configurations = build_threshold_grid(SWEEP_TEST_VARIATIONS)
+    by_chunks = sweep_all_points(point_files, configurations, chunk_size=2)
+    at_once, _ = sweep_points(point_files, configurations)
+
+    pd.testing.assert_frame_equal(by_chunks, at_once)
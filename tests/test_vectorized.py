@@ -0,0 +1,18 @@
+from utils.imports import *
+from utils.variables import *
+from data_processing.periods import get_rolling_periods
+from data_processing.vectorized import score_points, score_all_points
+from tests.conftest import TEST_START_YEAR, TEST_END_YEAR
+
+
+def test_rolling_periods_of_chunks_covering_other_years(point_files):
+    # The last point starts two years after the other ones, so it is scored in a chunk of its own
+    data = pd.read_csv(point_files[-1], index_col=0)
+    data[data["date"] >= f"{TEST_START_YEAR + 2}-01-01"].to_csv(point_files[-1])
+    periods = get_rolling_periods(np.arange(TEST_START_YEAR, TEST_END_YEAR + 1), 3)
+
+    final_score_df = score_all_points(point_files, chunk_size=2, rolling_length=3)
+    expected = pd.concat([score_points(point_files[:2], periods)[0], score_points(point_files[2:], periods)[0]])
+
+    pd.testing.assert_frame_equal(final_score_df, expected)
+    assert not final_score_df.isna().any(axis=None)
@@ -1,6 +1,7 @@
 
 import time
 import os
+import shutil
 from pyproj import CRS
 import pandas as pd 
 from datetime import datetime, date
@@ -11,16 +12,37 @@ import requests
 import geopandas as gpd
 import tempfile
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.csv as pv
+import pyarrow.compute as pc
+import zarr
 
 import base64
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
 from matplotlib.backend_bases import MouseEvent
 import openmeteo_requests 
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+import flatbuffers
+import zlib
+import warnings
 import time
-import requests_cache
-from retry_requests import retry
+import sqlite3
 from tqdm import tqdm
+import threading
+import hashlib
+import tracemalloc
+import functools
+import random
+import collections
+import contextlib
+import io
+import itertools
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 
 # Raster viz part
@@ -0,0 +1,126 @@
+from utils.imports import *
+
+
+# --- SQLite store of the caches ---
+# Key value store of compressed bytes in a SQLite file, bounded in size by evicting the least recently used entries,
+# with optional expiry. The response cache of the downloader and the result cache of the processing are both built
+# on it, each in its own file.
+
+class SQLiteCache:
+    """
+    Bounded and compressed key value store, with hit and miss counters.
+
+    Args:
+        path (str): Path to the SQLite file.
+        max_bytes (int): Maximum size of the compressed entries, the least recently used ones are evicted above it.
+        max_age_days (float): Age after which an entry is considered stale and removed, None to keep entries forever.
+        compression_level (int): zlib compression level of the entries.
+        table (str): Name of the table of the entries.
+    """
+    def __init__(self, path, max_bytes, max_age_days=None, compression_level=6, table="entries"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.compression_level = compression_level
+        self.table = table
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "bytes_saved": 0, "evictions": 0}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, payload BLOB, raw_size INTEGER, "
+            "stored_size INTEGER, created REAL, last_access REAL)"
+        )
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        self.connection.commit()
+
+    @contextlib.contextmanager
+    def disabled(self):
+        """
+        Context in which the cache is neither read nor written, for example to benchmark the uncached path.
+        """
+        self.enabled = False
+        try:
+            yield
+        finally:
+            self.enabled = True
+
+    def get(self, key):
+        """
+        Reads an entry from the cache.
+
+        Args:
+            key (str): Key of the entry.
+
+        Returns:
+            bytes: The entry, None if it is not in the cache or is stale.
+        """
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            row = self.connection.execute(f"SELECT payload, raw_size, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and self.max_age_days is not None and now - row[2] > self.max_age_days * 86400:
+                self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.connection.commit()
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+
+            self.connection.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+            self.counters["hits"] += 1
+            self.counters["bytes_saved"] += row[1]
+
+        return zlib.decompress(row[0])
+
+    def put(self, key, value):
+        """
+        Stores an entry in the cache, then evicts the least recently used entries if the cache is too big.
+
+        Args:
+            key (str): Key of the entry.
+            value (bytes): The entry.
+        """
+        if not self.enabled:
+            return
+
+        payload = zlib.compress(value, self.compression_level)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?, ?)",
+                                    (key, payload, len(value), len(payload), now, now))
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in its maximum size. Called with the lock held.
+        """
+        total = self.connection.execute(f"SELECT COALESCE(SUM(stored_size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, stored_size in self.connection.execute(f"SELECT key, stored_size FROM {self.table} ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total -= stored_size
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        """
+        Gives the counters of the cache since it has been opened, and its current content.
+
+        Returns:
+            dict: Hits, misses, hit rate, bytes given back by the hits, evictions, entries, raw and stored bytes.
+        """
+        with self.lock:
+            entries, raw_bytes, stored_bytes = self.connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(stored_size), 0) FROM {self.table}").fetchone()
+            requests_count = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "hit_rate": self.counters["hits"] / requests_count if requests_count else 0,
+                    "entries": entries, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
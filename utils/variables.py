@@ -9,11 +9,101 @@ SCORE_COLUMNS = ['temperature_score', 'gdd_score', 'precipitations_score', 'ext_
 DATASET_FOLDER ="Extended_Gambie_dataset"    
 GRAPH_FOLDER = "Extended_Gambie_graphs"
 FINAL_CSV_PATH = "extended_final.csv"
+# Folder of Parquet parts written instead of the CSV file with --final-format parquet
+FINAL_PARQUET_PATH = "extended_final.parquet"
+# Number of final score rows kept in memory before being appended to the output
+FINAL_SINK_FLUSH_EVERY = 50
 COORDINATES_FILE = "unique_coords_to_request.csv"
 SHAPE_FILE_PATH  = "shape_folder_Gambia/AOI_Gambia.shp"
 RASTERS_FOLDER = "All_rasters"
 YEARLY_AGG_FOLDER = "CSV_yearly_agg_rand"
 DAILY_AGG_FOLDER = "CSV_daily_agg_rand"
+DATASET_FILENAME_BASE = "cmip6_era5_data_daily"
+# Format of the per point files written by the downloader: "csv" or "parquet"
+DATASET_FORMAT = "csv"
+DATASET_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet"}
+PARQUET_COMPRESSION = "zstd"
+PARQUET_LAT_KEY = "lat"
+PARQUET_LON_KEY = "lon"
+OPEN_METEO_URL = "https://climate-api.open-meteo.com/v1/climate"
+# Date range requested to the API, the files already saved are only extended with the missing days
+DATA_START_DATE = "1950-01-01"
+DATA_END_DATE = "2050-12-31"
+# CMIP6 models of the climate API. The default model is stored at the historical paths, the other ones next to them
+DATA_MODEL = "MRI_AGCM3_2_S"
+CLIMATE_MODELS = ["CMCC_CM2_VHR4", "FGOALS_f3_H", "HiRAM_SIT_HR", "MRI_AGCM3_2_S", "EC_Earth3P_HR", "MPI_ESM1_2_XR", "NICAM16_8S"]
+
+# Consolidated cube of all the points optionally written by the downloader
+CUBE_PATH = "climate_cube.zarr"
+CUBE_DIMENSIONS = ["point", "time", "variable"]
+# One point per chunk lets the workers write in parallel. The chunks of 366 days are not aligned on the calendar years:
+# each non leap year shifts their start one more day after the first of January (75 days by 2050), so reading one year usually touches two chunks
+CUBE_CHUNKS = {"point": 1, "time": 366, "variable": len(VARIABLES_LIST)}
+
+# Request budget of the downloader
+REQUEST_CONCURRENCY = 4
+REQUESTS_PER_MINUTE = 60
+REQUEST_BATCH_SIZE = 10
+REQUEST_RETRIES = 5
+REQUEST_BACKOFF_FACTOR = 0.2
+RATE_LIMIT_PAUSE = 60
+
+# Cache of the API responses, one compressed entry per location
+RESPONSE_CACHE_PATH = "response_cache.sqlite"
+RESPONSE_CACHE_MAX_BYTES = 2 * 1024**3
+RESPONSE_CACHE_MAX_AGE_DAYS = None
+RESPONSE_CACHE_COMPRESSION_LEVEL = 6
+RESPONSE_CACHE_COORDINATE_DECIMALS = 4
+
+# Cache of the results of each point, keyed by the content of its file and by the configuration.
+# Increase the version when the calculations change without any of the hashed settings changing.
+RESULT_CACHE_PATH = "result_cache.sqlite"
+RESULT_CACHE_MAX_BYTES = 512 * 1024**2
+RESULT_CACHE_VERSION = 1
+
+# Intermediate tables of each stage of process_data, one Parquet file per point in a folder per table, and the
+# manifest recording the file and the settings each of them has been calculated from
+STAGES_FOLDER = "Intermediate_stages"
+STAGES_MANIFEST_FILENAME = "manifest.jsonl"
+
+# Output of the profiling of the stages of process_data, for each format
+PROFILE_PATHS = {"jsonl": "profile.jsonl", "chrome": "profile_trace.json"}
+
+# Local stand-in of the API used to benchmark the downloader
+MOCK_SERVER_HOST = "127.0.0.1"
+MOCK_SERVER_PORT = 8080
+# A century of data is about 1.6 MB per location
+MOCK_SERVER_CACHE_SIZE = 256
+
+# Manifest of the downloaded files, stored in the dataset folder
+MANIFEST_FILENAME = "manifest.jsonl"
+MANIFEST_READ_CHUNK_SIZE = 1 << 20
+
+# Vectorized scoring engine: the variables used by the indicators, and the number of points stacked together
+# Daily variables of the dataset used by each score, the other ones are not loaded
+SCORE_VARIABLES = {
+    'temperature_score': ['temperature_2m_mean'],
+    'gdd_score': ['temperature_2m_max', 'temperature_2m_min'],
+    'precipitations_score': ['precipitation_sum'],
+    'ext_precipitation_score': ['precipitation_sum'],
+    'soil_moisture_score': ['soil_moisture_0_to_10cm_mean'],
+    'wind_score': ['wind_speed_10m_max'],
+    'heat_stress_score': ['temperature_2m_max'],
+    'drought_score': ['precipitation_sum'],
+    'humidity_score': ['relative_humidity_2m_mean'],
+    'solar_radiation_score': ['shortwave_radiation_sum'],
+    'season_start_shift_score': ['precipitation_sum'],
+    'season_length_score': ['precipitation_sum'],
+}
+# Size of the blocks parsed at once by the projected loader
+LOADER_BLOCK_SIZE = 1 << 20
+
+VECTORIZED_VARIABLES = ['precipitation_sum', 'temperature_2m_mean', 'temperature_2m_max', 'temperature_2m_min', 'wind_speed_10m_max',
+                        'relative_humidity_2m_mean', 'soil_moisture_0_to_10cm_mean', 'shortwave_radiation_sum']
+VECTORIZED_CHUNK_SIZE = 64
+# Threshold configurations scored at once by the sensitivity sweep, and its output
+SWEEP_CONFIG_CHUNK_SIZE = 64
+SWEEP_CSV_PATH = "sweep_final.csv"
 
 
 PERIODS = [
@@ -24,6 +114,9 @@ PERIODS = [
     (2030, 2050)
     ]
 
+# Number of years of the rolling windows of the period engine
+ROLLING_PERIOD_LENGTH = 20
+
 SEASON_THRESHOLDS = {
     'start': 7,
     'end': 10
@@ -48,6 +141,26 @@ YEARLY_THRESHOLDS = {
     'yearly_wind_stress_threshold': 10
 }
 
+# Rules of the yearly indicator scores: a score is 1 when all its conditions are met, each condition being
+# (yearly column, comparison, name of the threshold in YEARLY_THRESHOLDS). A missing value never meets a condition.
+INDICATOR_SCORE_RULES = {
+    'temperature_score': [('temperature_2m_mean', '>=', 'yearly_min_temp_suitability_threshold'),
+                          ('temperature_2m_mean', '<=', 'yearly_max_temp_suitability_threshold'),
+                          ('cv_temperature', '<', 'yearly_max_cv_temp_suitability')],
+    'gdd_score': [('gdd', '>=', 'yearly_min_gdd_suitability_threshold')],
+    'precipitations_score': [('precipitation_sum', '>=', 'yearly_min_prec_suitability_threshold'),
+                             ('precipitation_sum', '<=', 'yearly_max_prec_suitability_threshold')],
+    'ext_precipitation_score': [('is_extreme_precipitation', '<=', 'yearly_max_ext_prec_days_threshold')],
+    'soil_moisture_score': [('soil_moisture_deficit', '<=', 'yearly_max_soil_moisture_deficit_threshold')],
+    'wind_score': [('is_wind_above_threshold', '<=', 'yearly_wind_stress_threshold')],
+    'heat_stress_score': [('is_heat_stress', '<=', 'yearly_heat_days_stress_threshold')],
+    'humidity_score': [('is_humidity_above_threshold', '<=', 'yearly_humidity_stress_threshold')],
+    'solar_radiation_score': [('solar_radiation_mj', '>=', 'yearly_min_solar_radiation_suitability_threshold')],
+    'drought_score': [('consecutive_dry_days', '<=', 'yearly_dry_days_stress_threshold')],
+    'season_start_shift_score': [('season_start_shift', '<=', 'yearly_max_season_start_shift')],
+    'season_length_score': [('season_length', '>=', 'yearly_min_season_length')],
+}
+
 DAILY_THRESHOLDS = {
     'gdd_base_temp': 10,
     'daily_ext_prec_threshold': 40,
@@ -58,6 +171,14 @@ DAILY_THRESHOLDS = {
     'daily_humidity_risk': 90
 }
 
+# Spell indicators of add_indicators: each day counts the days in a row meeting (variable, comparison, name of the
+# threshold in DAILY_THRESHOLDS) until the last day not meeting it, a day without data keeping the count
+SPELL_INDICATORS = {
+    'consecutive_dry_days': ('precipitation_sum', '<', 'daily_dry_day_threshold'),
+}
+# Restart the spells at the start of each growing season instead of carrying them over from the previous one
+SPELL_RESET_AT_SEASON_START = False
+
 MONTHLY_AGG_FUNCTIONS = {
     'temperature_2m_mean': 'mean',
     'precipitation_sum': 'sum',